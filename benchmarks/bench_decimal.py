@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+#
+#  Compares Decimal v1 (str) and v2 (coefficient, exponent) encodings of STANDARD_REGISTRY:
+#  dump and load time of a list of prices and quantities and the size of the data packed by msgpack.
+#
+#  Usage (with charon installed or on PYTHONPATH): python benchmarks/bench_decimal.py [--count 100000]
+#
+import argparse
+import decimal
+import timeit
+
+import charon
+from charon.extensions import DECIMAL_V2_REGISTRY, STANDARD_REGISTRY
+
+try:
+	import msgpack
+except ImportError:
+	msgpack = None
+
+
+
+def version_registry(version: int) -> charon.CodecRegistry:
+	'''
+	Returns registry holding only the Decimal dumper and loader of `version` (the v2 dumper is in DECIMAL_V2_REGISTRY)
+	'''
+	# pylint: disable=protected-access
+	source = STANDARD_REGISTRY if version == 1 else DECIMAL_V2_REGISTRY
+	registry = charon.CodecRegistry()
+	registry.dumper(decimal.Decimal, version = version, flat = version in source._flat_dumpers['Decimal'])(
+		source._dumpers['Decimal'][version]
+	)
+	registry.loader(decimal.Decimal, version = version)(STANDARD_REGISTRY._loaders['Decimal'][version])
+	return registry
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--count', type = int, default = 100000)
+	parser.add_argument('--repeat', type = int, default = 3)
+	args = parser.parse_args()
+
+	samples = {
+		'prices': [decimal.Decimal(i * 7 % 100000) / 100 for i in range(args.count)],
+		'quantities': [decimal.Decimal(i % 1000) for i in range(args.count)],
+		'precise': [decimal.Decimal(i) / 7 for i in range(1, args.count + 1)],
+	}
+
+	print('{:<12} {:>8} {:>10} {:>10} {:>12}'.format('case', 'version', 'dump ms', 'load ms', 'msgpack B'))
+	for name, data in samples.items():
+		for version in (1, 2):
+			codec = charon.Codec([version_registry(version)], format_version = 2)
+			dumped = codec.dump(data)
+			dump = min(timeit.repeat(lambda: codec.dump(data), number = 1, repeat = args.repeat))
+			load = min(timeit.repeat(lambda: codec.load(dumped), number = 1, repeat = args.repeat))
+			size = len(msgpack.packb(dumped, use_bin_type = True)) if msgpack is not None else '-'
+			print('{:<12} {:>8} {:>10.1f} {:>10.1f} {:>12}'.format(name, version, dump * 1000, load * 1000, size))
+
+
+if __name__ == '__main__':
+	main()
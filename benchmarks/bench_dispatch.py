@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+#
+#  Compares the dispatch index of charon.Codec against the linear registry scan
+#  the codec used before (kept here as `scan_dump` and `scan_load`).
+#
+#  Usage (with charon installed or on PYTHONPATH): python benchmarks/bench_dispatch.py [--registries 12] [--objects 10000]
+#
+from typing import Any, List
+
+import argparse
+import timeit
+
+import charon
+
+
+
+def make_registries(count: int) -> List[charon.CodecRegistry]:
+	'''
+	Creates `count` registries, each with dumpers and loaders for four distinct classes
+	'''
+	registries = []
+	for i in range(count):
+		registry = charon.CodecRegistry()
+		for j in range(4):
+			cls = type('Class_{}_{}'.format(i, j), (), {'__init__': lambda self, v = 0: setattr(self, 'v', v)})
+			registry.dumper(cls, version = 1)(lambda obj: obj.v)
+			registry.loader(cls, version = 1)(lambda data, cls = cls: cls(data))
+		registries.append(registry)
+	return registries
+
+
+def scan_dump(registries: List[charon.CodecRegistry], obj: Any) -> Any:
+	dtype = type(obj) # NOQA
+
+	if dtype in {int, float, bool, str, bytes, type(None)}:
+		return obj
+	elif dtype in {list, tuple}:
+		return [scan_dump(registries, k) for k in obj]
+	elif dtype is dict:
+		return {'!meta': '!dict',
+			'values': [{'key': scan_dump(registries, k), 'value': scan_dump(registries, v)} for k, v in obj.items()]
+		}
+
+	for registry in reversed(registries):
+		if registry.dumpable(obj):
+			dumped = registry.dump(obj)
+			dumped['params'] = scan_dump(registries, dumped['params'])
+			return dumped
+
+	raise ValueError('Unsupported serialization object type')
+
+
+def scan_load(registries: List[charon.CodecRegistry], data: Any) -> Any:
+	dtype = type(data) # NOQA
+
+	if dtype in {int, float, bool, str, bytes, type(None)}:
+		return data
+	elif dtype in {list, tuple}:
+		return [scan_load(registries, k) for k in data]
+	elif data['!meta'] == '!dict':
+		return {scan_load(registries, v['key']): scan_load(registries, v['value']) for v in data['values']}
+
+	for registry in reversed(registries):
+		if registry.loadable(data):
+			return registry.load(data, scan_load(registries, data['params']))
+
+	raise KeyError('Cannot restore object')
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description = __doc__)
+	parser.add_argument('--registries', type = int, default = 12)
+	parser.add_argument('--objects', type = int, default = 10000)
+	parser.add_argument('--repeat', type = int, default = 5)
+	args = parser.parse_args()
+
+	registries = make_registries(args.registries)
+	codec = charon.Codec(registries)
+
+	# Classes from the first registry are the worst case for the scan, it walks the registries from the end
+	classes = [cls for registry in registries[:1] for cls in registry._dumpers] # pylint: disable=protected-access
+	objects = [registries[0]._loaders[classes[i % len(classes)]][1](i) for i in range(args.objects)] # pylint: disable=protected-access
+	encoded = codec.dump(objects)
+	assert encoded == scan_dump(registries, objects)
+
+	cases = [
+		('dump / scan', lambda: scan_dump(registries, objects)),
+		('dump / index', lambda: codec.dump(objects)),
+		('load / scan', lambda: scan_load(registries, encoded)),
+		('load / index', lambda: codec.load(encoded)),
+	]
+
+	print('{} registries, {} objects per run'.format(args.registries, args.objects))
+	for name, func in cases:
+		best = min(timeit.repeat(func, number = 1, repeat = args.repeat))
+		print('{:<16} {:>10.2f} ms {:>12.0f} objects/s'.format(name, best * 1000, args.objects / best))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+#
+#  Compares the recursive and the iterative (explicit stack) engines of charon.Codec
+#  on deep and wide trees. The iterative engine exists for depth safety, not speed: it is on par on primitive
+#  lists and dumps, loads of wide trees of small dicts and objects are slower.
+#
+#  Usage (with charon installed or on PYTHONPATH): python benchmarks/bench_engines.py
+#
+from typing import Any
+
+import argparse
+import decimal
+import timeit
+
+import charon
+from charon.extensions import STANDARD_REGISTRY
+
+
+
+def deep_tree(depth: int) -> Any:
+	root = node = [] # type: list
+	for i in range(depth):
+		child = [i, 'x', i * 0.5] # type: list
+		node.append({'level': i, 'child': child})
+		node = child
+	return root
+
+
+def wide_tree(width: int) -> Any:
+	return [
+		{'id': i, 'price': decimal.Decimal(i) / 100, 'tags': ['a', 'b', i], 'qty': [i, i + 1, i + 2, i + 3]}
+		for i in range(width)
+	]
+
+
+def primitive_lists(count: int) -> Any:
+	return [[float(j) for j in range(100)] for _ in range(count)]
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description = __doc__)
+	parser.add_argument('--repeat', type = int, default = 5)
+	args = parser.parse_args()
+
+	recursive = charon.Codec([STANDARD_REGISTRY])
+	iterative = charon.Codec([STANDARD_REGISTRY], iterative = True)
+
+	shapes = [
+		('deep (depth 200)', deep_tree(200)),
+		('wide (10k dicts)', wide_tree(10000)),
+		('lists (1k x 100 floats)', primitive_lists(1000)),
+	]
+
+	for shape, obj in shapes:
+		encoded = recursive.dump(obj)
+		assert iterative.dump(obj) == encoded
+		assert iterative.load(encoded) == recursive.load(encoded)
+
+		for name, codec in [('recursive', recursive), ('iterative', iterative)]:
+			dump = min(timeit.repeat(lambda: codec.dump(obj), number = 1, repeat = args.repeat))
+			load = min(timeit.repeat(lambda: codec.load(encoded), number = 1, repeat = args.repeat))
+			print('{:<24} {:<10} dump {:>9.2f} ms   load {:>9.2f} ms'.format(shape, name, dump * 1000, load * 1000))
+
+	# Depth the recursive engine cannot handle at all
+	very_deep = deep_tree(100000)
+	print('depth 100000: iterative dump {:.2f} ms'.format(
+		min(timeit.repeat(lambda: iterative.dump(very_deep), number = 1, repeat = 1)) * 1000
+	))
+
+
+if __name__ == '__main__':
+	main()
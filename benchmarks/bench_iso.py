@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+#
+#  Compares loading of STANDARD_REGISTRY v1 datetime / date / time (ISO strings) by the fast loaders
+#  with parsing by dateutil, which the v1 loaders used before and still use for other formats.
+#
+#  Usage (with charon installed or on PYTHONPATH): python benchmarks/bench_iso.py [--count 10000]
+#
+import argparse
+import datetime
+import timeit
+
+import dateutil.parser
+
+import charon
+from charon.extensions import STANDARD_REGISTRY
+
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--count', type = int, default = 10000)
+	parser.add_argument('--repeat', type = int, default = 3)
+	args = parser.parse_args()
+
+	codec = charon.Codec([STANDARD_REGISTRY])
+	start = datetime.datetime(2017, 7, 19, 8, 24, 50, 141400)
+	tz = datetime.timezone(datetime.timedelta(hours = 2))
+	samples = {
+		'datetime': [(start + datetime.timedelta(seconds = i * 7.5)).isoformat() for i in range(args.count)],
+		'datetime+tz': [(start + datetime.timedelta(seconds = i * 7.5)).replace(tzinfo = tz).isoformat() for i in range(args.count)],
+		'date': [(start + datetime.timedelta(days = i)).date().isoformat() for i in range(args.count)],
+		'time': [(start + datetime.timedelta(seconds = i * 7.5)).time().isoformat() for i in range(args.count)],
+	}
+	post_process = {'datetime': None, 'datetime+tz': None, 'date': 'date', 'time': 'time'}
+
+	print('{:<12} {:>14} {:>14} {:>9}'.format('type', 'dateutil ms', 'charon ms', 'speedup'))
+	for name, strings in samples.items():
+		dtype = name.split('+')[0]
+		data = [{'!meta': {'dtype': dtype, 'version': 1}, 'params': string} for string in strings]
+		method = post_process[name]
+
+		def parse_dateutil():
+			for string in strings:
+				parsed = dateutil.parser.parse(string)
+				if method is not None:
+					getattr(parsed, method)()
+
+		baseline = min(timeit.repeat(parse_dateutil, number = 1, repeat = args.repeat))
+		result = min(timeit.repeat(lambda: codec.load(data), number = 1, repeat = args.repeat))
+		print('{:<12} {:>14.2f} {:>14.2f} {:>8.1f}x'.format(name, baseline * 1000, result * 1000, baseline / result))
+
+
+if __name__ == '__main__':
+	main()
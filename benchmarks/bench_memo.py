@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+#
+#  Compares plain and memo (shared reference) dumping of a portfolio snapshot,
+#  where a few hundred instruments are referenced by many positions.
+#
+#  Usage (with charon installed or on PYTHONPATH): python benchmarks/bench_memo.py [--positions 100000]
+#
+import argparse
+import decimal
+import json
+import timeit
+
+import charon
+from charon.extensions import STANDARD_REGISTRY
+
+
+
+class Instrument:
+	def __init__(self, symbol: str, tick_size: decimal.Decimal, attributes: dict) -> None:
+		self.symbol = symbol
+		self.tick_size = tick_size
+		self.attributes = attributes
+
+
+class Position:
+	def __init__(self, instrument: Instrument, quantity: int) -> None:
+		self.instrument = instrument
+		self.quantity = quantity
+
+
+REGISTRY = charon.CodecRegistry()
+
+
+@REGISTRY.dumper(Instrument, version = 1)
+def _dump_instrument(obj):
+	return {'symbol': obj.symbol, 'tick_size': obj.tick_size, 'attributes': obj.attributes}
+
+
+@REGISTRY.loader(Instrument, version = 1)
+def _load_instrument(data):
+	return Instrument(data['symbol'], data['tick_size'], data['attributes'])
+
+
+@REGISTRY.dumper(Position, version = 1)
+def _dump_position(obj):
+	return (obj.instrument, obj.quantity)
+
+
+@REGISTRY.loader(Position, version = 1)
+def _load_position(data):
+	return Position(*data)
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description = __doc__)
+	parser.add_argument('--instruments', type = int, default = 300)
+	parser.add_argument('--positions', type = int, default = 100000)
+	parser.add_argument('--repeat', type = int, default = 3)
+	args = parser.parse_args()
+
+	instruments = [
+		Instrument('SYM{}'.format(i), decimal.Decimal('0.01'), {'exchange': 'XPRA', 'lot': 100, 'currency': 'CZK'})
+		for i in range(args.instruments)
+	]
+	snapshot = [Position(instruments[i % len(instruments)], i) for i in range(args.positions)]
+
+	for name, memo in [('plain', False), ('memo', True)]:
+		codec = charon.Codec([STANDARD_REGISTRY, REGISTRY], format_version = 2, memo = memo)
+		encoded = codec.dump(snapshot)
+		size = len(json.dumps(encoded))
+		dump = min(timeit.repeat(lambda: codec.dump(snapshot), number = 1, repeat = args.repeat))
+		load = min(timeit.repeat(lambda: codec.load(encoded), number = 1, repeat = args.repeat))
+		print('{:<6} dump {:>9.2f} ms   load {:>9.2f} ms   json {:>10} bytes'.format(name, dump * 1000, load * 1000, size))
+
+
+if __name__ == '__main__':
+	main()
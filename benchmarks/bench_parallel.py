@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+#
+#  Compares a single codec with charon.parallel.ParallelCodec for various chunk sizes on an archive of records:
+#  loading of v1 payloads and dumping of the loaded objects to msgpack.
+#
+#  Usage (with charon installed or on PYTHONPATH):
+#    python benchmarks/bench_parallel.py [--records 200000] [--workers 4] [--chunk-size 1000 --chunk-size 10000]
+#
+import argparse
+import datetime
+import decimal
+import os
+import time
+
+import charon
+from charon.extensions import STANDARD_REGISTRY
+from charon.parallel import ParallelCodec
+
+
+REGISTRIES = ['charon.extensions.standard_registry:STANDARD_REGISTRY']
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--records', type = int, default = 200000)
+	parser.add_argument('--workers', type = int, default = os.cpu_count())
+	parser.add_argument('--chunk-size', type = int, action = 'append')
+	args = parser.parse_args()
+
+	archive = charon.Codec([STANDARD_REGISTRY]).dump_many(
+		{'id': i, 'price': decimal.Decimal(i) / 100, 'at': datetime.datetime(2017, 7, 19) + datetime.timedelta(seconds = i)}
+		for i in range(args.records)
+	)
+
+	codec = charon.Codec([STANDARD_REGISTRY], format_version = 2)
+	start = time.perf_counter()
+	objs = codec.load_many(archive)
+	load = time.perf_counter() - start
+	start = time.perf_counter()
+	expected = [codec.dumps(obj) for obj in objs]
+	dump = time.perf_counter() - start
+	print('{:<24} {:>10} {:>7} {:>10} {:>7}'.format('', 'load ms', '', 'dumps ms', ''))
+	print('{:<24} {:>10.0f} {:>7} {:>10.0f} {:>7}'.format('single codec', load * 1000, '', dump * 1000, ''))
+
+	for chunk_size in args.chunk_size or [1000, 10000]:
+		with ParallelCodec(REGISTRIES, max_workers = args.workers, chunk_size = chunk_size, format_version = 2) as parallel_codec:
+			# Start the workers before measuring
+			parallel_codec.dump_many([1] * args.workers, wire_format = 'msgpack')
+			start = time.perf_counter()
+			loaded = parallel_codec.load_many(archive)
+			parallel_load = time.perf_counter() - start
+			start = time.perf_counter()
+			converted = parallel_codec.dump_many(objs, wire_format = 'msgpack')
+			parallel_dump = time.perf_counter() - start
+		assert loaded == objs
+		assert converted == expected
+		print('{:<24} {:>10.0f} {:>6.2f}x {:>10.0f} {:>6.2f}x'.format(
+			'{} workers, chunk {}'.format(args.workers, chunk_size),
+			parallel_load * 1000, load / parallel_load, parallel_dump * 1000, dump / parallel_dump,
+		))
+
+
+if __name__ == '__main__':
+	main()
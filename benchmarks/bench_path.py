@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+#
+#  Compares full `Codec.load` of a large snapshot with `Codec.load_path` / `Codec.load_keys`
+#  selecting a single field, a single position and the keys of a big dict.
+#
+#  Usage (with charon installed or on PYTHONPATH): python benchmarks/bench_path.py [--positions 100000]
+#
+import argparse
+import decimal
+import timeit
+
+import charon
+from charon.extensions import STANDARD_REGISTRY
+
+
+
+class Position:
+	def __init__(self, symbol: str, quantity: int, price: decimal.Decimal) -> None:
+		self.symbol = symbol
+		self.quantity = quantity
+		self.price = price
+
+
+class Snapshot:
+	def __init__(self, account: str, positions: list, prices: dict) -> None:
+		self.account = account
+		self.positions = positions
+		self.prices = prices
+
+
+REGISTRY = charon.CodecRegistry()
+
+
+@REGISTRY.dumper(Position, version = 1)
+def _dump_position(obj):
+	return [obj.symbol, obj.quantity, obj.price]
+
+
+@REGISTRY.loader(Position, version = 1)
+def _load_position(data):
+	return Position(*data)
+
+
+@REGISTRY.dumper(Snapshot, version = 1)
+def _dump_snapshot(obj):
+	return {'account': obj.account, 'positions': obj.positions, 'prices': obj.prices}
+
+
+@REGISTRY.loader(Snapshot, version = 1)
+def _load_snapshot(data):
+	return Snapshot(data['account'], data['positions'], data['prices'])
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description = __doc__)
+	parser.add_argument('--positions', type = int, default = 100000)
+	parser.add_argument('--repeat', type = int, default = 3)
+	args = parser.parse_args()
+
+	snapshot = Snapshot(
+		'ACC1',
+		[Position('SYM{}'.format(i), i, decimal.Decimal(i) / 100) for i in range(args.positions)],
+		{('SYM{}'.format(i), 'XPRA'): decimal.Decimal(i) / 100 for i in range(args.positions)},
+	)
+
+	for format_version in (1, 2):
+		codec = charon.Codec([STANDARD_REGISTRY, REGISTRY], format_version = format_version)
+		dumped = codec.dump(snapshot)
+		cases = [
+			('load', lambda: codec.load(dumped)),
+			('load_path account', lambda: codec.load_path(dumped, ['account'])),
+			('load_path positions[-1]', lambda: codec.load_path(dumped, ['positions', -1])),
+			('load_path positions', lambda: codec.load_path(dumped, ['positions'])),
+			('load_keys prices', lambda: codec.load_keys(dumped, ['prices'])),
+		]
+		for name, func in cases:
+			result = min(timeit.repeat(func, number = 1, repeat = args.repeat))
+			print('v{} {:<24} {:>10.3f} ms'.format(format_version, name, result * 1000))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+#
+#  Measures dump / load of every class of STDLIB_REGISTRY against a str based encoding
+#  (`str(obj)` dumped, the constructor called on load), which is what hand written dumpers usually do.
+#  Prints times per list of --count objects and the size of the data packed by msgpack.
+#
+#  Usage (with charon installed or on PYTHONPATH): python benchmarks/bench_stdlib.py [--count 10000]
+#
+import argparse
+import collections
+import fractions
+import http
+import ipaddress
+import pathlib
+import timeit
+import uuid
+
+import charon
+from charon.extensions import STDLIB_REGISTRY
+from charon.extensions.stdlib_registry import register_enum
+
+try:
+	import msgpack
+except ImportError:
+	msgpack = None
+
+
+
+#: Sample objects and loaders from str of the classes with a str based alternative
+SAMPLES = {
+	'UUID': (lambda i: uuid.UUID(int = i * 7919), uuid.UUID),
+	'HTTPStatus': (lambda i: list(http.HTTPStatus)[i % len(http.HTTPStatus)], lambda data: http.HTTPStatus[data.split('.')[1]]),
+	'IPv4Address': (lambda i: ipaddress.IPv4Address(i * 7919), ipaddress.IPv4Address),
+	'IPv6Address': (lambda i: ipaddress.IPv6Address(i * 2 ** 90), ipaddress.IPv6Address),
+	'IPv4Network': (lambda i: ipaddress.IPv4Network((i * 256, 24)), ipaddress.IPv4Network),
+	'IPv6Network': (lambda i: ipaddress.IPv6Network((i * 2 ** 80, 48)), ipaddress.IPv6Network),
+	'IPv4Interface': (lambda i: ipaddress.IPv4Interface((i * 7919, 24)), ipaddress.IPv4Interface),
+	'IPv6Interface': (lambda i: ipaddress.IPv6Interface((i * 2 ** 90, 64)), ipaddress.IPv6Interface),
+	'PurePosixPath': (lambda i: pathlib.PurePosixPath('/var/data/{}/file.txt'.format(i)), pathlib.PurePosixPath),
+	'PureWindowsPath': (lambda i: pathlib.PureWindowsPath('C:/data/{}/file.txt'.format(i)), pathlib.PureWindowsPath),
+	'PosixPath': (lambda i: pathlib.PosixPath('/var/data/{}/file.txt'.format(i)), pathlib.PosixPath),
+	'Fraction': (lambda i: fractions.Fraction(i, 7), fractions.Fraction),
+	'complex': (lambda i: complex(i, i / 3), complex),
+	'OrderedDict': (lambda i: collections.OrderedDict([('a', i), ('b', i + 1)]), None),
+	'deque': (lambda i: collections.deque([i, i + 1], maxlen = 4), None),
+	'Counter': (lambda i: collections.Counter({'a': i, 'b': 1}), None),
+	'bytearray': (lambda i: bytearray(b'abc%d' % i), None),
+	'range': (lambda i: range(i, i + 100, 3), None),
+}
+
+
+def single_registry(cls, dumper, loader) -> charon.CodecRegistry:
+	registry = charon.CodecRegistry()
+	registry.dumper(cls, version = 1)(dumper)
+	registry.loader(cls, version = 1)(loader)
+	return registry
+
+
+def measure(codec: charon.Codec, data: list, repeat: int):
+	dumped = codec.dump(data)
+	dump = min(timeit.repeat(lambda: codec.dump(data), number = 1, repeat = repeat))
+	load = min(timeit.repeat(lambda: codec.load(dumped), number = 1, repeat = repeat))
+	size = len(msgpack.packb(dumped, use_bin_type = True)) if msgpack is not None else '-'
+	return dump * 1000, load * 1000, size
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--count', type = int, default = 10000)
+	parser.add_argument('--repeat', type = int, default = 3)
+	args = parser.parse_args()
+
+	enum_registry = charon.CodecRegistry()
+	register_enum(enum_registry, http.HTTPStatus)
+	codec = charon.Codec([STDLIB_REGISTRY, enum_registry], format_version = 2)
+
+	print('{:<16} {:>10} {:>10} {:>10} {:>10} {:>10} {:>10}'.format(
+		'class', 'dump ms', 'load ms', 'msgpack B', 'str dump', 'str load', 'str B',
+	))
+	for name, (make, from_str) in SAMPLES.items():
+		data = [make(i) for i in range(args.count)]
+		result = '{:<16} {:>10.1f} {:>10.1f} {:>10}'.format(name, *measure(codec, data, args.repeat))
+		if from_str is not None:
+			str_codec = charon.Codec([single_registry(type(data[0]), str, from_str)], format_version = 2)
+			result += ' {:>10.1f} {:>10.1f} {:>10}'.format(*measure(str_codec, data, args.repeat))
+		print(result)
+
+
+if __name__ == '__main__':
+	main()
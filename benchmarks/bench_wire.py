@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+#
+#  Compares fused `Codec.dumps` / `Codec.loads` with the two-step path
+#  (`dump` + msgpack.packb / json.dumps and msgpack.unpackb / json.loads + `load`).
+#
+#  Usage (with charon installed or on PYTHONPATH): python benchmarks/bench_wire.py [--orders 20000]
+#
+import argparse
+import json
+import timeit
+
+import msgpack
+
+import charon
+
+
+
+class Order:
+	def __init__(self, order_id: int, symbol: str, price: float, quantity: int, flags: dict) -> None:
+		self.order_id = order_id
+		self.symbol = symbol
+		self.price = price
+		self.quantity = quantity
+		self.flags = flags
+
+
+REGISTRY = charon.CodecRegistry()
+
+
+@REGISTRY.dumper(Order, version = 1)
+def _dump_order(obj):
+	return [obj.order_id, obj.symbol, obj.price, obj.quantity, obj.flags]
+
+
+@REGISTRY.loader(Order, version = 1)
+def _load_order(data):
+	return Order(*data)
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description = __doc__)
+	parser.add_argument('--orders', type = int, default = 20000)
+	parser.add_argument('--repeat', type = int, default = 5)
+	args = parser.parse_args()
+
+	book = {
+		'orders': [Order(i, 'SYM{}'.format(i % 50), 100.0 + i / 100, i % 7, {'ioc': i % 2 == 0}) for i in range(args.orders)],
+		'levels': {i: [100.0 + i, i * 10] for i in range(200)},
+	}
+
+	for format_version in (1, 2):
+		codec = charon.Codec([REGISTRY], format_version = format_version)
+		paths = [
+			(
+				'msgpack',
+				lambda: msgpack.packb(codec.dump(book), use_bin_type = True),
+				lambda: codec.dumps(book, 'msgpack'),
+				lambda data: codec.load(msgpack.unpackb(data, raw = False)),
+				lambda data: codec.loads(data, 'msgpack'),
+			),
+			(
+				'json',
+				lambda: json.dumps(codec.dump(book)).encode(),
+				lambda: codec.dumps(book, 'json'),
+				lambda data: codec.load(json.loads(data.decode())),
+				lambda data: codec.loads(data, 'json'),
+			),
+		]
+		for name, two_step_dump, fused_dump, two_step_load, fused_load in paths:
+			data = fused_dump()
+			assert data == two_step_dump()
+			results = [
+				min(timeit.repeat(func, number = 1, repeat = args.repeat))
+				for func in (two_step_dump, fused_dump, lambda: two_step_load(data), lambda: fused_load(data))
+			]
+			print('v{} {:<7} dump {:>8.2f} -> {:>8.2f} ms   load {:>8.2f} -> {:>8.2f} ms   {:>9} bytes'.format(
+				format_version, name, *[result * 1000 for result in results], len(data),
+			))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+#
+#  Benchmark suite measuring dump / load throughput of charon.Codec across payload shapes,
+#  every type and version of STANDARD_REGISTRY and user registered classes.
+#  Reports ops/sec, latency percentiles and size of the dumped data, results can be saved as a baseline
+#  and later runs compared against it.
+#
+#  Usage (with charon installed or on PYTHONPATH):
+#    python benchmarks/suite.py [--format-version 2] [--iterative] [--filter standard]
+#    python benchmarks/suite.py --save baseline.json
+#    python benchmarks/suite.py --compare baseline.json [--threshold 10]
+#
+#  Classes of other registries are added by --registry module:REGISTRY --cases module:function,
+#  where the function returns a dict mapping case names to sample objects.
+#
+from typing import Any, Callable, Dict, Iterator, List, Tuple # NOQA
+
+import argparse
+import datetime
+import decimal
+import importlib
+import json
+import sys
+import time
+
+import charon
+from charon.extensions import STANDARD_REGISTRY
+
+try:
+	import msgpack
+except ImportError:
+	msgpack = None
+
+
+
+class Order:
+	def __init__(self, order_id: int, symbol: str, price: decimal.Decimal, quantity: int, created: datetime.datetime) -> None:
+		self.order_id = order_id
+		self.symbol = symbol
+		self.price = price
+		self.quantity = quantity
+		self.created = created
+
+
+class Fill:
+	def __init__(self, order: Order, quantity: int) -> None:
+		self.order = order
+		self.quantity = quantity
+
+
+USER_REGISTRY = charon.CodecRegistry()
+
+
+@USER_REGISTRY.dumper(Order, version = 1)
+def _dump_order(obj):
+	return {'id': obj.order_id, 'symbol': obj.symbol, 'price': obj.price, 'quantity': obj.quantity, 'created': obj.created}
+
+
+@USER_REGISTRY.loader(Order, version = 1)
+def _load_order(data):
+	return Order(data['id'], data['symbol'], data['price'], data['quantity'], data['created'])
+
+
+@USER_REGISTRY.dumper(Fill, version = 1, flat = True)
+def _dump_fill(obj):
+	return (obj.order.order_id, obj.quantity)
+
+
+@USER_REGISTRY.loader(Fill, version = 1)
+def _load_fill(data):
+	return Fill(Order(data[0], '', decimal.Decimal(0), 0, datetime.datetime(1970, 1, 1)), data[1])
+
+
+#: Sample objects of standard types, every class of STANDARD_REGISTRY has to have one
+STANDARD_SAMPLES = {
+	'Decimal': decimal.Decimal('12345.6789'),
+	'set': {1, 2, 3, 'a', 'b'},
+	'frozenset': frozenset({1, 2, 3, 'a', 'b'}),
+	'datetime': datetime.datetime(2017, 7, 19, 8, 24, 50, 141400, tzinfo = datetime.timezone(datetime.timedelta(hours = 2))),
+	'date': datetime.date(2017, 7, 19),
+	'time': datetime.time(8, 24, 50, 141400),
+	'timedelta': datetime.timedelta(days = 3, seconds = 4000, microseconds = 123),
+}
+
+
+def shape_cases() -> Dict[str, Any]:
+	created = datetime.datetime(2017, 7, 19, 8, 24, 50)
+	deep = leaf = {} # type: Dict[str, Any]
+	for i in range(100):
+		leaf['child'] = {'level': i, 'tags': ['a', i]}
+		leaf = leaf['child']
+	order = Order(1, 'SYM', decimal.Decimal('1.25'), 100, created)
+
+	return {
+		'shape/wide-dict': {'key{}'.format(i): i for i in range(1000)},
+		'shape/wide-dict-int-keys': {i: 'value{}'.format(i) for i in range(1000)},
+		'shape/deep-dict': deep,
+		'shape/nested': [{'id': i, 'prices': [i * 0.5, i * 1.5], 'meta': {'a': [1, {'b': None}]}} for i in range(100)],
+		'shape/float-list': [i / 7 for i in range(10000)],
+		'shape/int-list': list(range(10000)),
+		'shape/str-list': ['item{}'.format(i) for i in range(10000)],
+		'user/order': order,
+		'user/orders': [Order(i, 'SYM{}'.format(i % 10), decimal.Decimal(i) / 100, i, created) for i in range(100)],
+		'user/fills': [Fill(order, i) for i in range(1000)],
+	}
+
+
+def registry_cases(registry: charon.CodecRegistry, samples: Dict[str, Any], prefix: str) -> Iterator[Tuple[str, Any, charon.CodecRegistry]]:
+	'''
+	Yields a case for every class and every dumper version of `registry`, each with a registry holding
+	only the dumper and the loader of that version (put after `registry`, so it takes priority),
+	so older versions are measured too
+	'''
+	# pylint: disable=protected-access
+	for name, class_dumpers in sorted(registry._dumpers.items()):
+		if name not in samples:
+			raise KeyError('Missing benchmark sample for {prefix} class: {name}'.format(prefix = prefix, name = name))
+		cls = registry._dumper_classes[name]
+		for version in sorted(class_dumpers):
+			single = charon.CodecRegistry()
+			single.dumper(cls, version = version, flat = version in registry._flat_dumpers[name])(class_dumpers[version])
+			single.loader(cls, version = version)(registry._loaders[name][version])
+			yield '{prefix}/{name}/v{version}'.format(prefix = prefix, name = name, version = version), samples[name], single
+
+
+def import_object(spec: str) -> Any:
+	module_name, _, attribute = spec.partition(':')
+	return getattr(importlib.import_module(module_name), attribute)
+
+
+def encoded_size(data: Any) -> int:
+	if msgpack is not None:
+		return len(msgpack.packb(data, use_bin_type = True))
+	return len(json.dumps(data, default = repr))
+
+
+def percentile(latencies: List[float], fraction: float) -> float:
+	return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+
+def measure(func: Callable[[], Any], min_time: float, max_ops: int) -> Dict[str, float]:
+	latencies = []
+	clock = time.perf_counter
+	started = clock()
+	while len(latencies) < max_ops and (clock() - started < min_time or len(latencies) < 5):
+		start = clock()
+		func()
+		latencies.append(clock() - start)
+
+	latencies.sort()
+	return {
+		'ops': len(latencies) / sum(latencies),
+		'p50': percentile(latencies, 0.5) * 1e6,
+		'p90': percentile(latencies, 0.9) * 1e6,
+		'p99': percentile(latencies, 0.99) * 1e6,
+	}
+
+
+def run(cases: List[Tuple[str, Any, List[charon.CodecRegistry]]], args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+	results = {}
+	for name, obj, registries in cases:
+		codec = charon.Codec(registries, format_version = args.format_version, iterative = args.iterative)
+		encoded = codec.dump(obj)
+		codec.load(encoded)
+
+		dump = measure(lambda: codec.dump(obj), args.min_time, args.max_ops)
+		load = measure(lambda: codec.load(encoded), args.min_time, args.max_ops)
+		result = {'bytes': encoded_size(encoded)}
+		result.update(('dump_' + key, value) for key, value in dump.items())
+		result.update(('load_' + key, value) for key, value in load.items())
+		results[name] = result
+
+		print('{:<34} {:>11.0f} {:>9.1f} {:>9.1f} {:>9.1f} {:>11.0f} {:>9.1f} {:>9.1f} {:>9.1f} {:>9}'.format(
+			name,
+			result['dump_ops'], result['dump_p50'], result['dump_p90'], result['dump_p99'],
+			result['load_ops'], result['load_p50'], result['load_p90'], result['load_p99'],
+			result['bytes'],
+		))
+	return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> bool:
+	'''
+	Prints change of throughput against the baseline, returns False when any case got slower than `threshold` percent
+	'''
+	ok = True
+	print()
+	print('{:<34} {:>10} {:>10} {:>10}'.format('change against baseline', 'dump', 'load', 'bytes'))
+	for name, result in sorted(results.items()):
+		if name not in baseline:
+			print('{:<34} {:>10}'.format(name, 'new'))
+			continue
+		changes = [
+			(result[key] / baseline[name][key] - 1) * 100 if baseline[name][key] else 0.0
+			for key in ('dump_ops', 'load_ops', 'bytes')
+		]
+		regressed = changes[0] < -threshold or changes[1] < -threshold
+		ok = ok and not regressed
+		print('{:<34} {:>+9.1f}% {:>+9.1f}% {:>+9.1f}%{}'.format(name, *changes, '  REGRESSION' if regressed else ''))
+	return ok
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--format-version', type = int, default = 1)
+	parser.add_argument('--iterative', action = 'store_true')
+	parser.add_argument('--filter', default = '', help = 'run only cases containing this string')
+	parser.add_argument('--min-time', type = float, default = 0.2, help = 'seconds spent measuring each operation')
+	parser.add_argument('--max-ops', type = int, default = 100000)
+	parser.add_argument('--registry', action = 'append', default = [], help = 'module:REGISTRY to benchmark')
+	parser.add_argument('--cases', action = 'append', default = [], help = 'module:function returning samples by class name')
+	parser.add_argument('--save', help = 'save results as a baseline to this file')
+	parser.add_argument('--compare', help = 'compare results with a baseline saved by --save')
+	parser.add_argument('--threshold', type = float, default = 10.0, help = 'throughput drop in percent failing --compare')
+	args = parser.parse_args()
+
+	registries = [STANDARD_REGISTRY, USER_REGISTRY]
+	cases = [(name, obj, registries) for name, obj in sorted(shape_cases().items())]
+	cases += [
+		(name, obj, [STANDARD_REGISTRY, single])
+		for name, obj, single in registry_cases(STANDARD_REGISTRY, STANDARD_SAMPLES, 'standard')
+	]
+
+	extra_samples = {} # type: Dict[str, Any]
+	for spec in args.cases:
+		extra_samples.update(import_object(spec)())
+	for spec in args.registry:
+		registry = import_object(spec)
+		cases += [
+			(name, obj, [STANDARD_REGISTRY, registry, single])
+			for name, obj, single in registry_cases(registry, extra_samples, spec)
+		]
+
+	cases = [case for case in cases if args.filter in case[0]]
+
+	print('format version {}, {} engine, sizes in {}'.format(
+		args.format_version, 'iterative' if args.iterative else 'recursive', 'msgpack' if msgpack is not None else 'JSON',
+	))
+	print('{:<34} {:>11} {:>9} {:>9} {:>9} {:>11} {:>9} {:>9} {:>9} {:>9}'.format(
+		'case', 'dump ops/s', 'p50 us', 'p90 us', 'p99 us', 'load ops/s', 'p50 us', 'p90 us', 'p99 us', 'bytes',
+	))
+	results = run(cases, args)
+
+	if args.save:
+		with open(args.save, 'w') as f:
+			json.dump({'format_version': args.format_version, 'iterative': args.iterative, 'results': results}, f, indent = 1, sort_keys = True)
+
+	if args.compare:
+		with open(args.compare) as f:
+			baseline = json.load(f)
+		if not compare(results, baseline['results'], args.threshold):
+			sys.exit(1)
+
+
+if __name__ == '__main__':
+	main()
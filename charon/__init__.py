@@ -1,2 +1,2 @@
-from .codec import Codec # NOQA
-from .codec_registry import CodecRegistry, DuplicateVersion # NOQA
+from .codec import Buffer, Codec # NOQA
+from .codec_registry import CodecRegistry, DuplicateVersion, FrozenCodecRegistry # NOQA
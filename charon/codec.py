@@ -1,6 +1,131 @@
-from typing import List, Any
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Set, Tuple # NOQA
+
+import array
+import asyncio
+import copy
+import itertools
+import sys
+import time
+import zlib
 
 from . import codec_registry
+from . import hooks
+from . import lazy
+from . import profiling
+from . import wire
+
+
+
+#: Types passed through as they are, module level so membership tests do not build a new set on every call
+_PRIMITIVE_TYPES = frozenset({int, float, bool, str, bytes, type(None)})
+_SEQUENCE_TYPES = frozenset({list, tuple})
+_STR_TYPE = frozenset({str})
+
+#: Types dumped out-of-band when a buffer callback is given, mapped to their names used in the '!buffer' structure
+_BUFFER_TYPES = {bytes: 'bytes', bytearray: 'bytearray', memoryview: 'memoryview'}
+_INLINE_TYPES = _PRIMITIVE_TYPES - {bytes}
+
+#: Supported output formats, `load` reads all of them
+FORMAT_VERSIONS = (1, 2)
+
+#: Array typecodes of ints packed by codecs with `pack_arrays` with their ranges, the narrowest one is used.
+#: Floats are always packed as doubles ('d').
+_INT_TYPECODES = (('b', -2 ** 7, 2 ** 7), ('h', -2 ** 15, 2 ** 15), ('i', -2 ** 31, 2 ** 31), ('q', -2 ** 63, 2 ** 63))
+_ARRAY_TYPECODES = frozenset({'d', 'b', 'h', 'i', 'q'})
+#: Shorter lists are not packed, the tag would be longer than the packing saves
+_PACK_ARRAYS_MIN_LENGTH = 8
+
+#: Number of tasks processed by `dump_async` / `load_async` between checks of the elapsed time
+_ASYNC_CHECK_EVERY = 64
+
+
+
+def type_id(dtype: str, version: int) -> int:
+	'''
+	Returns type id of a (class name, version) pair, the CRC-32 of `'<name>:<version>'`. It depends only
+	on the pair, so registering other types or versions never changes ids of the existing ones.
+	'''
+	return zlib.crc32('{dtype}:{version}'.format(dtype = dtype, version = version).encode('utf-8'))
+
+
+
+class Buffer:
+	'''
+	Data of a buffer protocol object returned by a dumper, like `pickle.PickleBuffer`. It is passed out-of-band
+	as a memoryview when `dump` gets a `buffer_callback` (and loaded as a memoryview), otherwise it is dumped
+	inline as bytes. Registries use it for data of their objects without registering dumpers of memoryview or bytes.
+	'''
+	__slots__ = ('view',)
+
+	def __init__(self, obj: Any) -> None:
+		self.view = memoryview(obj)
+
+
+
+class _Deferred:
+	'''
+	Task of the iterative engine finishing a node once all of its children were processed
+	'''
+	__slots__ = ('func', 'args')
+
+	def __init__(self, func: Callable[..., Any], *args: Any) -> None:
+		self.func = func
+		# Children of the node store their loaded values directly into this list
+		self.args = list(args)
+
+
+def _pack_array(items: Iterable[Any]) -> Dict[str, Any]:
+	'''
+	Packs list of only floats or only ints (fitting into 64 bits) into little-endian bytes, returns None for other lists
+	'''
+	item_types = set(map(type, items))
+	if item_types == {float}:
+		typecode = 'd'
+	elif item_types == {int}:
+		lowest = min(items)
+		highest = max(items)
+		for typecode, minimum, maximum in _INT_TYPECODES:
+			if minimum <= lowest and highest < maximum:
+				break
+		else:
+			return None
+	else:
+		return None
+
+	packed = array.array(typecode, items)
+	if sys.byteorder == 'big':
+		packed.byteswap()
+	return {'!meta': '!array', 'typecode': typecode, 'data': packed.tobytes()}
+
+
+def _unpack_array(data: Dict[str, Any]) -> List[Any]:
+	typecode = data['typecode']
+	if typecode not in _ARRAY_TYPECODES:
+		raise ValueError('Unsupported array typecode: {typecode}'.format(typecode = typecode))
+
+	unpacked = array.array(typecode)
+	unpacked.frombytes(data['data'])
+	if sys.byteorder == 'big':
+		unpacked.byteswap()
+	return unpacked.tolist()
+
+
+def _fill_dict(output: Dict[Any, Any], keys: List[Any], values: List[Any]) -> Dict[Any, Any]:
+	for key, value in zip(keys, values):
+		if isinstance(key, list):
+			key = tuple(key)
+		output[key] = value
+	return output
+
+
+#: Placeholder in the load memo for objects whose loader was not called yet
+_LOADING = object()
+
+
+def _load_memoized(memo: List[Any], index: int, loader: Callable[[Any], Any], params: Any) -> Any:
+	obj = loader(params)
+	memo[index] = obj
+	return obj
 
 
 
@@ -11,27 +136,208 @@ class Codec:
 		and call CodecRegistries for dumpable / loadable classes
 	'''
 
-	def __init__(self, registries: List[codec_registry.CodecRegistry] = None) -> None:
+	def __init__(
+		self,
+		registries: List[codec_registry.CodecRegistry] = None,
+		iterative: bool = False,
+		format_version: int = 1,
+		type_ids: bool = False,
+		memo: bool = False,
+		check_flat: bool = False,
+		pack_arrays: bool = False,
+		profile: bool = False,
+	) -> None:
+		'''
+		When `iterative` is set, objects are walked using an explicit stack instead of recursion,
+		output is the same but nesting depth is not limited by the interpreter recursion limit.
+		It is slower on loads of wide trees of small objects, use it for depth safety rather than speed.
+
+		`format_version` selects the output format:
+		  1. dicts are encoded as lists of key / value dicts and object metadata is a dict
+		  2. str keyed dicts are passed as they are, other dicts are encoded as parallel lists of keys and values,
+		     object metadata is a (dtype, version) tuple
+
+		Loading accepts all formats, plain (str keyed) dicts are accepted only with `format_version` 2 and higher.
+
+		When `type_ids` is set, object metadata is replaced by an integer type id (see `type_id` and `type_table`),
+		which is derived from the class name and version only, so data can be loaded by any codec knowing the pair.
+		Type table can also be shipped along with the data using `dump_batch` / `load_batch`.
+
+		When `memo` is set, every list, tuple, dict and registered object is dumped only once per `dump` call,
+		its following occurrences (compared by identity) are dumped as back-references
+		`{'!meta': '!ref', 'id': n}`, where `n` is the order of the first occurrence. Loading restores shared
+		identity and also cycles going through lists and dicts. Empty lists and tuples are never memoized.
+		Data dumped with `memo` has to be loaded by a codec with `memo` too.
+
+		Output of dumpers registered as `flat` is emitted without walking it. Set `check_flat` (e.g. in tests)
+		to check that such dumpers really return only primitives or lists / tuples of primitives.
+
+		When `pack_arrays` is set, lists and tuples of at least 8 floats only or ints only (fitting into 64 bits)
+		are packed into `{'!meta': '!array', 'typecode': ..., 'data': bytes}` with little-endian items.
+		Floats are packed as doubles ('d'), ints use the narrowest of 1, 2, 4 and 8 bytes signed ('b', 'h', 'i', 'q').
+
+		When `profile` is set, calls and time spent in dumpers and loaders are counted per (dtype, version),
+		along with the encoded size of objects dumped by `dumps`, see `profile_stats`. Codecs without `profile`
+		dispatch to the registered functions directly, so counting costs nothing unless enabled.
+		'''
+		if format_version not in FORMAT_VERSIONS:
+			raise ValueError('Unsupported format version: {version}'.format(version = format_version))
+
 		self._registries = [] if registries is None else registries
+		self._format_version = format_version
+		self._iterative = iterative
+		self._type_ids = type_ids
+		self._memoize = memo
+		self._check_flat = check_flat
+		self._pack_arrays = pack_arrays
+		self._profile = profiling.CodecProfile() if profile else None
+		self._hooks = [] # type: List[hooks.Hooks]
 
+		# Per call state of memo mode, set only on the session copies of the codec
+		self._memo = None # type: Any
+		self._memo_active = None # type: Set[int]
 
-	def dump(self, obj: Any) -> Any:
-		dtype = type(obj) # NOQA
+		# Per call state of out-of-band buffers, set only on the session copies of the codec
+		self._primitive_types = _PRIMITIVE_TYPES
+		self._buffer_callback = None # type: Callable[[memoryview], Any]
+		self._buffer_ids = None # type: Iterator[int]
+		self._buffers = None # type: List[Any]
 
-		if dtype in {int, float, bool, str, bytes, type(None)}:
-			return obj
-		elif dtype in {list, tuple}:
-			return [self.dump(k) for k in obj]
-		elif dtype is dict:
-			return {'!meta': '!dict',
-				'values': [{'key': self.dump(k), 'value': self.dump(v)} for k, v in obj.items()]
-			}
+		# Dispatch index flattened from all registries, rebuilt whenever a dumper or loader gets registered
+		self._index_revision = None # type: int
+		self._dumpers_by_name = {} # type: Dict[str, Tuple[str, int, Callable[[Any], Any], Any, bool]]
+		self._dumper_classes = {} # type: Dict[str, type]
+		self._dumpers_by_type = {} # type: Dict[type, Tuple[str, int, Callable[[Any], Any], Any, bool]]
+		self._loaders = {} # type: Dict[Tuple[str, int], Callable[[Any], Any]]
+		self._type_table = [] # type: List[Tuple[int, str, int]]
+		self._pairs_by_id = {} # type: Dict[int, Tuple[str, int]]
+		self._loaders_by_id = {} # type: Dict[int, Callable[[Any], Any]]
 
-		for registry in reversed(self._registries):
-			if registry.dumpable(obj):
-				dumped = registry.dump(obj)
-				dumped['params'] = self.dump(dumped['params'])
-				return dumped
+		# Writers of `dumps` by wire format, created on first use
+		self._writers = {} # type: Dict[str, wire.Writer]
+
+		# Frozen codecs (see `freeze`) keep the dispatch index built by `freeze`
+		self._frozen = False
+
+
+	def _build_index(self) -> None:
+		'''
+		Flattens dumpers and loaders of all registries into dispatch tables.
+
+		Registries are walked from the first one to the last one so entries of registries at the *end*
+		of the list override the earlier ones, which keeps the original lookup priority.
+		Dumpers are indexed by class name (or qualified name, see `CodecRegistry`) with only the highest version kept,
+		along with the registered class, loaders are indexed by (class name, version) pairs.
+
+		Dumper entries are (dtype, version, dumper, metadata, flat) tuples, metadata is precomputed
+		for formats where it is immutable, `None` means a metadata dict is created for every object.
+
+		Registries have to agree on classes of shared names, a name registered for different classes by two registries
+		would silently dispatch objects of both classes to one loader.
+
+		Type table contains type ids of all (class name, version) pairs known to any registry sorted by name
+		and version. Ids of two pairs could collide, codecs with `type_ids` refuse such registries.
+
+		With profiling enabled or hooks added, indexed dumpers and loaders are wrapped by counting / hook wrappers.
+		Index of a frozen codec is never rebuilt.
+		'''
+		if self._frozen:
+			return
+		revision = codec_registry.CodecRegistry._revision # pylint: disable=protected-access
+
+		dumpers = {}
+		loaders = {}
+		pairs = set()
+		classes = {}
+		for registry in self._registries:
+			registry_classes = itertools.chain(
+				registry._dumper_classes.items(), # pylint: disable=protected-access
+				registry._loader_classes.items(), # pylint: disable=protected-access
+			)
+			for name, cls in registry_classes:
+				registered = classes.setdefault(name, cls)
+				if registered is not cls:
+					raise ValueError('Class {cls} collides with class {registered} of another registry under name: {name}, '
+						'register them with qualified_names = True'.format(
+							cls = codec_registry.qualified_name(cls),
+							registered = codec_registry.qualified_name(registered),
+							name = name,
+						))
+			for name, class_dumpers in registry._dumpers.items(): # pylint: disable=protected-access
+				if class_dumpers:
+					selected_version = max(class_dumpers)
+					cls = registry._dumper_classes.get(name) # pylint: disable=protected-access
+					flat = selected_version in registry._flat_dumpers.get(name, ()) # pylint: disable=protected-access
+					dumpers[name] = (selected_version, class_dumpers[selected_version], cls, flat)
+					pairs.update((name, version) for version in class_dumpers)
+			for name, class_loaders in registry._loaders.items(): # pylint: disable=protected-access
+				for version, loader in class_loaders.items():
+					loaders[(name, version)] = loader
+					pairs.add((name, version))
+
+		type_ids = {}
+		pairs_by_id = {}
+		for pair in sorted(pairs):
+			pair_id = type_id(*pair)
+			colliding = pairs_by_id.setdefault(pair_id, pair)
+			if colliding != pair and self._type_ids:
+				raise ValueError('Type ids of {colliding} and {pair} collide, register one of them under another name'.format(
+					colliding = colliding,
+					pair = pair,
+				))
+			type_ids[pair] = pair_id
+
+		wrappers = self._wrappers()
+		for wrapper in wrappers:
+			loaders = {(name, version): wrapper.wrap_loader(name, version, loader) for (name, version), loader in loaders.items()}
+
+		dumpers_by_name = {}
+		dumper_classes = {}
+		for name, (version, dumper, cls, flat) in dumpers.items():
+			if self._type_ids:
+				metadata = type_ids[(name, version)]
+			elif self._format_version == 1:
+				metadata = None
+			else:
+				metadata = (name, version)
+			for wrapper in wrappers:
+				dumper = wrapper.wrap_dumper(name, version, dumper)
+			dumpers_by_name[name] = (name, version, dumper, metadata, flat)
+			dumper_classes[name] = cls
+
+		self._dumpers_by_name = dumpers_by_name
+		self._dumper_classes = dumper_classes
+		self._dumpers_by_type = {}
+		self._loaders = loaders
+		self._type_table = [(pair_id, name, version) for (name, version), pair_id in sorted(type_ids.items())]
+		self._pairs_by_id = pairs_by_id
+		self._loaders_by_id = {pair_id: loaders.get(pair) for pair_id, pair in pairs_by_id.items()}
+		self._index_revision = revision
+
+
+	def _wrappers(self) -> List[Any]:
+		'''
+		Returns objects wrapping dumpers and loaders, the profile first so hooks are not counted in its times
+		'''
+		wrappers = [] # type: List[Any]
+		if self._profile is not None:
+			wrappers.append(self._profile)
+		return wrappers + self._hooks
+
+
+	def _resolve_dumper(self, dtype: type) -> Tuple[str, int, Callable[[Any], Any], Any, bool]:
+		'''
+		Slow path of the dumper lookup, caches dumper found for a class seen for the first time.
+		Classes of the MRO are tried in order, so subclasses are dumped by the dumper of their closest registered
+		base class (and loaded as the base class). A dumper matches only the class it was registered for,
+		not another class with the same name.
+		'''
+		for cls in dtype.__mro__:
+			for name in (codec_registry.qualified_name(cls), cls.__name__):
+				entry = self._dumpers_by_name.get(name)
+				if entry is not None and self._dumper_classes[name] is cls:
+					self._dumpers_by_type[dtype] = entry
+					return entry
 
 		raise ValueError('Unsupported serialization object type: {dmodule}.{dtype}'.format(
 			dmodule = dtype.__module__,
@@ -39,34 +345,914 @@ class Codec:
 		))
 
 
-	def load(self, data: Any) -> Any:
+	def _resolve_loader(self, dtype: str, version: Any) -> Callable[[Any], Any]:
+		'''
+		Slow path of the loader lookup, used when the (dtype, version) pair is not indexed
+		or when the version is not a plain integer. Raises the same errors as registries do.
+		'''
+		for registry in reversed(self._registries):
+			if registry.loadable({'!meta': {'dtype': dtype, 'version': version}}):
+				loader = registry._loaders[dtype][version] # pylint: disable=protected-access
+				for wrapper in self._wrappers():
+					loader = wrapper.wrap_loader(dtype, version, loader)
+				return loader
+
+		raise KeyError('Cannot restore object: {dtype} version: {version}'.format(dtype = dtype, version = version))
+
+
+	def type_table(self) -> List[Tuple[int, str, int]]:
+		'''
+		Returns list of (type id, class name, version) of all pairs known to the registries
+		'''
+		if self._index_revision != codec_registry.CodecRegistry._revision: # pylint: disable=protected-access
+			self._build_index()
+		return list(self._type_table)
+
+
+	def freeze(self) -> 'Codec':
+		'''
+		Returns copy of the codec using frozen snapshots of its registries (see `CodecRegistry.freeze`).
+		Its dispatch index is built once here, classes of the registered dumpers are resolved in advance
+		and registrations made later are not seen by it, so threads can share the frozen codec without locking
+		and never observe a half registered type or an index being rebuilt. To pick up new registrations,
+		freeze the codec again and replace the reference to the old frozen codec, which is an atomic assignment.
+
+		The frozen codec shares profile counters with this codec, hooks cannot be added to or removed from it.
+		'''
+		frozen = copy.copy(self)
+		frozen._registries = [registry.freeze() for registry in self._registries]
+		frozen._hooks = list(self._hooks)
+		frozen._writers = {}
+		frozen._frozen = False
+		frozen._build_index()
+		# Registered classes are indexed by type right away, only their subclasses are resolved on first use
+		for cls in set(frozen._dumper_classes.values()):
+			if cls is not None:
+				frozen._resolve_dumper(cls)
+		frozen._frozen = True
+		return frozen
+
+
+	def profile_stats(self) -> profiling.CodecProfile:
+		'''
+		Returns counters of a codec created with `profile`, export them by `as_dict` or `as_prometheus`
+		and zero them by `reset`
+		'''
+		if self._profile is None:
+			raise ValueError('Profiling is not enabled on this codec')
+		return self._profile
+
+
+	def add_hooks(
+		self,
+		pre_dump: Callable[..., Any] = None,
+		post_dump: Callable[..., Any] = None,
+		pre_load: Callable[..., Any] = None,
+		post_load: Callable[..., Any] = None,
+		on_error: Callable[..., Any] = None,
+		sample: int = 1,
+	) -> hooks.Hooks:
+		'''
+		Adds functions called around every dumper and loader call (or every `sample`-th call),
+		see `charon.hooks.Hooks` for their arguments. Returns the added hooks, which can be passed to `remove_hooks`.
+		'''
+		if self._frozen:
+			raise TypeError('Cannot add hooks to a frozen codec')
+		added = hooks.Hooks(pre_dump, post_dump, pre_load, post_load, on_error, sample)
+		self._hooks.append(added)
+		self._index_revision = None
+		return added
+
+
+	def remove_hooks(self, removed: hooks.Hooks) -> None:
+		if self._frozen:
+			raise TypeError('Cannot remove hooks from a frozen codec')
+		self._hooks.remove(removed)
+		self._index_revision = None
+
+
+	def _dump_engine(self) -> Callable[[Any], Any]:
+		'''
+		Returns method dumping one object, in memo mode bound to a new copy of the codec holding the memo
+		'''
+		codec = self._dump_session()
+		return codec._dump_iterative if codec._iterative else codec._dump # pylint: disable=protected-access
+
+
+	def _dump_session(self) -> 'Codec':
+		'''
+		Returns codec for one dumped object, in memo mode a new copy of the codec holding the memo
+		'''
+		if not self._memoize:
+			return self
+		codec = copy.copy(self)
+		codec._memo = {}
+		codec._memo_active = set()
+		return codec
+
+
+	def _buffer_session(self, buffer_callback: Callable[[memoryview], Any]) -> 'Codec':
+		'''
+		Returns copy of the codec dumping bytes, bytearrays and memoryviews out-of-band to `buffer_callback`
+		'''
+		session = copy.copy(self)
+		session._primitive_types = _INLINE_TYPES
+		session._buffer_callback = buffer_callback
+		# Shared by the memo session copies, so buffer ids are unique in the whole call
+		session._buffer_ids = itertools.count()
+		if not self._dumpers_by_type.keys().isdisjoint(_BUFFER_TYPES):
+			session._dumpers_by_type = {dtype: entry for dtype, entry in self._dumpers_by_type.items() if dtype not in _BUFFER_TYPES}
+		return session
+
+
+	def dump(self, obj: Any, buffer_callback: Callable[[memoryview], Any] = None) -> Any:
+		'''
+		When `buffer_callback` is given, bytes, bytearrays and memoryviews are not copied into the output. Each of them
+		is passed to `buffer_callback` as a flat memoryview and replaced by `{'!meta': '!buffer', 'id': n, 'type': ...}`,
+		where `n` is the order of the call. Pass the collected buffers in the same order to `load`.
+		'''
+		if self._index_revision != codec_registry.CodecRegistry._revision: # pylint: disable=protected-access
+			self._build_index()
+		codec = self if buffer_callback is None else self._buffer_session(buffer_callback)
+		return codec._dump_engine()(obj) # pylint: disable=protected-access
+
+
+	def dump_many(self, objs: Iterable[Any], buffer_callback: Callable[[memoryview], Any] = None) -> List[Any]:
+		'''
+		Serializes all objects from `objs`, output is the same as calling `dump` on each object separately.
+		Dispatch index is checked only once for the whole batch and every class is resolved only once.
+		With `buffer_callback` the buffer ids are numbered through the whole batch.
+		'''
+		if self._index_revision != codec_registry.CodecRegistry._revision: # pylint: disable=protected-access
+			self._build_index()
+
+		codec = self if buffer_callback is None else self._buffer_session(buffer_callback)
+		if self._memoize:
+			return [codec._dump_engine()(obj) for obj in objs] # pylint: disable=protected-access
+
+		dump = codec._dump_engine() # pylint: disable=protected-access
+		return [dump(obj) for obj in objs]
+
+
+	def dump_batch(self, objs: Iterable[Any]) -> Dict[str, Any]:
+		'''
+		Serializes all objects from `objs` using type ids, the type table is emitted once as a header of the batch:
+		`{'!types': [[type_id, dtype, version], ...], 'values': [...]}`. Use `load_batch` to restore the objects.
+		'''
+		if not self._type_ids:
+			raise ValueError('Batches with type table require codec with type_ids enabled')
+
+		values = self.dump_many(objs)
+		return {'!types': [list(entry) for entry in self._type_table], 'values': values}
+
+
+	def dumps(self, obj: Any, wire_format: str = 'msgpack') -> bytes:
+		'''
+		Serializes `obj` directly to msgpack or JSON bytes. Output is the same as serializing the result of `dump`
+		by `msgpack.packb(..., use_bin_type = True)` or `json.dumps(...).encode()`, but no intermediate tree
+		of primitives is built. The msgpack format requires the msgpack package. Objects are walked recursively
+		regardless of `iterative` and memo mode is not supported.
+		'''
+		if self._memoize:
+			raise ValueError('dumps / loads do not support codec with memo enabled')
+		if self._index_revision != codec_registry.CodecRegistry._revision: # pylint: disable=protected-access
+			self._build_index()
+
+		writer = self._writers.get(wire_format)
+		if writer is None:
+			if wire_format == 'msgpack':
+				writer = wire.MsgpackWriter(self)
+			elif wire_format == 'json':
+				writer = wire.JsonWriter(self)
+			else:
+				raise ValueError('Unsupported wire format: {wire_format}'.format(wire_format = wire_format))
+			self._writers[wire_format] = writer
+		return writer.dumps(obj)
+
+
+	def _dump_reference(self, obj: Any) -> Any:
+		'''
+		Memo mode only. Returns back-reference if `obj` was already dumped, otherwise remembers `obj` and returns None.
+		References to registered objects whose params are still being dumped cannot be loaded, because the loader
+		has to get the params first, so they are rejected.
+		'''
+		key = id(obj)
+		remembered = self._memo.get(key)
+		if remembered is None:
+			# Object is kept in the memo so its id cannot be reused by another object during the dump
+			self._memo[key] = (len(self._memo), obj)
+			return None
+
+		if key in self._memo_active:
+			dtype = type(obj) # NOQA
+			raise ValueError('Cannot dump circular reference to object of type: {dmodule}.{dtype}'.format(
+				dmodule = dtype.__module__,
+				dtype = dtype.__name__
+			))
+		return {'!meta': '!ref', 'id': remembered[0]}
+
+
+	def _dump_buffer(self, obj: Any) -> Dict[str, Any]:
+		view = memoryview(obj)
+		if not view.c_contiguous:
+			raise ValueError('Cannot dump non-contiguous buffer out-of-band')
+		self._buffer_callback(view.cast('B'))
+		return {'!meta': '!buffer', 'id': next(self._buffer_ids), 'type': _BUFFER_TYPES[type(obj)]}
+
+
+	@staticmethod
+	def _validate_flat(dtype: str, params: Any) -> None:
+		if params.__class__ in _PRIMITIVE_TYPES or params.__class__ is dict:
+			return
+		if params.__class__ in _SEQUENCE_TYPES and _PRIMITIVE_TYPES.issuperset(map(type, params)):
+			return
+		raise TypeError('Flat dumper of {dtype} returned value which is not flat: {params!r}'.format(dtype = dtype, params = params))
+
+
+	def _dump(self, obj: Any) -> Any:
+		dtype = type(obj) # NOQA
+
+		if dtype in self._primitive_types:
+			return obj
+		elif dtype in _SEQUENCE_TYPES:
+			if self._memo is not None and obj:
+				reference = self._dump_reference(obj)
+				if reference is not None:
+					return reference
+			if self._pack_arrays and len(obj) >= _PACK_ARRAYS_MIN_LENGTH:
+				packed = _pack_array(obj)
+				if packed is not None:
+					return packed
+			if self._primitive_types.issuperset(map(type, obj)):
+				return list(obj)
+			return [self._dump(k) for k in obj]
+		elif dtype is dict:
+			if self._memo is not None:
+				reference = self._dump_reference(obj)
+				if reference is not None:
+					return reference
+
+			if self._format_version == 1:
+				return {'!meta': '!dict',
+					'values': [{'key': self._dump(k), 'value': self._dump(v)} for k, v in obj.items()]
+				}
+			elif '!meta' not in obj and _STR_TYPE.issuperset(map(type, obj)):
+				if self._primitive_types.issuperset(map(type, obj.values())):
+					return dict(obj)
+				return {k: self._dump(v) for k, v in obj.items()}
+			else:
+				return {'!meta': '!kv',
+					'keys': [self._dump(k) for k in obj],
+					'values': [self._dump(v) for v in obj.values()]
+				}
+
+		entry = self._dumpers_by_type.get(dtype)
+		if entry is None:
+			if self._buffer_callback is not None and dtype in _BUFFER_TYPES:
+				return self._dump_buffer(obj)
+			if dtype is Buffer:
+				return obj.view.tobytes() if self._buffer_callback is None else self._dump_buffer(obj.view)
+			entry = self._resolve_dumper(dtype)
+
+		name, version, dumper, metadata, flat = entry
+		if flat and self._memo is None and self._buffer_callback is None:
+			params = dumper(obj)
+			if self._check_flat:
+				self._validate_flat(name, params)
+			if params.__class__ in _SEQUENCE_TYPES:
+				packed = _pack_array(params) if self._pack_arrays and len(params) >= _PACK_ARRAYS_MIN_LENGTH else None
+				params = list(params) if packed is None else packed
+			elif params.__class__ is dict:
+				params = self._dump(params)
+			return {'!meta': {'dtype': name, 'version': version} if metadata is None else metadata, 'params': params}
+
+		if self._memo is None:
+			return {
+				'!meta': {'dtype': name, 'version': version} if metadata is None else metadata,
+				'params': self._dump(dumper(obj))
+			}
+
+		reference = self._dump_reference(obj)
+		if reference is not None:
+			return reference
+
+		self._memo_active.add(id(obj))
+		params = self._dump(dumper(obj))
+		self._memo_active.discard(id(obj))
+		return {'!meta': {'dtype': name, 'version': version} if metadata is None else metadata, 'params': params}
+
+
+	def _dump_iterative(self, obj: Any) -> Any:
+		'''
+		Non-recursive variant of `_dump`, every task on the stack is an object to dump
+		with the container and the slot its encoded value should be stored to.
+		Primitive items of lists are copied in bulk and never get to the stack.
+		'''
+		if type(obj) in self._primitive_types:
+			return obj
+
+		root = [None]
+		self._dump_stack([(obj, root, 0)], -1)
+		return root[0]
+
+
+	def _dump_stack(self, stack: List[Any], budget: int) -> None:
+		'''
+		Processes tasks of `_dump_iterative` until the stack is empty or `budget` tasks were processed,
+		negative budget is unlimited
+		'''
+		primitive_types = self._primitive_types
+		dumpers = self._dumpers_by_type
+		memo = self._memo
+		pop = stack.pop
+		push = stack.append
+
+		while stack and budget:
+			budget -= 1
+			obj, container, slot = pop()
+			dtype = type(obj) # NOQA
+
+			if memo is not None and (dtype is dict or (dtype in _SEQUENCE_TYPES and obj)):
+				reference = self._dump_reference(obj)
+				if reference is not None:
+					container[slot] = reference
+					continue
+
+			if dtype in _SEQUENCE_TYPES:
+				if self._pack_arrays and len(obj) >= _PACK_ARRAYS_MIN_LENGTH:
+					packed = _pack_array(obj)
+					if packed is not None:
+						container[slot] = packed
+						continue
+				output = list(obj)
+				container[slot] = output
+				if primitive_types.issuperset(map(type, output)):
+					continue
+				for i in range(len(output) - 1, -1, -1):
+					if type(output[i]) not in primitive_types:
+						push((output[i], output, i))
+			elif dtype is dict:
+				if self._format_version == 1:
+					values = []
+					for k, v in obj.items():
+						values.append({'key': k, 'value': v})
+					container[slot] = {'!meta': '!dict', 'values': values}
+					for item in reversed(values):
+						if type(item['value']) not in primitive_types:
+							push((item['value'], item, 'value'))
+						if type(item['key']) not in primitive_types:
+							push((item['key'], item, 'key'))
+				elif '!meta' not in obj and _STR_TYPE.issuperset(map(type, obj)):
+					output = dict(obj)
+					container[slot] = output
+					if primitive_types.issuperset(map(type, output.values())):
+						continue
+					for k in reversed(list(output)):
+						if type(output[k]) not in primitive_types:
+							push((output[k], output, k))
+				else:
+					keys = list(obj)
+					values = list(obj.values())
+					container[slot] = {'!meta': '!kv', 'keys': keys, 'values': values}
+					if not primitive_types.issuperset(map(type, values)):
+						for i in range(len(values) - 1, -1, -1):
+							if type(values[i]) not in primitive_types:
+								push((values[i], values, i))
+					if not primitive_types.issuperset(map(type, keys)):
+						for i in range(len(keys) - 1, -1, -1):
+							if type(keys[i]) not in primitive_types:
+								push((keys[i], keys, i))
+			elif dtype is _Deferred:
+				obj.func(*obj.args)
+			else:
+				entry = dumpers.get(dtype)
+				if entry is None:
+					if self._buffer_callback is not None and dtype in _BUFFER_TYPES:
+						container[slot] = self._dump_buffer(obj)
+						continue
+					if dtype is Buffer:
+						container[slot] = obj.view.tobytes() if self._buffer_callback is None else self._dump_buffer(obj.view)
+						continue
+					entry = self._resolve_dumper(dtype)
+
+				if memo is not None:
+					reference = self._dump_reference(obj)
+					if reference is not None:
+						container[slot] = reference
+						continue
+					# Object stays active until the task below its params subtree is reached
+					self._memo_active.add(id(obj))
+					push((_Deferred(self._memo_active.discard, id(obj)), None, None))
+
+				name, version, dumper, metadata, flat = entry
+				params = dumper(obj)
+				output = {
+					'!meta': {'dtype': name, 'version': version} if metadata is None else metadata,
+					'params': params
+				}
+				container[slot] = output
+				if flat and memo is None and self._buffer_callback is None and params.__class__ is not dict:
+					if self._check_flat:
+						self._validate_flat(name, params)
+					if params.__class__ in _SEQUENCE_TYPES:
+						packed = _pack_array(params) if self._pack_arrays and len(params) >= _PACK_ARRAYS_MIN_LENGTH else None
+						output['params'] = list(params) if packed is None else packed
+				elif type(params) not in primitive_types:
+					push((params, output, 'params'))
+
+
+	def _get_loader(self, metadata: Any) -> Callable[[Any], Any]:
+		'''
+		Returns loader for object metadata, which is a dict in format 1, a (dtype, version) pair in format 2
+		or a type id
+		'''
+		if metadata.__class__ is dict:
+			dtype = metadata['dtype']
+			version = metadata['version']
+		elif metadata.__class__ is int:
+			loader = self._loaders_by_id.get(metadata)
+			if loader is None:
+				pair = self._pairs_by_id.get(metadata)
+				if pair is not None:
+					raise KeyError('Cannot restore object: {dtype} version: {version}'.format(dtype = pair[0], version = pair[1]))
+				raise KeyError('Cannot restore object with type id: {type_id}'.format(type_id = metadata))
+			return loader
+		else:
+			dtype, version = metadata
+
+		loader = self._loaders.get((dtype, version))
+		if loader is None or version.__class__ is not int:
+			loader = self._resolve_loader(dtype, version)
+		return loader
+
+
+	def _load_engine(self) -> Callable[[Any], Any]:
+		'''
+		Returns method loading one payload, in memo mode bound to a new copy of the codec holding the memo
+		'''
+		codec = self._load_session()
+		return codec._load_iterative if codec._iterative else codec._load # pylint: disable=protected-access
+
+
+	def _load_session(self) -> 'Codec':
+		'''
+		Returns codec for one loaded payload, in memo mode a new copy of the codec holding the memo
+		'''
+		if not self._memoize:
+			return self
+		codec = copy.copy(self)
+		codec._memo = []
+		return codec
+
+
+	def _buffers_session(self, buffers: Iterable[Any]) -> 'Codec':
+		session = copy.copy(self)
+		session._buffers = list(buffers)
+		return session
+
+
+	def load(self, data: Any, buffers: Iterable[Any] = None) -> Any:
+		'''
+		`buffers` are the out-of-band buffers collected by `buffer_callback` of `dump`, in the same order.
+		They can be any objects supporting the buffer protocol. Memoryviews are restored as views of the buffers
+		without copying, bytes and bytearrays are restored without copying when the buffer is already
+		of the same type, otherwise the data are copied into a new object.
+		'''
+		if self._index_revision != codec_registry.CodecRegistry._revision: # pylint: disable=protected-access
+			self._build_index()
+		codec = self if buffers is None else self._buffers_session(buffers)
+		return codec._load_engine()(data) # pylint: disable=protected-access
+
+
+	def load_many(self, payloads: Iterable[Any], buffers: Iterable[Any] = None) -> List[Any]:
+		'''
+		Deserializes all payloads from `payloads`, output is the same as calling `load` on each payload separately.
+		Dispatch index is checked only once for the whole batch.
+		'''
+		if self._index_revision != codec_registry.CodecRegistry._revision: # pylint: disable=protected-access
+			self._build_index()
+
+		codec = self if buffers is None else self._buffers_session(buffers)
+		if self._memoize:
+			return [codec._load_engine()(data) for data in payloads] # pylint: disable=protected-access
+
+		load = codec._load_engine() # pylint: disable=protected-access
+		return [load(data) for data in payloads]
+
+
+	def load_batch(self, batch: Dict[str, Any]) -> List[Any]:
+		'''
+		Deserializes batch created by `dump_batch`. Type ids are mapped using the type table from the batch header,
+		so only the pairs listed there are loaded by their ids.
+		'''
+		if self._index_revision != codec_registry.CodecRegistry._revision: # pylint: disable=protected-access
+			self._build_index()
+
+		pairs_by_id = {pair_id: (dtype, version) for pair_id, dtype, version in batch['!types']}
+		session = copy.copy(self)
+		session._pairs_by_id = pairs_by_id # pylint: disable=protected-access
+		session._loaders_by_id = {pair_id: self._loaders.get(pair) for pair_id, pair in pairs_by_id.items()} # pylint: disable=protected-access
+		return session.load_many(batch['values'])
+
+
+	def loads(self, data: bytes, wire_format: str = 'msgpack') -> Any:
+		'''
+		Deserializes msgpack or JSON bytes created by `dumps` (or by serializing the result of `dump`).
+		Dicts and objects are restored by the parser hooks while parsing, so the data are walked only once.
+		'''
+		if self._memoize:
+			raise ValueError('dumps / loads do not support codec with memo enabled')
+		if wire_format not in wire.WIRE_FORMATS:
+			raise ValueError('Unsupported wire format: {wire_format}'.format(wire_format = wire_format))
+		if self._index_revision != codec_registry.CodecRegistry._revision: # pylint: disable=protected-access
+			self._build_index()
+		return wire.loads(self, data, wire_format)
+
+
+	def _select(self, data: Any, step: Any, load: Callable[[Any], Any]) -> Any:
+		'''
+		Returns encoded child of encoded `data` selected by path `step`, registered objects are entered
+		through their params without calling their loaders. Keys of dicts are loaded only when they are not primitive.
+		'''
+		while data.__class__ is dict and '!meta' in data and data['!meta'].__class__ is not str:
+			data = data['params']
+		if data.__class__ is dict and data.get('!meta') == '!array':
+			data = _unpack_array(data)
+
+		dtype = type(data) # NOQA
+		if dtype in _SEQUENCE_TYPES:
+			if step.__class__ is int and -len(data) <= step < len(data):
+				return data[step]
+		elif dtype is dict:
+			if '!meta' not in data:
+				if self._format_version == 1:
+					raise ValueError('Invalid dict structure')
+				if step in data:
+					return data[step]
+			elif data['!meta'] in ('!dict', '!kv'):
+				if data['!meta'] == '!dict':
+					items = ((item['key'], item['value']) for item in data['values']) # type: Iterable[Tuple[Any, Any]]
+				else:
+					items = zip(data['keys'], data['values'])
+				for key, value in items:
+					if type(key) not in _PRIMITIVE_TYPES:
+						key = load(key)
+						if isinstance(key, list):
+							key = tuple(key)
+					if key == step:
+						return value
+			else:
+				raise ValueError('Cannot select path in structure: {tag}'.format(tag = data['!meta']))
+		raise KeyError('Invalid path step: {step!r}'.format(step = step))
+
+
+	def _walk_path(self, data: Any, path: Iterable[Any]) -> Tuple[Any, Callable[[Any], Any]]:
+		if self._memoize:
+			raise ValueError('Partial loading does not support codec with memo enabled')
+		if self._index_revision != codec_registry.CodecRegistry._revision: # pylint: disable=protected-access
+			self._build_index()
+
+		load = self._load_engine()
+		for step in path:
+			data = self._select(data, step, load)
+		return data, load
+
+
+	def load_path(self, data: Any, path: Iterable[Any]) -> Any:
+		'''
+		Loads only the part of `data` selected by `path`, which is a sequence of list indexes and dict keys.
+		Registered objects on the path are not loaded, the path continues into their params,
+		e.g. `codec.load_path(codec.dump(snapshot), ['positions', 0])` loads the first position of a snapshot
+		dumped as `{'positions': [...], ...}`. Raises KeyError when the path does not exist.
+		'''
+		data, load = self._walk_path(data, path)
+		return load(data)
+
+
+	def load_keys(self, data: Any, path: Iterable[Any] = ()) -> List[Any]:
+		'''
+		Loads only the keys of the dict selected by `path` (see `load_path`), its values are not loaded
+		'''
+		data, load = self._walk_path(data, path)
+		while data.__class__ is dict and '!meta' in data and data['!meta'].__class__ is not str:
+			data = data['params']
+
+		if data.__class__ is not dict:
+			raise ValueError('Path does not select a dict')
+		elif '!meta' not in data:
+			return list(data)
+		elif data['!meta'] == '!dict':
+			keys = [load(item['key']) for item in data['values']]
+		elif data['!meta'] == '!kv':
+			keys = [load(key) for key in data['keys']]
+		else:
+			raise ValueError('Path does not select a dict')
+		return [tuple(key) if isinstance(key, list) else key for key in keys]
+
+
+	def load_lazy(self, data: Any) -> Any:
+		'''
+		Deserializes `data` lazily, lists and dicts holding anything else than primitives are returned as read-only
+		`charon.lazy.LazyList` and `charon.lazy.LazyDict`, which load their items on the first access and cache them.
+		Loaders get lazy containers as params too, so they have to accept any sequence / mapping.
+		Memo mode is not supported.
+		'''
+		if self._memoize:
+			raise ValueError('Lazy loading does not support codec with memo enabled')
+		if self._index_revision != codec_registry.CodecRegistry._revision: # pylint: disable=protected-access
+			self._build_index()
+		return lazy.LazyLoader(self)(data)
+
+
+	@staticmethod
+	async def _run_stack(run: Callable[[List[Any], int], None], stack: List[Any], yield_every: int, yield_after: float) -> None:
+		'''
+		Processes the stack of an iterative engine by `run`, yielding to the event loop after every `yield_every` tasks
+		and, when `yield_after` (microseconds) is given, whenever that much time elapsed since the last yield
+		'''
+		if yield_every < 1:
+			raise ValueError('yield_every has to be a positive integer: {value!r}'.format(value = yield_every))
+
+		clock = time.perf_counter
+		budget = yield_every if yield_after is None else min(yield_every, _ASYNC_CHECK_EVERY)
+		started = clock()
+		processed = 0
+		while True:
+			run(stack, budget)
+			if not stack:
+				return
+			processed += budget
+			if processed >= yield_every or (yield_after is not None and (clock() - started) * 1e6 >= yield_after):
+				await asyncio.sleep(0)
+				started = clock()
+				processed = 0
+
+
+	async def dump_async(
+		self,
+		obj: Any,
+		buffer_callback: Callable[[memoryview], Any] = None,
+		yield_every: int = 1000,
+		yield_after: float = None,
+	) -> Any:
+		'''
+		Coroutine serializing `obj` like `dump` (with the same output) using the iterative engine, which yields
+		to the event loop after every `yield_every` processed nodes and also after `yield_after` microseconds
+		of work when given. A node is a container or a registered object, primitive items of containers
+		are copied in bulk, so a single huge list or dict is processed at once.
+		'''
+		if self._index_revision != codec_registry.CodecRegistry._revision: # pylint: disable=protected-access
+			self._build_index()
+		codec = self if buffer_callback is None else self._buffer_session(buffer_callback)
+		codec = codec._dump_session() # pylint: disable=protected-access
+		if type(obj) in codec._primitive_types: # pylint: disable=protected-access
+			return obj
+
+		root = [None]
+		await self._run_stack(codec._dump_stack, [(obj, root, 0)], yield_every, yield_after) # pylint: disable=protected-access
+		return root[0]
+
+
+	async def load_async(
+		self,
+		data: Any,
+		buffers: Iterable[Any] = None,
+		yield_every: int = 1000,
+		yield_after: float = None,
+	) -> Any:
+		'''
+		Coroutine deserializing `data` like `load`, yielding to the event loop the same way as `dump_async`.
+		'''
+		if self._index_revision != codec_registry.CodecRegistry._revision: # pylint: disable=protected-access
+			self._build_index()
+		codec = self if buffers is None else self._buffers_session(buffers)
+		codec = codec._load_session() # pylint: disable=protected-access
+		if type(data) in _PRIMITIVE_TYPES:
+			return data
+
+		root = [None]
+		await self._run_stack(codec._load_stack, [(data, root, 0)], yield_every, yield_after) # pylint: disable=protected-access
+		return root[0]
+
+
+	def _load(self, data: Any) -> Any:
 		dtype = type(data) # NOQA
 
-		if dtype in {int, float, bool, str, bytes, type(None)}:
+		if dtype in _PRIMITIVE_TYPES:
 			return data
-		elif dtype in {list, tuple}:
-			return [self.load(k) for k in data]
+		elif dtype in _SEQUENCE_TYPES:
+			if _PRIMITIVE_TYPES.issuperset(map(type, data)):
+				output = list(data)
+				if self._memo is not None and output:
+					self._memo.append(output)
+				return output
+			if self._memo is not None:
+				output = []
+				self._memo.append(output)
+				output.extend([self._load(k) for k in data])
+				return output
+			return [self._load(k) for k in data]
 		elif dtype is dict:
 			if '!meta' not in data:
-				raise ValueError('Invalid dict structure')
-
-			if data['!meta'] == '!dict':
-				output = {}
-				for v in data['values']:
-					key = self.load(v['key'])
-					value = self.load(v['value'])
-					if isinstance(key, list):
-						key = tuple(key)
-					output[key] = value
-				return output
-			else:
-				for registry in reversed(self._registries):
-					if registry.loadable(data):
-						params = self.load(data['params'])
-						return registry.load(data, params)
-				raise KeyError('Cannot restore object: {dtype} version: {version}'.format(
-					dtype = data['!meta']['dtype'],
-					version = data['!meta']['version'])
-				)
+				if self._format_version == 1:
+					raise ValueError('Invalid dict structure')
+				if self._memo is not None:
+					output = {}
+					self._memo.append(output)
+					output.update((k, self._load(v)) for k, v in data.items())
+					return output
+				if _PRIMITIVE_TYPES.issuperset(map(type, data.values())):
+					return dict(data)
+				return {k: self._load(v) for k, v in data.items()}
+
+			metadata = data['!meta']
+			if metadata.__class__ is str:
+				return self._load_tagged(data, metadata)
+
+			loader = self._get_loader(metadata)
+			if self._memo is None:
+				return loader(self._load(data['params']))
+
+			index = len(self._memo)
+			self._memo.append(_LOADING)
+			return _load_memoized(self._memo, index, loader, self._load(data['params']))
 		else:
 			raise ValueError('Unsupported deserialization type: {dtype}'.format(dtype = dtype))
+
+
+	def _load_tagged(self, data: Dict[str, Any], tag: str) -> Any:
+		'''
+		Loads structures of the codec itself, which are marked by a string in '!meta'
+		'''
+		if tag == '!dict':
+			output = {} # type: Dict[Any, Any]
+			if self._memo is not None:
+				self._memo.append(output)
+			for v in data['values']:
+				key = self._load(v['key'])
+				value = self._load(v['value'])
+				if isinstance(key, list):
+					key = tuple(key)
+				output[key] = value
+			return output
+		elif tag == '!kv':
+			output = {}
+			if self._memo is not None:
+				self._memo.append(output)
+			return _fill_dict(output, [self._load(k) for k in data['keys']], [self._load(v) for v in data['values']])
+		elif tag == '!ref':
+			return self._load_reference(data)
+		elif tag == '!buffer':
+			return self._load_buffer(data)
+		elif tag == '!array':
+			output = _unpack_array(data)
+			if self._memo is not None:
+				self._memo.append(output)
+			return output
+		else:
+			raise ValueError('Unsupported structure: {tag}'.format(tag = tag))
+
+
+	def _load_reference(self, data: Dict[str, Any]) -> Any:
+		if self._memo is None:
+			raise ValueError('Back-references can be loaded only by codec with memo enabled')
+
+		index = data['id']
+		if index.__class__ is not int or not 0 <= index < len(self._memo):
+			raise KeyError('Invalid back-reference: {index}'.format(index = index))
+
+		obj = self._memo[index]
+		if obj is _LOADING:
+			raise ValueError('Cannot load circular reference to object which is being loaded')
+		return obj
+
+
+	def _load_buffer(self, data: Dict[str, Any]) -> Any:
+		if self._buffers is None:
+			raise ValueError('Out-of-band buffers have to be passed to load')
+
+		index = data['id']
+		if index.__class__ is not int or not 0 <= index < len(self._buffers):
+			raise KeyError('Invalid buffer reference: {index}'.format(index = index))
+
+		buffer = self._buffers[index]
+		buffer_type = data['type']
+		if buffer_type == 'memoryview':
+			return memoryview(buffer)
+		elif buffer_type == 'bytes':
+			return buffer if type(buffer) is bytes else bytes(buffer)
+		elif buffer_type == 'bytearray':
+			return buffer if type(buffer) is bytearray else bytearray(buffer)
+		raise ValueError('Unsupported buffer type: {buffer_type}'.format(buffer_type = buffer_type))
+
+
+	def _load_iterative(self, data: Any) -> Any:
+		'''
+		Non-recursive variant of `_load`, stack tasks are the same as in `_dump_iterative`.
+		Dicts and registered objects can be created only after all their children are loaded,
+		so a deferred task finishing them is pushed below the tasks of their children.
+		'''
+		if type(data) in _PRIMITIVE_TYPES:
+			return data
+
+		root = [None]
+		self._load_stack([(data, root, 0)], -1)
+		return root[0]
+
+
+	def _load_stack(self, stack: List[Any], budget: int) -> None:
+		'''
+		Processes tasks of `_load_iterative` until the stack is empty or `budget` tasks were processed,
+		negative budget is unlimited
+		'''
+		primitive_types = _PRIMITIVE_TYPES
+		memo = self._memo
+		pop = stack.pop
+		push = stack.append
+
+		while stack and budget:
+			budget -= 1
+			data, container, slot = pop()
+			dtype = type(data) # NOQA
+
+			if dtype in _SEQUENCE_TYPES:
+				output = list(data)
+				container[slot] = output
+				if memo is not None and output:
+					memo.append(output)
+				if primitive_types.issuperset(map(type, output)):
+					continue
+				for i in range(len(output) - 1, -1, -1):
+					if type(output[i]) not in primitive_types:
+						push((output[i], output, i))
+			elif dtype is _Deferred:
+				container[slot] = data.func(*data.args)
+			elif dtype is dict:
+				if '!meta' not in data:
+					if self._format_version == 1:
+						raise ValueError('Invalid dict structure')
+					output = dict(data)
+					container[slot] = output
+					if memo is not None:
+						memo.append(output)
+					if primitive_types.issuperset(map(type, output.values())):
+						continue
+					for k in reversed(list(output)):
+						if type(output[k]) not in primitive_types:
+							push((output[k], output, k))
+					continue
+
+				metadata = data['!meta']
+				if metadata == '!dict':
+					items = data['values']
+					keys = [item['key'] for item in items]
+					values = [item['value'] for item in items]
+					output = {}
+					container[slot] = output
+					if memo is not None:
+						memo.append(output)
+					push((_Deferred(_fill_dict, output, keys, values), container, slot))
+					for i in range(len(items) - 1, -1, -1):
+						if type(values[i]) not in primitive_types:
+							push((values[i], values, i))
+						if type(keys[i]) not in primitive_types:
+							push((keys[i], keys, i))
+				elif metadata == '!kv':
+					keys = list(data['keys'])
+					values = list(data['values'])
+					output = {}
+					container[slot] = output
+					if memo is not None:
+						memo.append(output)
+					push((_Deferred(_fill_dict, output, keys, values), container, slot))
+					if not primitive_types.issuperset(map(type, values)):
+						for i in range(len(values) - 1, -1, -1):
+							if type(values[i]) not in primitive_types:
+								push((values[i], values, i))
+					if not primitive_types.issuperset(map(type, keys)):
+						for i in range(len(keys) - 1, -1, -1):
+							if type(keys[i]) not in primitive_types:
+								push((keys[i], keys, i))
+				elif metadata == '!ref':
+					container[slot] = self._load_reference(data)
+				elif metadata == '!buffer':
+					container[slot] = self._load_buffer(data)
+				elif metadata == '!array':
+					output = _unpack_array(data)
+					container[slot] = output
+					if memo is not None:
+						memo.append(output)
+				elif metadata.__class__ is str:
+					raise ValueError('Unsupported structure: {tag}'.format(tag = metadata))
+				else:
+					loader = self._get_loader(metadata)
+					if memo is None:
+						deferred = _Deferred(loader, data['params'])
+					else:
+						deferred = _Deferred(_load_memoized, memo, len(memo), loader, data['params'])
+						memo.append(_LOADING)
+					push((deferred, container, slot))
+					if type(data['params']) not in primitive_types:
+						push((data['params'], deferred.args, len(deferred.args) - 1))
+			else:
+				raise ValueError('Unsupported deserialization type: {dtype}'.format(dtype = dtype))
@@ -1,12 +1,21 @@
-from typing import Any
+from typing import Any, Callable, Dict, Set # NOQA
 
 import collections
 import functools
 
+from . import codegen
 from . import types
 
 
 
+def qualified_name(cls: Any) -> str:
+	'''
+	Returns name of a class including its module, e.g. `datetime.datetime`
+	'''
+	return '{module}.{qualname}'.format(module = cls.__module__, qualname = cls.__qualname__)
+
+
+
 class DuplicateVersion(ValueError):
 	'''
 	Exception thrown when user is trying to register another dumper or loader
@@ -20,41 +29,125 @@ class CodecRegistry:
 	'''
 	Class used for registering new dumpers and loaders for classes using function decorators
 	'''
-	def __init__(self):
+	#: Incremented whenever a dumper or loader is registered in any registry,
+	#: codecs compare it against the value their dispatch index was built for
+	_revision = 0
+
+	def __init__(self, qualified_names: bool = False):
+		'''
+		Dumpers and loaders are registered under class names, which are also written to the serialized metadata.
+		When `qualified_names` is set, names including the module are used instead (see `class_key`),
+		so classes with the same name from different modules do not collide.
+		'''
+		self._qualified_names = qualified_names
 		self._dumpers = collections.defaultdict(dict) # type: Dict[str, Any]
 		self._loaders = collections.defaultdict(dict) # type: Dict[str, Any]
 
+		# Versions of dumpers registered as flat, keyed by class key
+		self._flat_dumpers = collections.defaultdict(set) # type: Dict[str, Set[int]]
+
+		# Classes registered under every key, a key cannot be shared by two different classes
+		self._dumper_classes = {} # type: Dict[str, Any]
+		self._loader_classes = {} # type: Dict[str, Any]
+
 		self._dumpers_class_hash = collections.defaultdict(dict) # type: Dict[Any, str]
 		self._loaders_class_hash = collections.defaultdict(dict) # type: Dict[Any, str]
 
 
-	def dumper(self, cls: Any, version: types.VersionType, class_hash: str = None) -> types.CoderType:
+	def class_key(self, cls: Any) -> str:
+		'''
+		Returns name the class is registered under, its `__name__` or its qualified name
+		'''
+		return qualified_name(cls) if self._qualified_names else cls.__name__
+
+
+	@staticmethod
+	def _check_class(classes: Dict[str, Any], key: str, cls: Any) -> None:
+		registered = classes.setdefault(key, cls)
+		if registered is not cls:
+			raise ValueError('Class {cls} collides with already registered class {registered} under name: {key}'.format(
+				cls = qualified_name(cls),
+				registered = qualified_name(registered),
+				key = key,
+			))
+
+
+	def dumper(self, cls: Any, version: types.VersionType, class_hash: str = None, flat: bool = False) -> types.CoderType:
 		'''
 		Decorator checks version type, then checks for already saved dumper for specific class and version,
 		if passes saves it for specific class and version,
 
+		Set `flat` for dumpers which always return a primitive or a list / tuple of primitives only.
+		Codec then emits their output as it is without walking it and return values are not type checked,
+		unless the codec is created with `check_flat`. Dicts returned by flat dumpers are still walked.
+
 		If class hash is specified it is checked if it is string, and if so, it is registered based on version.
 		Only highest version of class hash is kept because we cannot check hash of older class implementation.
 		Class hash set to None is ignored, this is feature used for compatibility.
 		'''
+		key = self._check_dumper(cls, version, class_hash)
+
+		def decorator(f):
+			self._add_dumper(key, version, f if flat else functools.partial(self._run_representer, f), flat)
+
+		return decorator
+
+
+	def _check_dumper(self, cls: Any, version: types.VersionType, class_hash: str) -> str:
+		'''
+		Checks dumper of the class and version can be registered and registers its class hash, returns class key
+		'''
 		if not isinstance(version, int):
 			raise ValueError('Version must be integer, not: {vtype}'.format(vtype = type(version).__name__))
 
 		if class_hash is not None and not isinstance(class_hash, str):
 			raise ValueError('Class hash must be string or None, not: {vtype}'.format(vtype = type(class_hash).__name__))
 
-		if version in self._dumpers[cls.__name__]:
+		key = self.class_key(cls)
+		self._check_class(self._dumper_classes, key, cls)
+		if version in self._dumpers[key]:
 			raise DuplicateVersion
 
-		highest_version = max(self._dumpers[cls.__name__]) if self._dumpers[cls.__name__] else None
+		highest_version = max(self._dumpers[key]) if self._dumpers[key] else None
 		# Keep class hash only for dumper with highest version, we cannot check hash of older versions
 		if class_hash and (not highest_version or version > highest_version):
 			self._dumpers_class_hash[cls] = class_hash
+		return key
 
-		def decorator(f):
-			self._dumpers[cls.__name__][version] = functools.partial(self._run_representer, f)
 
-		return decorator
+	def _add_dumper(self, key: str, version: types.VersionType, dumper: Callable[[Any], Any], flat: bool) -> None:
+		'''
+		Stores dumper as it is, callers wrap dumpers which need their return values checked
+		'''
+		self._dumpers[key][version] = dumper
+		if flat:
+			self._flat_dumpers[key].add(version)
+		CodecRegistry._revision += 1
+
+
+	def register_dataclass(self, cls: Any, version: types.VersionType, class_hash: str = None) -> Any:
+		'''
+		Registers generated dumper and loader of a dataclass, NamedTuple or `__slots__` class (see `charon.codegen`).
+		Fields are inspected once, the dumper returns a tuple of their values read by direct attribute access
+		and the loader passes them to the constructor (`__slots__` classes are created without calling `__init__`).
+
+		Class hash is registered for both the dumper and the loader, so metatests catch changed fields.
+		Returns the class.
+		'''
+		dumper, loader = codegen.generate(cls)
+		key = self._check_dumper(cls, version, class_hash)
+		# Generated dumpers always return a tuple, they are stored without the return value check
+		self._add_dumper(key, version, dumper, flat = False)
+		self.loader(cls, version, class_hash)(loader)
+		return cls
+
+
+	def freeze(self) -> 'FrozenCodecRegistry':
+		'''
+		Returns immutable snapshot of the registry, see `FrozenCodecRegistry`
+		'''
+		return FrozenCodecRegistry(self)
+
 
 	@staticmethod
 	def _run_representer(representer: types.CoderType, data: Any) -> types.BaseType:
@@ -76,23 +169,24 @@ class CodecRegistry:
 		then creates Dict containing metadata about class and class parameters returned by dumper
 		'''
 		dtype = type(obj) # NOQA
+		key = self.class_key(dtype)
 
-		if dtype.__name__ not in self._dumpers:
-			raise KeyError('Cannot dump object of type: {dtype} missing dumper'.format(dtype = dtype.__name__))
+		if key not in self._dumpers:
+			raise KeyError('Cannot dump object of type: {dtype} missing dumper'.format(dtype = key))
 
-		class_dumpers = self._dumpers[dtype.__name__]
+		class_dumpers = self._dumpers[key]
 		available_versions = list(sorted(class_dumpers.keys()))
 		selected_version = available_versions[-1]
 
 		return {
-			'!meta': { 'dtype': dtype.__name__, 'version': selected_version },
+			'!meta': { 'dtype': key, 'version': selected_version },
 			'params': class_dumpers[selected_version](obj)
 		}
 
 
 	def dumpable(self, obj: Any) -> bool:
 		dtype = type(obj) # NOQA
-		return dtype.__name__ in self._dumpers
+		return self.class_key(dtype) in self._dumpers
 
 
 	def loader(self, cls: Any, version: types.VersionType, class_hash: str = None) -> types.CoderType:
@@ -110,16 +204,19 @@ class CodecRegistry:
 		if class_hash is not None and not isinstance(class_hash, str):
 			raise ValueError('Class hash must be string or None, not: {vtype}'.format(vtype = type(class_hash).__name__))
 
-		if version in self._loaders[cls.__name__]:
+		key = self.class_key(cls)
+		self._check_class(self._loader_classes, key, cls)
+		if version in self._loaders[key]:
 			raise DuplicateVersion
 
-		highest_version = max(self._loaders[cls.__name__]) if self._loaders[cls.__name__] else None
+		highest_version = max(self._loaders[key]) if self._loaders[key] else None
 		# Keep class hash only for loader with highest version, we cannot check hash of older versions
 		if class_hash and (not highest_version or version > highest_version):
 			self._loaders_class_hash[cls] = class_hash
 
 		def decorator(f):
-			self._loaders[cls.__name__][version] = f
+			self._loaders[key][version] = f
+			CodecRegistry._revision += 1
 
 		return decorator
 
@@ -168,3 +265,60 @@ class CodecRegistry:
 			)
 
 		return loaders[version](params)
+
+
+
+class FrozenCodecRegistry(CodecRegistry):
+	'''
+	Immutable snapshot of a registry created by `CodecRegistry.freeze`. Dumpers and loaders are held in plain dicts
+	and the highest dumper versions are resolved in advance. Lookups never modify the snapshot and registering
+	raises TypeError, so it can be read by any number of threads without locking while the original registry
+	is still being extended. Freeze it again and swap the new snapshot in to pick up later registrations.
+	'''
+
+	def __init__(self, registry: CodecRegistry) -> None: # pylint: disable=super-init-not-called
+		# Copying a dict is atomic under the GIL, so every table is copied consistently even while registering.
+		# Keys with no versions yet (registration in progress) are left out.
+		dumpers = dict(registry._dumpers) # pylint: disable=protected-access
+		loaders = dict(registry._loaders) # pylint: disable=protected-access
+		flat_dumpers = dict(registry._flat_dumpers) # pylint: disable=protected-access
+
+		self._qualified_names = registry._qualified_names # pylint: disable=protected-access
+		self._dumpers = {key: dict(versions) for key, versions in dumpers.items() if versions}
+		self._loaders = {key: dict(versions) for key, versions in loaders.items() if versions}
+		self._flat_dumpers = {key: frozenset(versions) for key, versions in flat_dumpers.items() if versions}
+		self._dumper_classes = dict(registry._dumper_classes) # pylint: disable=protected-access
+		self._loader_classes = dict(registry._loader_classes) # pylint: disable=protected-access
+		self._dumpers_class_hash = dict(registry._dumpers_class_hash) # pylint: disable=protected-access
+		self._loaders_class_hash = dict(registry._loaders_class_hash) # pylint: disable=protected-access
+
+		# Highest version of every dumper
+		self._latest_versions = {key: max(versions) for key, versions in self._dumpers.items()}
+
+
+	def dumper(self, cls: Any, version: types.VersionType, class_hash: str = None, flat: bool = False) -> types.CoderType:
+		raise TypeError('Cannot register dumper of {cls} to a frozen registry'.format(cls = cls.__qualname__))
+
+
+	def loader(self, cls: Any, version: types.VersionType, class_hash: str = None) -> types.CoderType:
+		raise TypeError('Cannot register loader of {cls} to a frozen registry'.format(cls = cls.__qualname__))
+
+
+	def register_dataclass(self, cls: Any, version: types.VersionType, class_hash: str = None) -> Any:
+		raise TypeError('Cannot register dataclass {cls} to a frozen registry'.format(cls = cls.__qualname__))
+
+
+	def freeze(self) -> 'FrozenCodecRegistry':
+		return self
+
+
+	def dump(self, obj: Any) -> types.EncodingType:
+		key = self.class_key(type(obj))
+		version = self._latest_versions.get(key)
+		if version is None:
+			raise KeyError('Cannot dump object of type: {dtype} missing dumper'.format(dtype = key))
+
+		return {
+			'!meta': { 'dtype': key, 'version': version },
+			'params': self._dumpers[key][version](obj)
+		}
@@ -0,0 +1,99 @@
+'''
+Generated dumpers and loaders of record-like classes, see `CodecRegistry.register_dataclass`.
+Fields of a class are inspected once and a specialized dumper / loader pair is compiled from source,
+so dumping is a single tuple of direct attribute reads and loading a single constructor call.
+'''
+from typing import Any, Callable, Dict, List, Tuple # NOQA
+
+import keyword
+
+
+
+def slot_names(cls: Any) -> List[str]:
+	'''
+	Returns attribute names of all `__slots__` of the class and its bases, base classes first.
+	Private names are mangled the way Python stores them.
+	'''
+	names = [] # type: List[str]
+	for base in reversed(cls.__mro__):
+		slots = base.__dict__.get('__slots__', ())
+		if isinstance(slots, str):
+			slots = (slots,)
+		for name in slots:
+			if name in ('__dict__', '__weakref__'):
+				continue
+			if name.startswith('__') and not name.endswith('__'):
+				name = '_{cls}{name}'.format(cls = base.__name__.lstrip('_'), name = name)
+			if name not in names:
+				names.append(name)
+	return names
+
+
+def record_fields(cls: Any) -> Tuple[str, List[str], List[str]]:
+	'''
+	Returns (kind, fields, init_fields) of a dataclass, NamedTuple or `__slots__` class. Fields are all dumped
+	attributes in the order they are dumped in, `init_fields` are those passed to the constructor on load,
+	the rest is set on the created object.
+	'''
+	if '__dataclass_fields__' in cls.__dict__:
+		import dataclasses
+		fields = dataclasses.fields(cls)
+		return 'dataclass', [field.name for field in fields], [field.name for field in fields if field.init]
+	if issubclass(cls, tuple) and hasattr(cls, '_fields'):
+		return 'namedtuple', list(cls._fields), list(cls._fields)
+	if '__slots__' in cls.__dict__ and '__dict__' not in dir(cls):
+		return 'slots', slot_names(cls), []
+	raise TypeError('Cannot generate codec for {cls}, it is not a dataclass, NamedTuple or __slots__ class'.format(
+		cls = cls.__qualname__,
+	))
+
+
+def _compile(name: str, lines: List[str], namespace: Dict[str, Any]) -> Callable[[Any], Any]:
+	source = '\n'.join(lines) + '\n'
+	exec(compile(source, '<charon generated {name}>'.format(name = name), 'exec'), namespace) # pylint: disable=exec-used
+	return namespace[name]
+
+
+def generate(cls: Any) -> Tuple[Callable[[Any], Any], Callable[[Any], Any]]:
+	'''
+	Returns (dumper, loader) of a dataclass, NamedTuple or `__slots__` class. The dumper returns a tuple
+	of field values in the order of `record_fields`, the loader accepts any sequence of the same length.
+	'''
+	kind, fields, init_fields = record_fields(cls)
+	for field in fields:
+		if not field.isidentifier() or keyword.iskeyword(field):
+			raise TypeError('Cannot generate codec for {cls}, field {field!r} is not an identifier'.format(
+				cls = cls.__qualname__,
+				field = field,
+			))
+
+	dump_lines = ['def dump(obj):']
+	dump_lines.append('\treturn ({values})'.format(values = ''.join('obj.{}, '.format(field) for field in fields)))
+
+	# Params are unpacked into local variables, which also checks their count
+	variables = ['f{}'.format(i) for i in range(len(fields))]
+	load_lines = ['def load(params):']
+	if variables:
+		load_lines.append('\t{variables}, = params'.format(variables = ', '.join(variables)))
+	else:
+		load_lines.append('\tif len(params):')
+		load_lines.append('\t\traise ValueError("Invalid params count")')
+
+	arguments = {field: variable for field, variable in zip(fields, variables)}
+	if kind == 'slots':
+		load_lines.append('\tobj = _new(_cls)')
+	else:
+		load_lines.append('\tobj = _cls({arguments})'.format(arguments = ', '.join(arguments[field] for field in init_fields)))
+	for field, variable in zip(fields, variables):
+		if kind == 'slots':
+			load_lines.append('\tobj.{field} = {variable}'.format(field = field, variable = variable))
+		elif field not in init_fields:
+			# object.__setattr__ works for frozen dataclasses too
+			load_lines.append('\t_setattr(obj, {field!r}, {variable})'.format(field = field, variable = variable))
+	load_lines.append('\treturn obj')
+
+	dumper = _compile('dump', dump_lines, {})
+	loader = _compile('load', load_lines, {'_cls': cls, '_new': cls.__new__, '_setattr': object.__setattr__})
+	dumper.__qualname__ = dumper.__name__ = '_dump_{name}'.format(name = cls.__name__)
+	loader.__qualname__ = loader.__name__ = '_load_{name}'.format(name = cls.__name__)
+	return dumper, loader
@@ -1 +1,2 @@
-from .standard_registry import STANDARD_REGISTRY # NOQA
+from .standard_registry import DECIMAL_V2_REGISTRY, STANDARD_REGISTRY # NOQA
+from .stdlib_registry import STDLIB_REGISTRY # NOQA
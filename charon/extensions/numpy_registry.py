@@ -0,0 +1,103 @@
+'''
+Dumpers and loaders of numpy arrays. This module is not imported by `charon.extensions`,
+so numpy is needed only when `charon.extensions.numpy_registry` is imported.
+
+Arrays are dumped as dtype, shape, strides and a `charon.Buffer` of the array data. Use the registry with
+`buffer_callback` of `Codec.dump` to pass the data out-of-band without copying, otherwise the data
+are dumped as bytes. Arrays are loaded as views of the buffers, so they are read-only when the passed
+out-of-band buffers are (e.g. bytes), arrays loaded from inline data are writable.
+'''
+import numpy
+
+from charon import Buffer, CodecRegistry
+
+
+
+#: Module Variable for Registry with Dumpers and Loaders for numpy types
+NUMPY_REGISTRY = CodecRegistry()
+
+
+def _dump_dtype(dtype):
+	if dtype.hasobject:
+		raise ValueError('Cannot dump numpy array with object dtype: {dtype}'.format(dtype = dtype))
+	if dtype.subdtype is not None:
+		base, shape = dtype.subdtype
+		return {'base': _dump_dtype(base), 'shape': list(shape)}
+	if dtype.fields is None:
+		return dtype.str
+	# Offsets and itemsize keep padding of the layout, `dtype.descr` would turn it into extra void fields
+	fields = [dtype.fields[name] for name in dtype.names]
+	if any(len(field) > 2 for field in fields):
+		raise ValueError('Cannot dump numpy array with field titles: {dtype}'.format(dtype = dtype))
+	return {
+		'names': list(dtype.names),
+		'formats': [_dump_dtype(field[0]) for field in fields],
+		'offsets': [field[1] for field in fields],
+		'itemsize': dtype.itemsize,
+	}
+
+
+def _load_dtype(data):
+	dtype = numpy.dtype(_load_dtype_spec(data))
+	# Arrays of objects would be created from raw pointers in the buffer
+	if dtype.hasobject:
+		raise ValueError('Cannot load numpy array with object dtype: {dtype}'.format(dtype = dtype))
+	return dtype
+
+
+def _load_dtype_spec(data):
+	if isinstance(data, str):
+		return data
+	if 'base' in data:
+		return (_load_dtype_spec(data['base']), tuple(data['shape']))
+	return {
+		'names': list(data['names']),
+		'formats': [_load_dtype_spec(field) for field in data['formats']],
+		'offsets': list(data['offsets']),
+		'itemsize': data['itemsize'],
+	}
+
+
+def _c_strides(shape, itemsize):
+	strides = []
+	for size in reversed(shape):
+		strides.append(itemsize)
+		itemsize *= size
+	return tuple(reversed(strides))
+
+
+def _f_strides(shape, itemsize):
+	return _c_strides(shape[::-1], itemsize)[::-1]
+
+
+@NUMPY_REGISTRY.dumper(numpy.ndarray, version = 1)
+def _dump_ndarray_v1(obj):
+	dtype = _dump_dtype(obj.dtype)
+	if obj.flags.c_contiguous:
+		strides = _c_strides(obj.shape, obj.itemsize)
+	elif obj.flags.f_contiguous:
+		strides = _f_strides(obj.shape, obj.itemsize)
+	else:
+		obj = numpy.ascontiguousarray(obj)
+		strides = _c_strides(obj.shape, obj.itemsize)
+	# Buffers of some dtypes (e.g. datetime64) cannot be exported, the raw bytes can, the dtype is dumped above
+	return (dtype, obj.shape, strides, Buffer(obj.reshape(-1, order = 'A').view(numpy.uint8)))
+
+
+@NUMPY_REGISTRY.loader(numpy.ndarray, version = 1)
+def _load_ndarray_v1(data):
+	dtype, shape, strides, buffer = data
+	dtype = _load_dtype(dtype)
+	shape = tuple(shape)
+	strides = tuple(strides)
+	if buffer.__class__ is bytes:
+		# Inline data are already a copy, a writable one makes the array writable like unpickled arrays
+		buffer = bytearray(buffer)
+	array = numpy.frombuffer(buffer, dtype = dtype)
+
+	# Only contiguous layouts are accepted, arbitrary strides could reach out of the buffer
+	if strides == _c_strides(shape, dtype.itemsize):
+		return array.reshape(shape)
+	elif strides == _f_strides(shape, dtype.itemsize):
+		return array.reshape(shape, order = 'F')
+	raise ValueError('Unsupported numpy array strides: {strides}'.format(strides = strides))
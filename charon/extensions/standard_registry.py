@@ -1,7 +1,8 @@
+from typing import Dict # NOQA
+
 import decimal
 import datetime
-
-import dateutil.parser
+import re
 
 from charon import CodecRegistry
 
@@ -10,8 +11,61 @@ from charon import CodecRegistry
 #: Module Variable for Registry with Dumpers and Loaders for standard Python Types
 STANDARD_REGISTRY = CodecRegistry()
 
+#: Opt-in registry with the v2 (coefficient, exponent) dumper of Decimal, put it after `STANDARD_REGISTRY`
+#: to dump Decimals as v2. Its loader is in `STANDARD_REGISTRY`, so v2 data are loaded without this registry.
+DECIMAL_V2_REGISTRY = CodecRegistry()
+
+#: Context of v2 Decimal loading, precise enough to never round
+_EXACT_CONTEXT = decimal.Context(prec = decimal.MAX_PREC, Emax = decimal.MAX_EMAX, Emin = decimal.MIN_EMIN)
+
+#: Powers of ten `1E<exponent>` used by v2 Decimal loading, keyed by the exponent
+_DECIMAL_SCALES = {} # type: Dict[int, decimal.Decimal]
+
+#: Exact formats produced by `isoformat` of v1 dumpers, anything else is parsed by dateutil
+_ISO_DATE = re.compile(r'([0-9]{4})-([0-9]{2})-([0-9]{2})')
+_ISO_TIME = re.compile(r'([0-9]{2}):([0-9]{2}):([0-9]{2})(?:\.([0-9]{6}))?')
+_ISO_DATETIME = re.compile(
+	r'([0-9]{4})-([0-9]{2})-([0-9]{2})T([0-9]{2}):([0-9]{2}):([0-9]{2})(?:\.([0-9]{6}))?(?:([+-][0-9]{2}:[0-9]{2}))?'
+)
+
+#: Timezones of UTC offsets parsed so far, keyed by the offset string
+_ISO_TIMEZONES = {'+00:00': datetime.timezone.utc} # type: Dict[str, datetime.tzinfo]
+
+#: Origin of v3 datetimes, naive ones are stored relative to it as they are, aware ones in UTC
+_EPOCH = datetime.datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+
+#: Range of v3 integer encodings, which wire formats like msgpack store as 64 bit integers
+_INT64_MIN = -2 ** 63
+_INT64_MAX = 2 ** 63 - 1
+
+#: Timezones of v3 UTC offsets loaded so far, keyed by the offset in seconds
+_OFFSET_TIMEZONES = {0: datetime.timezone.utc} # type: Dict[int, datetime.tzinfo]
+
+
+def _parse_with_dateutil(data: str) -> datetime.datetime:
+	# dateutil is imported only when data in other formats than the fast paths handle are loaded
+	import dateutil.parser
+	return dateutil.parser.parse(data)
+
+
+def _offset_timezone(seconds: int) -> datetime.tzinfo:
+	tz = _OFFSET_TIMEZONES.get(seconds)
+	if tz is None:
+		tz = _OFFSET_TIMEZONES[seconds] = datetime.timezone(datetime.timedelta(seconds = seconds))
+	return tz
+
+
+def _iso_timezone(offset: str) -> datetime.tzinfo:
+	tz = _ISO_TIMEZONES.get(offset)
+	if tz is None:
+		delta = datetime.timedelta(hours = int(offset[1:3]), minutes = int(offset[4:6]))
+		tz = datetime.timezone(-delta if offset[0] == '-' else delta)
+		_ISO_TIMEZONES[offset] = tz
+	return tz
 
-@STANDARD_REGISTRY.dumper(decimal.Decimal, version = 1)
+
+@STANDARD_REGISTRY.dumper(decimal.Decimal, version = 1, flat = True)
 def _dump_decimal_v1(obj):
 	return str(obj)
 
@@ -21,6 +75,48 @@ def _load_decimal_v1(data):
 	return decimal.Decimal(data)
 
 
+@DECIMAL_V2_REGISTRY.dumper(decimal.Decimal, version = 2, flat = True)
+def _dump_decimal_v2(obj):
+	'''
+	Finite decimals are dumped as (signed integer coefficient, exponent), e.g. `-12.50` as `(-1250, -2)`,
+	or just as the coefficient when the exponent is zero. Negative zero, infinities, NaNs and coefficients not fitting into 64 bits are dumped as their str.
+
+	Payloads are only slightly smaller than v1 and loading the pairs is slower than parsing v1 strings
+	(see `benchmarks/bench_decimal.py`), so v2 is not dumped by `STANDARD_REGISTRY`.
+	'''
+	text = str(obj)
+	whole, _, fraction = text.partition('.')
+	try:
+		coefficient = int(whole + fraction)
+		exponent = -len(fraction)
+	except ValueError:
+		# Exponent notation or a special value
+		if not obj.is_finite():
+			return text
+		sign, digits, exponent = obj.as_tuple()
+		coefficient = int(''.join(map(str, digits)))
+		if sign:
+			coefficient = -coefficient
+	if not coefficient and text[0] == '-' or not -2 ** 63 <= coefficient < 2 ** 63:
+		return text
+	if not exponent:
+		return coefficient
+	return (coefficient, exponent)
+
+
+@STANDARD_REGISTRY.loader(decimal.Decimal, version = 2)
+def _load_decimal_v2(data):
+	if data.__class__ is int or data.__class__ is str:
+		return decimal.Decimal(data)
+	coefficient, exponent = data
+	scale = _DECIMAL_SCALES.get(exponent)
+	if scale is None:
+		scale = _DECIMAL_SCALES[exponent] = decimal.Decimal((0, (1,), exponent))
+	# Multiplying by 1E<exponent> is exact and keeps the exponent, it is faster than parsing a str
+	# and than building the decimal from a (sign, digits, exponent) tuple
+	return _EXACT_CONTEXT.multiply(coefficient, scale)
+
+
 @STANDARD_REGISTRY.dumper(set, version = 1)
 def _dump_set_v1(obj):
 	return list(obj)
@@ -48,7 +144,15 @@ def _dump_datetime_v1(obj):
 
 @STANDARD_REGISTRY.loader(datetime.datetime, version = 1)
 def _load_datetime_v1(data):
-	return dateutil.parser.parse(data)
+	match = _ISO_DATETIME.fullmatch(data)
+	if match is None:
+		return _parse_with_dateutil(data)
+	year, month, day, hour, minute, second, microsecond, offset = match.groups()
+	return datetime.datetime(
+		int(year), int(month), int(day), int(hour), int(minute), int(second),
+		0 if microsecond is None else int(microsecond),
+		None if offset is None else _iso_timezone(offset),
+	)
 
 
 @STANDARD_REGISTRY.dumper(datetime.datetime, version = 2)
@@ -61,11 +165,47 @@ def _load_datetime_v2(data):
 	timestamp, nanoseconds, utcoffset = data
 	if utcoffset is None:
 		obj = datetime.datetime.fromtimestamp(timestamp)
-		obj.replace(microsecond = nanoseconds // 1000)
 	else:
 		obj = datetime.datetime.fromtimestamp(timestamp, tz = datetime.timezone(utcoffset))
-		obj.replace(microsecond = nanoseconds // 1000)
-	return obj
+	return obj.replace(microsecond = nanoseconds // 1000)
+
+
+@STANDARD_REGISTRY.dumper(datetime.datetime, version = 3, flat = True)
+def _dump_datetime_v3(obj):
+	'''
+	Naive datetimes are dumped as nanoseconds since 1970-01-01 (not converted from local time),
+	aware ones as (nanoseconds since the UTC epoch, UTC offset in seconds).
+	Datetimes out of the 64 bit nanoseconds range (about years 1677 to 2262) are dumped
+	as (seconds, nanoseconds of the second, UTC offset in seconds or None).
+	'''
+	seconds = (obj.toordinal() - _EPOCH_ORDINAL) * 86400 + obj.hour * 3600 + obj.minute * 60 + obj.second
+	utcoffset = obj.utcoffset()
+	offset = None if utcoffset is None else utcoffset.days * 86400 + utcoffset.seconds
+	if offset is not None:
+		seconds -= offset
+	nanoseconds = seconds * 1000000000 + obj.microsecond * 1000
+	if not _INT64_MIN <= nanoseconds <= _INT64_MAX:
+		return (seconds, obj.microsecond * 1000, offset)
+	if offset is None:
+		return nanoseconds
+	return (nanoseconds, offset)
+
+
+@STANDARD_REGISTRY.loader(datetime.datetime, version = 3)
+def _load_datetime_v3(data):
+	if data.__class__ is int:
+		return _EPOCH + datetime.timedelta(microseconds = data // 1000)
+	if len(data) == 2:
+		nanoseconds, offset = data
+		local = _EPOCH + datetime.timedelta(microseconds = nanoseconds // 1000 + offset * 1000000)
+		return local.replace(tzinfo = _offset_timezone(offset))
+
+	seconds, nanoseconds, offset = data
+	if offset is None:
+		return _EPOCH + datetime.timedelta(seconds = seconds, microseconds = nanoseconds // 1000)
+	# Local time is computed directly, UTC time of extreme datetimes can be out of the datetime range
+	local = _EPOCH + datetime.timedelta(seconds = seconds + offset, microseconds = nanoseconds // 1000)
+	return local.replace(tzinfo = _offset_timezone(offset))
 
 
 @STANDARD_REGISTRY.dumper(datetime.date, version = 1)
@@ -75,10 +215,14 @@ def _dump_date_v1(obj):
 
 @STANDARD_REGISTRY.loader(datetime.date, version = 1)
 def _load_date_v1(data):
-	return dateutil.parser.parse(data).date()
+	match = _ISO_DATE.fullmatch(data)
+	if match is None:
+		return _parse_with_dateutil(data).date()
+	year, month, day = match.groups()
+	return datetime.date(int(year), int(month), int(day))
 
 
-@STANDARD_REGISTRY.dumper(datetime.date, version = 2)
+@STANDARD_REGISTRY.dumper(datetime.date, version = 2, flat = True)
 def _dump_date_v2(obj):
 	return (obj.year, obj.month, obj.day)
 
@@ -88,6 +232,16 @@ def _load_date_v2(data):
 	return datetime.date(*data)
 
 
+@STANDARD_REGISTRY.dumper(datetime.date, version = 3, flat = True)
+def _dump_date_v3(obj):
+	return obj.toordinal()
+
+
+@STANDARD_REGISTRY.loader(datetime.date, version = 3)
+def _load_date_v3(data):
+	return datetime.date.fromordinal(data)
+
+
 @STANDARD_REGISTRY.dumper(datetime.time, version = 1)
 def _dump_time_v1(obj):
 	return obj.isoformat()
@@ -95,10 +249,15 @@ def _dump_time_v1(obj):
 
 @STANDARD_REGISTRY.loader(datetime.time, version = 1)
 def _load_time_v1(data):
-	return dateutil.parser.parse(data).time()
+	# Times with UTC offset are left to dateutil, which drops the offset
+	match = _ISO_TIME.fullmatch(data)
+	if match is None:
+		return _parse_with_dateutil(data).time()
+	hour, minute, second, microsecond = match.groups()
+	return datetime.time(int(hour), int(minute), int(second), 0 if microsecond is None else int(microsecond))
 
 
-@STANDARD_REGISTRY.dumper(datetime.time, version = 2)
+@STANDARD_REGISTRY.dumper(datetime.time, version = 2, flat = True)
 def _dump_time_v2(obj):
 	return (obj.hour, obj.minute, obj.second, obj.microsecond * 1000)
 
@@ -109,6 +268,31 @@ def _load_time_v2(data):
 	return datetime.time(hour, minute, second, nanosecond // 1000)
 
 
+@STANDARD_REGISTRY.dumper(datetime.time, version = 3, flat = True)
+def _dump_time_v3(obj):
+	'''
+	Naive times are dumped as nanoseconds of the day, aware ones as (nanoseconds of the day, UTC offset in seconds)
+	'''
+	nanoseconds = (obj.hour * 3600 + obj.minute * 60 + obj.second) * 1000000000 + obj.microsecond * 1000
+	utcoffset = obj.utcoffset()
+	if utcoffset is None:
+		return nanoseconds
+	return (nanoseconds, utcoffset.days * 86400 + utcoffset.seconds)
+
+
+@STANDARD_REGISTRY.loader(datetime.time, version = 3)
+def _load_time_v3(data):
+	if data.__class__ is int:
+		nanoseconds, tz = data, None
+	else:
+		nanoseconds, offset = data
+		tz = _offset_timezone(offset)
+	seconds, nanoseconds = divmod(nanoseconds, 1000000000)
+	minutes, second = divmod(seconds, 60)
+	hour, minute = divmod(minutes, 60)
+	return datetime.time(hour, minute, second, nanoseconds // 1000, tz)
+
+
 @STANDARD_REGISTRY.dumper(datetime.timedelta, version = 1)
 def _dump_timedelta_v1(obj):
 	return {'days': obj.days, 'seconds': obj.seconds, 'microseconds': obj.microseconds}
@@ -119,7 +303,7 @@ def _load_timedelta_v1(data):
 	return datetime.timedelta(days = data['days'], seconds = data['seconds'], microseconds = data['microseconds'])
 
 
-@STANDARD_REGISTRY.dumper(datetime.timedelta, version = 2)
+@STANDARD_REGISTRY.dumper(datetime.timedelta, version = 2, flat = True)
 def _dump_timedelta_v2(obj):
 	return (obj.days, obj.seconds, obj.microseconds,)
 
@@ -128,3 +312,24 @@ def _dump_timedelta_v2(obj):
 def _load_timedelta_v2(data):
 	days, seconds, microseconds = data
 	return datetime.timedelta(days = days, seconds = seconds, microseconds = microseconds)
+
+
+@STANDARD_REGISTRY.dumper(datetime.timedelta, version = 3, flat = True)
+def _dump_timedelta_v3(obj):
+	'''
+	Timedeltas are dumped as microseconds, those out of the 64 bit range (over about 290 thousand years)
+	as (seconds, microseconds)
+	'''
+	seconds = obj.days * 86400 + obj.seconds
+	microseconds = seconds * 1000000 + obj.microseconds
+	if not _INT64_MIN <= microseconds <= _INT64_MAX:
+		return (seconds, obj.microseconds)
+	return microseconds
+
+
+@STANDARD_REGISTRY.loader(datetime.timedelta, version = 3)
+def _load_timedelta_v3(data):
+	if data.__class__ is int:
+		return datetime.timedelta(microseconds = data)
+	seconds, microseconds = data
+	return datetime.timedelta(seconds = seconds, microseconds = microseconds)
@@ -0,0 +1,231 @@
+'''
+Dumpers and loaders of common standard library types with compact encodings: UUIDs and IP addresses
+as packed bytes, numbers as tuples of their components, containers as lists / dicts of their items.
+
+Enums are specific to applications, register them by `register_enum`.
+'''
+from typing import Any # NOQA
+
+import collections
+import enum
+import fractions
+import ipaddress
+import pathlib
+import uuid
+
+from charon import CodecRegistry
+
+
+
+#: Module Variable for Registry with Dumpers and Loaders for standard library types
+STDLIB_REGISTRY = CodecRegistry()
+
+
+def register_enum(registry: CodecRegistry, cls: Any, version: int = 1) -> Any:
+	'''
+	Registers dumper and loader of the enum class `cls` to `registry`, members are dumped by their value.
+	Returns the class.
+	'''
+	if not issubclass(cls, enum.Enum):
+		raise TypeError('Class {cls} is not an enum'.format(cls = cls.__qualname__))
+
+	def _dump_enum(obj):
+		return obj.value
+
+	def _load_enum(data):
+		# Tuple values are loaded as lists
+		return cls(tuple(data) if data.__class__ is list else data)
+
+	registry.dumper(cls, version = version)(_dump_enum)
+	registry.loader(cls, version = version)(_load_enum)
+	return cls
+
+
+@STDLIB_REGISTRY.dumper(uuid.UUID, version = 1, flat = True)
+def _dump_uuid_v1(obj):
+	return obj.bytes
+
+
+@STDLIB_REGISTRY.loader(uuid.UUID, version = 1)
+def _load_uuid_v1(data):
+	return uuid.UUID(bytes = data)
+
+
+@STDLIB_REGISTRY.dumper(ipaddress.IPv4Address, version = 1, flat = True)
+def _dump_ipv4_address_v1(obj):
+	return obj.packed
+
+
+@STDLIB_REGISTRY.loader(ipaddress.IPv4Address, version = 1)
+def _load_ipv4_address_v1(data):
+	return ipaddress.IPv4Address(data)
+
+
+@STDLIB_REGISTRY.dumper(ipaddress.IPv6Address, version = 1, flat = True)
+def _dump_ipv6_address_v1(obj):
+	return obj.packed
+
+
+@STDLIB_REGISTRY.loader(ipaddress.IPv6Address, version = 1)
+def _load_ipv6_address_v1(data):
+	return ipaddress.IPv6Address(data)
+
+
+@STDLIB_REGISTRY.dumper(ipaddress.IPv4Network, version = 1, flat = True)
+def _dump_ipv4_network_v1(obj):
+	return (obj.network_address.packed, obj.prefixlen)
+
+
+@STDLIB_REGISTRY.loader(ipaddress.IPv4Network, version = 1)
+def _load_ipv4_network_v1(data):
+	address, prefixlen = data
+	return ipaddress.IPv4Network((address, prefixlen))
+
+
+@STDLIB_REGISTRY.dumper(ipaddress.IPv6Network, version = 1, flat = True)
+def _dump_ipv6_network_v1(obj):
+	return (obj.network_address.packed, obj.prefixlen)
+
+
+@STDLIB_REGISTRY.loader(ipaddress.IPv6Network, version = 1)
+def _load_ipv6_network_v1(data):
+	address, prefixlen = data
+	return ipaddress.IPv6Network((address, prefixlen))
+
+
+@STDLIB_REGISTRY.dumper(ipaddress.IPv4Interface, version = 1, flat = True)
+def _dump_ipv4_interface_v1(obj):
+	return (obj.packed, obj.network.prefixlen)
+
+
+@STDLIB_REGISTRY.loader(ipaddress.IPv4Interface, version = 1)
+def _load_ipv4_interface_v1(data):
+	address, prefixlen = data
+	return ipaddress.IPv4Interface((address, prefixlen))
+
+
+@STDLIB_REGISTRY.dumper(ipaddress.IPv6Interface, version = 1, flat = True)
+def _dump_ipv6_interface_v1(obj):
+	return (obj.packed, obj.network.prefixlen)
+
+
+@STDLIB_REGISTRY.loader(ipaddress.IPv6Interface, version = 1)
+def _load_ipv6_interface_v1(data):
+	address, prefixlen = data
+	return ipaddress.IPv6Interface((address, prefixlen))
+
+
+@STDLIB_REGISTRY.dumper(pathlib.PurePosixPath, version = 1, flat = True)
+def _dump_pure_posix_path_v1(obj):
+	return str(obj)
+
+
+@STDLIB_REGISTRY.loader(pathlib.PurePosixPath, version = 1)
+def _load_pure_posix_path_v1(data):
+	return pathlib.PurePosixPath(data)
+
+
+@STDLIB_REGISTRY.dumper(pathlib.PureWindowsPath, version = 1, flat = True)
+def _dump_pure_windows_path_v1(obj):
+	return str(obj)
+
+
+@STDLIB_REGISTRY.loader(pathlib.PureWindowsPath, version = 1)
+def _load_pure_windows_path_v1(data):
+	return pathlib.PureWindowsPath(data)
+
+
+@STDLIB_REGISTRY.dumper(pathlib.PosixPath, version = 1, flat = True)
+def _dump_posix_path_v1(obj):
+	return str(obj)
+
+
+@STDLIB_REGISTRY.loader(pathlib.PosixPath, version = 1)
+def _load_posix_path_v1(data):
+	return pathlib.PosixPath(data)
+
+
+@STDLIB_REGISTRY.dumper(pathlib.WindowsPath, version = 1, flat = True)
+def _dump_windows_path_v1(obj):
+	return str(obj)
+
+
+@STDLIB_REGISTRY.loader(pathlib.WindowsPath, version = 1)
+def _load_windows_path_v1(data):
+	# Instantiable only on Windows
+	return pathlib.WindowsPath(data)
+
+
+@STDLIB_REGISTRY.dumper(fractions.Fraction, version = 1, flat = True)
+def _dump_fraction_v1(obj):
+	return (obj.numerator, obj.denominator)
+
+
+@STDLIB_REGISTRY.loader(fractions.Fraction, version = 1)
+def _load_fraction_v1(data):
+	numerator, denominator = data
+	return fractions.Fraction(numerator, denominator)
+
+
+@STDLIB_REGISTRY.dumper(complex, version = 1, flat = True)
+def _dump_complex_v1(obj):
+	return (obj.real, obj.imag)
+
+
+@STDLIB_REGISTRY.loader(complex, version = 1)
+def _load_complex_v1(data):
+	real, imag = data
+	return complex(real, imag)
+
+
+@STDLIB_REGISTRY.dumper(collections.OrderedDict, version = 1)
+def _dump_ordered_dict_v1(obj):
+	# Dicts keep their order in all formats
+	return dict(obj)
+
+
+@STDLIB_REGISTRY.loader(collections.OrderedDict, version = 1)
+def _load_ordered_dict_v1(data):
+	return collections.OrderedDict(data)
+
+
+@STDLIB_REGISTRY.dumper(collections.deque, version = 1)
+def _dump_deque_v1(obj):
+	return (list(obj), obj.maxlen)
+
+
+@STDLIB_REGISTRY.loader(collections.deque, version = 1)
+def _load_deque_v1(data):
+	items, maxlen = data
+	return collections.deque(items, maxlen)
+
+
+@STDLIB_REGISTRY.dumper(collections.Counter, version = 1)
+def _dump_counter_v1(obj):
+	return dict(obj)
+
+
+@STDLIB_REGISTRY.loader(collections.Counter, version = 1)
+def _load_counter_v1(data):
+	return collections.Counter(data)
+
+
+@STDLIB_REGISTRY.dumper(bytearray, version = 1, flat = True)
+def _dump_bytearray_v1(obj):
+	return bytes(obj)
+
+
+@STDLIB_REGISTRY.loader(bytearray, version = 1)
+def _load_bytearray_v1(data):
+	return bytearray(data)
+
+
+@STDLIB_REGISTRY.dumper(range, version = 1, flat = True)
+def _dump_range_v1(obj):
+	return (obj.start, obj.stop, obj.step)
+
+
+@STDLIB_REGISTRY.loader(range, version = 1)
+def _load_range_v1(data):
+	start, stop, step = data
+	return range(start, stop, step)
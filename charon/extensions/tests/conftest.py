@@ -1,5 +1,12 @@
 from decimal import Decimal
 from datetime import datetime, date, time, timedelta
+import collections
+import fractions
+import http
+import ipaddress
+import pathlib
+import uuid
+
 import dateutil.parser
 
 
@@ -91,24 +98,104 @@ def generate_timedelta_testcases():
 		yield str(case), (timedelta, case)
 
 
+def generate_uuid_testcases():
+	cases = [
+		uuid.UUID(e)
+		for e in [ '12345678-1234-5678-1234-567812345678', '00000000-0000-0000-0000-000000000000' ]
+	] + [ uuid.uuid4() ]
+	for case in cases:
+		yield str(case), (uuid.UUID, case)
+
+
+def generate_enum_testcases():
+	for case in [ http.HTTPStatus.OK, http.HTTPStatus.NOT_FOUND ]:
+		yield str(case), (http.HTTPStatus, case)
+
+
+def generate_ipaddress_testcases():
+	cases = [
+		ipaddress.ip_address('192.168.1.1'),
+		ipaddress.ip_address('2001:db8::1'),
+		ipaddress.ip_network('10.0.0.0/8'),
+		ipaddress.ip_network('2001:db8::/32'),
+		ipaddress.ip_interface('192.168.1.1/24'),
+		ipaddress.ip_interface('2001:db8::1/64'),
+	]
+	for case in cases:
+		yield str(case), (type(case), case)
+
+
+def generate_path_testcases():
+	cases = [
+		pathlib.PurePosixPath('/etc/hosts'),
+		pathlib.PurePosixPath('relative/path'),
+		pathlib.PureWindowsPath('C:/Windows/system32'),
+		pathlib.PosixPath('/tmp'),
+	]
+	for case in cases:
+		yield '{}({})'.format(type(case).__name__, case), (type(case), case)
+
+
+def generate_number_testcases():
+	cases = [
+		fractions.Fraction(1, 3),
+		fractions.Fraction(-22, 7),
+		fractions.Fraction(10 ** 30, 3),
+		complex(1.5, -2),
+		complex(0, 0),
+	]
+	for case in cases:
+		yield str(case), (type(case), case)
+
+
+def generate_collection_testcases():
+	cases = [
+		collections.OrderedDict([ ('b', 1), ('a', [2, 3]), (4, 'c') ]),
+		collections.OrderedDict(),
+		collections.deque([ 1, 'a', [2, 3] ]),
+		collections.deque([ 1, 2 ], maxlen = 5),
+		collections.Counter('abracadabra'),
+		bytearray(b'abc'),
+		bytearray(),
+		range(10),
+		range(-5, 20, 3),
+	]
+	for case in cases:
+		yield '{}({})'.format(type(case).__name__, case), (type(case), case)
+
+
+#: Generators of generic test cases of every test module
+GENERIC_TESTCASE_GENERATORS = {
+	'test_standard_registry': [
+		generate_set_testcases,
+		generate_frozenset_testcases,
+		generate_decimal_testcases,
+		generate_datetime_testcases,
+		generate_date_testcases,
+		generate_time_testcases,
+		generate_timedelta_testcases,
+	],
+	'test_stdlib_registry': [
+		generate_uuid_testcases,
+		generate_enum_testcases,
+		generate_ipaddress_testcases,
+		generate_path_testcases,
+		generate_number_testcases,
+		generate_collection_testcases,
+	],
+}
+
+
 def pytest_generate_tests(metafunc):
 	'''
 		Generates tests cases for simple deserialization and serialization,
 		testcases are generated by functions with ```generate_``` prefix
 	'''
 	if metafunc.function.__name__ == 'test_serialization_pipeline':
-		__GENERIC_TESTCASE_GENERATORS__ = [
-			generate_set_testcases,
-			generate_frozenset_testcases,
-			generate_decimal_testcases,
-			generate_datetime_testcases,
-			generate_date_testcases,
-			generate_time_testcases,
-			generate_timedelta_testcases,
-		]
+		module_name = metafunc.module.__name__.rpartition('.')[2]
 
 		testcases = []
-		for generator in __GENERIC_TESTCASE_GENERATORS__:
+		for generator in GENERIC_TESTCASE_GENERATORS[module_name]:
 			testcases += list(generator())
 
 		ids, params = zip(*testcases)
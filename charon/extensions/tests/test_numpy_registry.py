@@ -0,0 +1,127 @@
+import pytest
+
+from charon import Codec
+from charon.testing.metatest import ( # NOQA
+	test_charon_dumper_tests,
+	test_charon_loader_tests,
+	scope_charon_tests
+)
+
+numpy = pytest.importorskip('numpy')
+from charon.extensions.numpy_registry import NUMPY_REGISTRY # pylint: disable=wrong-import-position
+
+
+pytest.fixture(scope = 'module')(scope_charon_tests)
+
+@pytest.fixture(scope = 'module', params = [1, 2])
+def serializer(request):
+	return Codec([ NUMPY_REGISTRY ], format_version = request.param)
+
+
+ARRAYS = [
+	numpy.arange(12.0).reshape(3, 4),
+	numpy.arange(12).reshape(3, 4).T,
+	numpy.arange(20, dtype = 'int32')[::3],
+	numpy.zeros((0, 3)),
+	numpy.array(5),
+	numpy.arange(6, dtype = '>i2'),
+	numpy.array([(1, 2.5), (3, 4.5)], dtype = [('a', '<i4'), ('b', '<f8')]),
+	numpy.array(['ab', 'c']),
+	numpy.array(['2020-01-01T12:00:00.5', 'NaT', '1970-01-01'], dtype = 'M8[ns]'),
+	numpy.array([[1, -2], [3, 86400]], dtype = 'm8[s]').T,
+	numpy.array(7, dtype = 'M8[D]'),
+	numpy.array(2.5),
+]
+
+
+def assert_same_array(loaded, original):
+	assert isinstance(loaded, numpy.ndarray)
+	assert loaded.dtype == original.dtype
+	assert loaded.shape == original.shape
+	# Compares raw bytes, NaT is not equal to itself
+	assert loaded.tobytes() == original.tobytes()
+
+
+@pytest.mark.charon(cls = numpy.ndarray, dumper_test = True, loader_test = True)
+@pytest.mark.parametrize('array', ARRAYS)
+def test_ndarray_inline(serializer, array):
+	assert_same_array(serializer.load(serializer.dump(array)), array)
+
+
+@pytest.mark.charon(cls = numpy.ndarray, dumper_test = True, loader_test = True)
+@pytest.mark.parametrize('array', ARRAYS)
+def test_ndarray_out_of_band(serializer, array):
+	buffers = []
+	serialized = serializer.dump(array, buffer_callback = buffers.append)
+	assert len(buffers) == 1
+	assert_same_array(serializer.load(serialized, buffers = buffers), array)
+
+
+def test_ndarray_out_of_band_zero_copy(serializer):
+	array = numpy.arange(10.0).reshape(2, 5)
+	buffers = []
+	serialized = serializer.dump(array, buffer_callback = buffers.append)
+
+	received = bytearray(buffers[0])
+	loaded = serializer.load(serialized, buffers = [received])
+	received[:8] = numpy.float64(42.0).tobytes()
+	assert loaded[0, 0] == 42.0
+
+	array[0, 1] = -1.0
+	assert numpy.frombuffer(buffers[0], dtype = array.dtype)[1] == -1.0
+
+
+def test_ndarray_inline_writable(serializer):
+	loaded = serializer.load(serializer.dump(numpy.arange(4.0)))
+	loaded[0] = 42.0
+	assert loaded[0] == 42.0
+
+
+@pytest.mark.parametrize('dtype', [
+	{'names': ['a'], 'formats': ['<i4'], 'offsets': [0], 'itemsize': 8},
+	{'names': ['a', 'b'], 'formats': ['<i2', '>f8'], 'offsets': [10, 0], 'itemsize': 16},
+	numpy.dtype([('a', 'u1'), ('b', '<f4')], align = True),
+	[('a', '<i4', (2, 3)), ('b', [('c', 'u1'), ('d', 'M8[ms]')])],
+])
+def test_ndarray_structured_layout(serializer, dtype):
+	array = numpy.zeros(3, dtype = dtype)
+	array.view(numpy.uint8)[:] = numpy.arange(array.nbytes) % 251
+	loaded = serializer.load(serializer.dump(array))
+	assert_same_array(loaded, array)
+	assert loaded.dtype.names == array.dtype.names
+	assert loaded.dtype.itemsize == array.dtype.itemsize
+
+
+def test_ndarray_field_titles(serializer):
+	with pytest.raises(ValueError):
+		serializer.dump(numpy.zeros(2, dtype = [(('title', 'a'), '<i4')]))
+
+
+def test_ndarray_fortran_order(serializer):
+	array = numpy.asfortranarray(numpy.arange(12).reshape(3, 4))
+	loaded = serializer.load(serializer.dump(array))
+	assert loaded.flags.f_contiguous
+	assert_same_array(loaded, array)
+
+
+def test_ndarray_object_dtype(serializer):
+	with pytest.raises(ValueError):
+		serializer.dump(numpy.array([object()]))
+
+	serialized = serializer.dump(numpy.arange(2))
+	serialized['params'][0] = '|O'
+	with pytest.raises(ValueError):
+		serializer.load(serialized)
+
+
+def test_ndarray_invalid_strides(serializer):
+	serialized = serializer.dump(numpy.arange(4))
+	serialized['params'][2] = [800]
+	with pytest.raises(ValueError):
+		serializer.load(serialized)
+
+
+def test_memoryview_not_registered(serializer):
+	# Array data are dumped as part of array params, other memoryviews are not affected by the registry
+	with pytest.raises(ValueError):
+		serializer.dump(memoryview(b'abc'))
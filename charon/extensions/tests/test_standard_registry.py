@@ -1,7 +1,12 @@
+import datetime
+import decimal
+import subprocess
+import sys
+
 import pytest
 
 from charon import Codec
-from charon.extensions import STANDARD_REGISTRY
+from charon.extensions import DECIMAL_V2_REGISTRY, STANDARD_REGISTRY
 from charon.testing.generic import test_serialization_pipeline # NOQA
 from charon.testing.metatest import ( # NOQA
 	test_charon_dumper_tests,
@@ -14,4 +19,134 @@ pytest.fixture(scope = 'module')(scope_charon_tests)
 
 @pytest.fixture(scope = 'module')
 def serializer():
-	return Codec([ STANDARD_REGISTRY ])
+	return Codec([ STANDARD_REGISTRY ], check_flat = True)
+
+
+def load_v1(serializer, dtype, params):
+	return serializer.load({'!meta': {'dtype': dtype, 'version': 1}, 'params': params})
+
+
+@pytest.mark.parametrize('value', [
+	datetime.datetime(2017, 7, 19, 8, 24, 50),
+	datetime.datetime(2017, 7, 19, 8, 24, 50, 141400),
+	datetime.datetime(1970, 12, 25, 1, 0, 24, tzinfo = datetime.timezone.utc),
+	datetime.datetime(2017, 7, 19, 8, 24, 50, 1, tzinfo = datetime.timezone(datetime.timedelta(hours = -6))),
+	datetime.datetime(999, 1, 2, 3, 4, 5, tzinfo = datetime.timezone(datetime.timedelta(hours = 5, minutes = 30))),
+])
+def test_datetime_v1_iso(serializer, value):
+	loaded = load_v1(serializer, 'datetime', value.isoformat())
+	assert loaded == value
+	assert loaded.utcoffset() == value.utcoffset()
+
+
+@pytest.mark.parametrize('value', [datetime.date(2017, 7, 19), datetime.date(5, 1, 31)])
+def test_date_v1_iso(serializer, value):
+	assert load_v1(serializer, 'date', value.isoformat()) == value
+
+
+@pytest.mark.parametrize('value', [datetime.time(8, 24, 50), datetime.time(0, 0, 0, 141400)])
+def test_time_v1_iso(serializer, value):
+	assert load_v1(serializer, 'time', value.isoformat()) == value
+
+
+def test_iso_v1_dateutil_fallback(serializer):
+	assert load_v1(serializer, 'datetime', '2017-07-19 08:24:50') == datetime.datetime(2017, 7, 19, 8, 24, 50)
+	assert load_v1(serializer, 'date', 'July 19 2017') == datetime.date(2017, 7, 19)
+	assert load_v1(serializer, 'time', '08:24:50+02:00') == datetime.time(8, 24, 50)
+	with pytest.raises(ValueError):
+		load_v1(serializer, 'date', '2017-13-01')
+
+
+def test_dateutil_not_imported():
+	code = 'import sys, charon.extensions; assert "dateutil" not in sys.modules'
+	subprocess.check_call([sys.executable, '-c', code])
+
+
+def test_datetime_v2_microseconds(serializer):
+	value = datetime.datetime(2017, 7, 19, 8, 24, 50, 141400, tzinfo = datetime.timezone.utc)
+	params = [int(value.timestamp()), 141400000, serializer.dump(datetime.timedelta(0))]
+	assert serializer.load({'!meta': {'dtype': 'datetime', 'version': 2}, 'params': params}) == value
+
+
+@pytest.mark.parametrize('value, params', [
+	(datetime.datetime(1970, 1, 1), 0),
+	(datetime.datetime(2017, 7, 19, 8, 24, 50, 141400), 1500452690141400000),
+	(datetime.datetime(1900, 1, 1, 0, 0, 0, 1), -2208988799999999000),
+	(datetime.datetime(1970, 1, 1, 2, tzinfo = datetime.timezone(datetime.timedelta(hours = 2))), [0, 7200]),
+	(datetime.datetime(1970, 1, 1, tzinfo = datetime.timezone(datetime.timedelta(hours = -5, minutes = -30))), [19800000000000, -19800]),
+	(datetime.date(1970, 1, 1), 719163),
+	(datetime.date(1, 1, 1), 1),
+	(datetime.time(0, 0), 0),
+	(datetime.time(8, 24, 50, 141400), 30290141400000),
+	(datetime.time(23, 59, 59, 999999, tzinfo = datetime.timezone.utc), [86399999999000, 0]),
+	(datetime.timedelta(days = -1, microseconds = 5), -86399999995),
+	(datetime.timedelta(days = 3, seconds = 4000, microseconds = 123), 263200000123),
+])
+def test_datetime_types_v3(serializer, value, params):
+	dumped = serializer.dump(value)
+	assert dumped['!meta']['version'] == 3
+	assert dumped['params'] == params
+	loaded = serializer.load(dumped)
+	assert loaded == value
+	assert type(loaded) is type(value)
+	if isinstance(value, (datetime.datetime, datetime.time)):
+		assert loaded.utcoffset() == value.utcoffset()
+
+
+@pytest.mark.parametrize('value, params', [
+	(datetime.datetime.max, [253402300799, 999999000, None]),
+	(datetime.datetime.min, [-62135596800, 0, None]),
+	(datetime.datetime(1677, 9, 21), [-9223372800, 0, None]),
+	(datetime.datetime(2262, 4, 11), 9223286400000000000),
+	(datetime.datetime.max.replace(tzinfo = datetime.timezone(datetime.timedelta(hours = -23))), [253402383599, 999999000, -82800]),
+	(datetime.datetime.min.replace(tzinfo = datetime.timezone(datetime.timedelta(hours = 14))), [-62135647200, 0, 50400]),
+	(datetime.datetime.max.replace(tzinfo = datetime.timezone.utc), [253402300799, 999999000, 0]),
+	(datetime.timedelta.max, [86399999999999, 999999]),
+	(datetime.timedelta.min, [-86399999913600, 0]),
+	(datetime.timedelta(microseconds = 2 ** 63 - 1), 2 ** 63 - 1),
+])
+@pytest.mark.parametrize('wire_format', [None, 'msgpack', 'json'])
+def test_datetime_types_v3_out_of_int64(serializer, value, params, wire_format):
+	if wire_format == 'msgpack':
+		pytest.importorskip('msgpack')
+	dumped = serializer.dump(value)
+	assert dumped['params'] == params
+	if wire_format is None:
+		loaded = serializer.load(dumped)
+	else:
+		loaded = serializer.loads(serializer.dumps(value, wire_format), wire_format)
+	assert loaded == value
+	assert type(loaded) is type(value)
+	if isinstance(value, datetime.datetime):
+		assert loaded.utcoffset() == value.utcoffset()
+
+
+@pytest.mark.parametrize('text, params', [
+	('12345.6789', [123456789, -4]),
+	('-12.50', [-1250, -2]),
+	('0.000', [0, -3]),
+	('42', 42),
+	('1E+5', [1, 5]),
+	('-1.5E-10', [-15, -11]),
+	('-922337203685477580.8', [-9223372036854775808, -1]),
+	('123456789012345678901234567890.123456789', '123456789012345678901234567890.123456789'),
+	('-0.00', '-0.00'),
+	('-0E+2', '-0E+2'),
+	('Infinity', 'Infinity'),
+	('-Infinity', '-Infinity'),
+	('NaN', 'NaN'),
+	('-sNaN12', '-sNaN12'),
+])
+def test_decimal_v2(serializer, text, params):
+	codec = Codec([STANDARD_REGISTRY, DECIMAL_V2_REGISTRY], check_flat = True)
+	dumped = codec.dump(decimal.Decimal(text))
+	assert dumped['!meta']['version'] == 2
+	assert dumped['params'] == params
+	assert str(codec.load(dumped)) == text
+	# The loader is in the standard registry
+	assert str(serializer.load(dumped)) == text
+
+
+def test_decimal_v1_default(serializer):
+	dumped = serializer.dump(decimal.Decimal('-12.50'))
+	assert dumped == {'!meta': {'dtype': 'Decimal', 'version': 1}, 'params': '-12.50'}
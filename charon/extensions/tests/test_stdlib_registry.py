@@ -0,0 +1,65 @@
+import collections
+import enum
+import http
+import os
+import pathlib
+
+import pytest
+
+from charon import Codec, CodecRegistry
+from charon.extensions import STDLIB_REGISTRY
+from charon.extensions.stdlib_registry import register_enum
+from charon.testing.generic import test_serialization_pipeline # NOQA
+from charon.testing.metatest import ( # NOQA
+	test_charon_dumper_tests,
+	test_charon_loader_tests,
+	scope_charon_tests
+)
+
+
+ENUM_REGISTRY = CodecRegistry()
+register_enum(ENUM_REGISTRY, http.HTTPStatus)
+
+
+pytest.fixture(scope = 'module')(scope_charon_tests)
+
+@pytest.fixture(scope = 'module', params = [1, 2])
+def serializer(request):
+	return Codec([ STDLIB_REGISTRY, ENUM_REGISTRY ], format_version = request.param, check_flat = True)
+
+
+@pytest.mark.skipif(os.name != 'nt', reason = 'WindowsPath can be created only on Windows')
+@pytest.mark.charon(cls = pathlib.WindowsPath, dumper_test = True, loader_test = True)
+def test_windows_path(serializer):
+	path = pathlib.WindowsPath('C:/Windows')
+	assert serializer.load(serializer.dump(path)) == path
+
+
+def test_ordered_dict_order(serializer):
+	original = collections.OrderedDict([ ('b', 1), ((1, 2), 2), ('a', 3) ])
+	loaded = serializer.load(serializer.dump(original))
+	assert list(loaded.items()) == list(original.items())
+
+
+def test_counter(serializer):
+	original = collections.Counter('abracadabra')
+	loaded = serializer.load(serializer.dump(original))
+	assert isinstance(loaded, collections.Counter)
+	assert loaded == original
+
+
+def test_enum_tuple_value(serializer):
+	class Pair(enum.Enum):
+		A = (1, 'a')
+
+	registry = CodecRegistry()
+	register_enum(registry, Pair, version = 2)
+	codec = Codec([ registry ])
+	dumped = codec.dump(Pair.A)
+	assert dumped['!meta'] == { 'dtype': 'Pair', 'version': 2 }
+	assert codec.load(dumped) is Pair.A
+
+
+def test_register_enum_not_enum():
+	with pytest.raises(TypeError):
+		register_enum(CodecRegistry(), int)
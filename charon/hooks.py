@@ -0,0 +1,91 @@
+'''
+Hooks called around dumpers and loaders of a codec, see `Codec.add_hooks`. Like profiling, hooks are applied
+by wrapping indexed dumpers and loaders, so a codec without hooks calls the registered functions directly.
+'''
+from typing import Any, Callable # NOQA
+
+import itertools
+
+
+
+class Hooks:
+	'''
+	Set of hook functions sharing one sampling counter. With `sample` N, hooks are called for every N-th call
+	of a dumper or a loader (counted over all types), pre and post hooks of one call are always called both.
+
+	Hooks are called as:
+	  - `pre_dump(dtype, version, obj)`
+	  - `post_dump(dtype, version, obj, params)`
+	  - `pre_load(dtype, version, params)`
+	  - `post_load(dtype, version, params, obj)`
+	  - `on_error(event, dtype, version, value, exception)` where `event` is 'dump' or 'load'
+	    and `value` the object or the params, the exception is re-raised afterwards
+	'''
+
+	def __init__(
+		self,
+		pre_dump: Callable[..., Any] = None,
+		post_dump: Callable[..., Any] = None,
+		pre_load: Callable[..., Any] = None,
+		post_load: Callable[..., Any] = None,
+		on_error: Callable[..., Any] = None,
+		sample: int = 1,
+	) -> None:
+		if not isinstance(sample, int) or sample < 1:
+			raise ValueError('Hook sample rate has to be a positive integer: {sample!r}'.format(sample = sample))
+
+		self._pre_dump = pre_dump
+		self._post_dump = post_dump
+		self._pre_load = pre_load
+		self._post_load = post_load
+		self._on_error = on_error
+		self._sample = sample
+		self._calls = itertools.count()
+
+
+	def wrap_dumper(self, dtype: str, version: int, dumper: Callable[[Any], Any]) -> Callable[[Any], Any]:
+		pre, post, on_error = self._pre_dump, self._post_dump, self._on_error
+		if pre is None and post is None and on_error is None:
+			return dumper
+		calls, sample = self._calls, self._sample
+
+		def hooked_dumper(obj: Any) -> Any:
+			if sample != 1 and next(calls) % sample:
+				return dumper(obj)
+			if pre is not None:
+				pre(dtype, version, obj)
+			try:
+				params = dumper(obj)
+			except Exception as e:
+				if on_error is not None:
+					on_error('dump', dtype, version, obj, e)
+				raise
+			if post is not None:
+				post(dtype, version, obj, params)
+			return params
+
+		return hooked_dumper
+
+
+	def wrap_loader(self, dtype: str, version: int, loader: Callable[[Any], Any]) -> Callable[[Any], Any]:
+		pre, post, on_error = self._pre_load, self._post_load, self._on_error
+		if pre is None and post is None and on_error is None:
+			return loader
+		calls, sample = self._calls, self._sample
+
+		def hooked_loader(params: Any) -> Any:
+			if sample != 1 and next(calls) % sample:
+				return loader(params)
+			if pre is not None:
+				pre(dtype, version, params)
+			try:
+				obj = loader(params)
+			except Exception as e:
+				if on_error is not None:
+					on_error('load', dtype, version, params, e)
+				raise
+			if post is not None:
+				post(dtype, version, params, obj)
+			return obj
+
+		return hooked_loader
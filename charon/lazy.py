@@ -0,0 +1,150 @@
+'''
+Lazy loading of serialized data. Lists and dicts are restored as `LazyList` and `LazyDict` containers,
+which load their items on the first access and cache them, so only the parts of the data which are
+actually used are loaded.
+'''
+from typing import Any, Callable, Dict, Iterator, List # NOQA
+
+import collections.abc
+
+import charon # NOQA
+
+
+
+_PRIMITIVE_TYPES = frozenset({int, float, bool, str, bytes, type(None)})
+_SEQUENCE_TYPES = frozenset({list, tuple})
+
+#: Placeholder of items which were not loaded yet
+_NOT_LOADED = object()
+
+
+
+class LazyList(collections.abc.Sequence):
+	'''
+	Read-only sequence loading its items on the first access
+	'''
+
+	def __init__(self, load: Callable[[Any], Any], items: List[Any]) -> None:
+		self._load = load
+		self._items = items
+		self._loaded = [_NOT_LOADED] * len(items)
+
+
+	def __getitem__(self, index: Any) -> Any:
+		if isinstance(index, slice):
+			return [self[i] for i in range(*index.indices(len(self._items)))]
+
+		value = self._loaded[index]
+		if value is _NOT_LOADED:
+			value = self._load(self._items[index])
+			self._loaded[index] = value
+		return value
+
+
+	def __len__(self) -> int:
+		return len(self._items)
+
+
+	def __eq__(self, other: Any) -> bool:
+		if not isinstance(other, (list, tuple, LazyList)):
+			return NotImplemented
+		return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+
+	def __repr__(self) -> str:
+		return '<LazyList of {count} items>'.format(count = len(self._items))
+
+
+
+class LazyDict(collections.abc.Mapping):
+	'''
+	Read-only mapping with keys loaded eagerly and values loaded on the first access
+	'''
+
+	def __init__(self, load: Callable[[Any], Any], items: Dict[Any, Any]) -> None:
+		self._load = load
+		self._items = items
+		self._loaded = {} # type: Dict[Any, Any]
+
+
+	def __getitem__(self, key: Any) -> Any:
+		value = self._loaded.get(key, _NOT_LOADED)
+		if value is _NOT_LOADED:
+			value = self._load(self._items[key])
+			self._loaded[key] = value
+		return value
+
+
+	def __iter__(self) -> Iterator[Any]:
+		return iter(self._items)
+
+
+	def __len__(self) -> int:
+		return len(self._items)
+
+
+	def __contains__(self, key: Any) -> bool:
+		return key in self._items
+
+
+	def __repr__(self) -> str:
+		return '<LazyDict of {count} items>'.format(count = len(self._items))
+
+
+
+class LazyLoader:
+	'''
+	Loads data like `Codec.load`, but lists and dicts holding anything else than primitives are returned
+	as lazy containers. Params of registered objects are passed to loaders as lazy containers too,
+	so an object can be created without loading the objects nested in it. Keys of dicts are loaded eagerly.
+	'''
+
+	def __init__(self, codec: 'charon.Codec') -> None:
+		# pylint: disable=protected-access
+		self._load_eager = codec._load_engine()
+		self._get_loader = codec._get_loader
+		self._strict = codec._format_version == 1
+
+
+	def __call__(self, data: Any) -> Any:
+		dtype = type(data) # NOQA
+
+		if dtype in _PRIMITIVE_TYPES:
+			return data
+		elif dtype in _SEQUENCE_TYPES:
+			if _PRIMITIVE_TYPES.issuperset(map(type, data)):
+				return list(data)
+			return LazyList(self, data)
+		elif dtype is dict:
+			if '!meta' not in data:
+				if self._strict:
+					raise ValueError('Invalid dict structure')
+				if _PRIMITIVE_TYPES.issuperset(map(type, data.values())):
+					return dict(data)
+				return LazyDict(self, data)
+
+			metadata = data['!meta']
+			if metadata == '!dict':
+				items = self._fill({}, [item['key'] for item in data['values']], [item['value'] for item in data['values']])
+			elif metadata == '!kv':
+				items = self._fill({}, data['keys'], data['values'])
+			elif metadata.__class__ is str:
+				# Back-references and buffers are loaded (and rejected) by the eager engine
+				return self._load_eager(data)
+			else:
+				return self._get_loader(metadata)(self(data['params']))
+
+			if _PRIMITIVE_TYPES.issuperset(map(type, items.values())):
+				return items
+			return LazyDict(self, items)
+		else:
+			raise ValueError('Unsupported deserialization type: {dtype}'.format(dtype = dtype))
+
+
+	def _fill(self, output: Dict[Any, Any], keys: List[Any], values: List[Any]) -> Dict[Any, Any]:
+		for key, value in zip(keys, values):
+			key = self._load_eager(key)
+			if isinstance(key, list):
+				key = tuple(key)
+			output[key] = value
+		return output
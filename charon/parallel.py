@@ -0,0 +1,140 @@
+'''
+Parallel batch dumping and loading in a process pool. Codecs are not picklable (registries hold plain functions
+and partials), so workers build their own codec from importable registry specs like `'myapp.codecs:REGISTRY'`
+and keep it for all following chunks.
+'''
+from typing import Any, Dict, Iterable, Iterator, List, Tuple # NOQA
+
+import collections
+import concurrent.futures
+import importlib
+import itertools
+
+from . import codec as codec_module
+from . import codec_registry
+
+
+
+#: Codecs built by the worker processes, keyed by registry specs and codec options
+_WORKER_CODECS = {} # type: Dict[Tuple[Any, ...], codec_module.Codec]
+
+
+def import_registry(spec: str) -> codec_registry.CodecRegistry:
+	'''
+	Returns registry given by `'module:ATTRIBUTE'` spec
+	'''
+	module_name, separator, attribute = spec.partition(':')
+	if not separator or not module_name or not attribute:
+		raise ValueError('Invalid registry spec, expected module:attribute: {spec!r}'.format(spec = spec))
+
+	registry = getattr(importlib.import_module(module_name), attribute)
+	if not isinstance(registry, codec_registry.CodecRegistry):
+		raise TypeError('Registry spec {spec!r} does not refer to a CodecRegistry'.format(spec = spec))
+	return registry
+
+
+def _run_chunk(key: Tuple[Any, ...], operation: str, chunk: List[Any], wire_format: str) -> List[Any]:
+	'''
+	Runs in the worker processes, dumps or loads one chunk by the codec of the worker
+	'''
+	codec = _WORKER_CODECS.get(key)
+	if codec is None:
+		specs, options = key
+		codec = codec_module.Codec([import_registry(spec) for spec in specs], **dict(options))
+		_WORKER_CODECS[key] = codec
+
+	if operation == 'dump':
+		if wire_format is None:
+			return codec.dump_many(chunk)
+		return [codec.dumps(obj, wire_format) for obj in chunk]
+	if wire_format is None:
+		return codec.load_many(chunk)
+	return [codec.loads(data, wire_format) for data in chunk]
+
+
+
+class ParallelCodec:
+	'''
+	Dumps and loads batches of objects in parallel by codecs built in a `ProcessPoolExecutor`.
+	Items are split into chunks of `chunk_size`, every chunk is processed by one worker, results come back
+	in the order of the items. At most `max_pending` chunks (twice the number of workers by default) are
+	submitted at once, so input iterables are consumed gradually and can be longer than would fit into memory.
+
+	`registries` are `'module:ATTRIBUTE'` specs of the registries, other keyword arguments are passed to `Codec`.
+	An own `executor` can be given, it is not shut down by `close`.
+	'''
+
+	def __init__(
+		self,
+		registries: List[str],
+		max_workers: int = None,
+		chunk_size: int = 1000,
+		max_pending: int = None,
+		executor: concurrent.futures.Executor = None,
+		**codec_options: Any
+	) -> None:
+		if chunk_size < 1:
+			raise ValueError('Chunk size has to be a positive integer: {size!r}'.format(size = chunk_size))
+
+		# Build the codec here too, so invalid specs and options fail early
+		codec_module.Codec([import_registry(spec) for spec in registries], **codec_options)
+
+		self._key = (tuple(registries), tuple(sorted(codec_options.items())))
+		self._chunk_size = chunk_size
+		self._own_executor = executor is None
+		self._executor = concurrent.futures.ProcessPoolExecutor(max_workers) if executor is None else executor
+		if max_pending is None:
+			workers = getattr(self._executor, '_max_workers', None) or 1
+			max_pending = 2 * workers
+		self._max_pending = max_pending
+
+
+	def __enter__(self) -> 'ParallelCodec':
+		return self
+
+
+	def __exit__(self, *args: Any) -> None:
+		self.close()
+
+
+	def close(self) -> None:
+		if self._own_executor:
+			self._executor.shutdown()
+
+
+	def _map(self, operation: str, items: Iterable[Any], wire_format: str) -> Iterator[Any]:
+		iterator = iter(items)
+		pending = collections.deque() # type: collections.deque
+		while True:
+			while len(pending) < self._max_pending:
+				chunk = list(itertools.islice(iterator, self._chunk_size))
+				if not chunk:
+					break
+				pending.append(self._executor.submit(_run_chunk, self._key, operation, chunk, wire_format))
+			if not pending:
+				return
+			yield from pending.popleft().result()
+
+
+	def dump_iter(self, objs: Iterable[Any], wire_format: str = None) -> Iterator[Any]:
+		'''
+		Yields objects dumped like by `Codec.dump_many` in the order of `objs`.
+		With `wire_format`, objects are dumped to bytes by `Codec.dumps` instead, which are cheaper to pass
+		from the workers than trees of primitives.
+		'''
+		return self._map('dump', objs, wire_format)
+
+
+	def load_iter(self, payloads: Iterable[Any], wire_format: str = None) -> Iterator[Any]:
+		'''
+		Yields payloads loaded like by `Codec.load_many` (or by `Codec.loads` with `wire_format`) in their order
+		'''
+		return self._map('load', payloads, wire_format)
+
+
+	def dump_many(self, objs: Iterable[Any], wire_format: str = None) -> List[Any]:
+		return list(self.dump_iter(objs, wire_format))
+
+
+	def load_many(self, payloads: Iterable[Any], wire_format: str = None) -> List[Any]:
+		return list(self.load_iter(payloads, wire_format))
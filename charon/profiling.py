@@ -0,0 +1,127 @@
+'''
+Per type counters of codecs created with `profile = True`. Dumpers and loaders are wrapped by counting
+wrappers when the dispatch index of the codec is built, so codecs without profiling have no overhead at all.
+'''
+from typing import Any, Callable, Dict, List, Tuple # NOQA
+
+import time
+
+
+
+class TypeStats:
+	'''
+	Counters of one (dtype, version) pair. Times are cumulative seconds spent in the dumper / loader itself,
+	without objects nested in its params. Dumped bytes are counted only by `Codec.dumps`,
+	where they include the whole encoded object with nested objects.
+	'''
+	__slots__ = ('dump_calls', 'dump_seconds', 'dump_bytes', 'load_calls', 'load_seconds')
+
+	def __init__(self) -> None:
+		self.dump_calls = 0
+		self.dump_seconds = 0.0
+		self.dump_bytes = 0
+		self.load_calls = 0
+		self.load_seconds = 0.0
+
+
+	def as_dict(self) -> Dict[str, Any]:
+		return {name: getattr(self, name) for name in self.__slots__}
+
+
+
+#: Prometheus metric name suffixes, help texts and TypeStats attributes
+_METRICS = (
+	('dump_calls_total', 'Number of dumper calls', 'dump_calls'),
+	('dump_seconds_total', 'Cumulative time spent in dumpers', 'dump_seconds'),
+	('dump_bytes_total', 'Cumulative size of objects encoded by Codec.dumps', 'dump_bytes'),
+	('load_calls_total', 'Number of loader calls', 'load_calls'),
+	('load_seconds_total', 'Cumulative time spent in loaders', 'load_seconds'),
+)
+
+
+def _escape_label(value: str) -> str:
+	return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+
+class CodecProfile:
+	'''
+	Collects `TypeStats` per (dtype, version) pair
+	'''
+
+	def __init__(self) -> None:
+		self._stats = {} # type: Dict[Tuple[str, int], TypeStats]
+
+
+	def stats(self, dtype: str, version: int) -> TypeStats:
+		stats = self._stats.get((dtype, version))
+		if stats is None:
+			stats = self._stats[(dtype, version)] = TypeStats()
+		return stats
+
+
+	def wrap_dumper(self, dtype: str, version: int, dumper: Callable[[Any], Any]) -> Callable[[Any], Any]:
+		stats = self.stats(dtype, version)
+		clock = time.perf_counter
+
+		def profiled_dumper(obj: Any) -> Any:
+			start = clock()
+			params = dumper(obj)
+			stats.dump_seconds += clock() - start
+			stats.dump_calls += 1
+			return params
+
+		return profiled_dumper
+
+
+	def wrap_loader(self, dtype: str, version: int, loader: Callable[[Any], Any]) -> Callable[[Any], Any]:
+		stats = self.stats(dtype, version)
+		clock = time.perf_counter
+
+		def profiled_loader(params: Any) -> Any:
+			start = clock()
+			obj = loader(params)
+			stats.load_seconds += clock() - start
+			stats.load_calls += 1
+			return obj
+
+		return profiled_loader
+
+
+	def reset(self) -> None:
+		'''
+		Zeroes all counters, wrapped dumpers and loaders keep counting into the same `TypeStats`
+		'''
+		for stats in self._stats.values():
+			stats.__init__()
+
+
+	def as_dict(self) -> Dict[str, Dict[int, Dict[str, Any]]]:
+		'''
+		Returns counters as `{dtype: {version: {'dump_calls': ..., ...}}}`, types which were never used are omitted
+		'''
+		output = {} # type: Dict[str, Dict[int, Dict[str, Any]]]
+		for (dtype, version), stats in sorted(self._stats.items()):
+			if stats.dump_calls or stats.load_calls:
+				output.setdefault(dtype, {})[version] = stats.as_dict()
+		return output
+
+
+	def as_prometheus(self, prefix: str = 'charon') -> str:
+		'''
+		Returns counters in the Prometheus text exposition format, labeled by dtype and version
+		'''
+		used = [(key, stats) for key, stats in sorted(self._stats.items()) if stats.dump_calls or stats.load_calls]
+		lines = [] # type: List[str]
+		for suffix, description, attribute in _METRICS:
+			name = '{prefix}_{suffix}'.format(prefix = prefix, suffix = suffix)
+			lines.append('# HELP {name} {description}'.format(name = name, description = description))
+			lines.append('# TYPE {name} counter'.format(name = name))
+			for (dtype, version), stats in used:
+				lines.append('{name}{{dtype="{dtype}",version="{version}"}} {value}'.format(
+					name = name,
+					dtype = _escape_label(dtype),
+					version = version,
+					value = getattr(stats, attribute),
+				))
+		return '\n'.join(lines) + '\n'
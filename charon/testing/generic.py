@@ -17,5 +17,9 @@ def test_serialization_pipeline(serializer: 'charon.Codec', cls, original_obj):
 	assert isinstance(loaded, cls)
 	if '__dict__' in dir(loaded):
 		assert vars(loaded) == vars(original_obj)
+	elif '__slots__' in dir(loaded) and type(loaded).__eq__ is object.__eq__:
+		# Classes with __slots__ and without own equality are compared attribute by attribute
+		names = charon.codegen.slot_names(type(loaded))
+		assert [getattr(loaded, name, None) for name in names] == [getattr(original_obj, name, None) for name in names]
 	else:
 		assert loaded == original_obj
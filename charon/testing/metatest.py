@@ -69,7 +69,7 @@ def test_charon_dumper_tests(scope_charon_tests, serializer: 'charon.Codec'):
 		else:
 			continue
 
-		serialization_tests.add(cls.__name__)
+		serialization_tests.update((cls.__name__, charon.codec_registry.qualified_name(cls)))
 
 	all_serializable = set() # type: Set[str]
 	for registry in serializer._registries: # pylint: disable=protected-access
@@ -96,7 +96,7 @@ def test_charon_loader_tests(scope_charon_tests, serializer: 'charon.Codec'):
 		else:
 			continue
 
-		deserialization_tests.add(cls.__name__)
+		deserialization_tests.update((cls.__name__, charon.codec_registry.qualified_name(cls)))
 
 	all_deserializable = set() # type: Set[str]
 	for registry in serializer._registries: # pylint: disable=protected-access
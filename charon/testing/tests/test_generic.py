@@ -23,3 +23,24 @@ def test_generic_pipeline_test_invalid(test_codec, cls, obj):
 ])
 def test_generic_pipeline_test_valid(test_codec, cls, obj):
 	charon.testing.generic.test_serialization_pipeline(test_codec, cls, obj)
+
+
+class SlottedClass:
+	__slots__ = ('a', 'b')
+
+	def __init__(self, a, b):
+		self.a = a
+		self.b = b
+
+
+def test_generic_pipeline_test_slots():
+	registry = charon.CodecRegistry()
+	registry.register_dataclass(SlottedClass, version = 1)
+	codec = charon.Codec([registry])
+	charon.testing.generic.test_serialization_pipeline(codec, SlottedClass, SlottedClass(1, [2]))
+
+	registry = charon.CodecRegistry()
+	registry.dumper(SlottedClass, version = 1)(lambda obj: [obj.a, obj.b])
+	registry.loader(SlottedClass, version = 1)(lambda params: SlottedClass(params[1], params[0]))
+	with pytest.raises(AssertionError):
+		charon.testing.generic.test_serialization_pipeline(charon.Codec([registry]), SlottedClass, SlottedClass(1, 2))
@@ -1,6 +1,11 @@
+import asyncio
+import sys
+import zlib
+
 import pytest
 
 import charon
+from charon.codec import FORMAT_VERSIONS, type_id
 
 
 
@@ -24,7 +29,7 @@ class EmbeddedDummyClass:
 
 
 @pytest.fixture(scope = 'module')
-def test_codec():
+def test_registry():
 	# pylint: disable=unused-variable
 	test_registry = charon.CodecRegistry()
 
@@ -61,7 +66,17 @@ def test_codec():
 		return DummyClass(None)
 
 
-	return charon.Codec([test_registry])
+	return test_registry
+
+
+@pytest.fixture(scope = 'module', params = [False, True], ids = ['recursive', 'iterative'])
+def test_codec(request, test_registry):
+	return charon.Codec([test_registry], iterative = request.param)
+
+
+@pytest.fixture(scope = 'module', params = [False, True], ids = ['recursive', 'iterative'])
+def test_codec_v2(request, test_registry):
+	return charon.Codec([test_registry], iterative = request.param, format_version = 2)
 
 
 @pytest.fixture(scope = 'module', params = [
@@ -206,3 +221,738 @@ def test_codec_load_wrong_data_type(test_codec):
 	with pytest.raises(ValueError) as e:
 		test_codec.load(EmbeddedDummyClass)
 	assert str(e.value) == "Unsupported deserialization type: <class 'type'>"
+
+
+def test_codec_dispatch_index_invalidation():
+	# pylint: disable=unused-variable
+	registry = charon.CodecRegistry()
+	codec = charon.Codec([registry])
+
+	with pytest.raises(ValueError):
+		codec.dump(DummyClass2())
+
+	@registry.dumper(DummyClass2, version = 1)
+	def _dump_dummy_class2_v1(_):
+		return 1
+
+	@registry.loader(DummyClass2, version = 1)
+	def _load_dummy_class2_v1(_):
+		return DummyClass2()
+
+	assert codec.dump(DummyClass2()) == {'!meta': {'dtype': 'DummyClass2', 'version': 1}, 'params': 1}
+
+	@registry.dumper(DummyClass2, version = 2)
+	def _dump_dummy_class2_v2(_):
+		return 2
+
+	assert codec.dump(DummyClass2()) == {'!meta': {'dtype': 'DummyClass2', 'version': 2}, 'params': 2}
+	assert isinstance(codec.load({'!meta': {'dtype': 'DummyClass2', 'version': 1}, 'params': 1}), DummyClass2)
+
+
+def test_codec_dispatch_registry_priority():
+	# pylint: disable=unused-variable
+	first = charon.CodecRegistry()
+	second = charon.CodecRegistry()
+
+	@first.dumper(DummyClass, version = 3)
+	def _dump_first(_):
+		return 'first'
+
+	@first.loader(DummyClass, version = 1)
+	def _load_first(_):
+		return DummyClass('first')
+
+	@second.dumper(DummyClass, version = 1)
+	def _dump_second(_):
+		return 'second'
+
+	@second.loader(DummyClass, version = 1)
+	def _load_second(_):
+		return DummyClass('second')
+
+	codec = charon.Codec([first, second])
+	assert codec.dump(DummyClass(1)) == {'!meta': {'dtype': 'DummyClass', 'version': 1}, 'params': 'second'}
+	assert codec.load({'!meta': {'dtype': 'DummyClass', 'version': 1}, 'params': None}).version == 'second'
+
+
+def test_codec_load_invalid_version_type(test_codec):
+	with pytest.raises(ValueError) as e:
+		test_codec.load({'params': 1, '!meta': {'version': 4.0, 'dtype': 'DummyClass'}})
+	assert str(e.value) == 'Invalid version type: float version: 4.0'
+
+
+def test_codec_dump_many(test_codec):
+	objs = [DummyClass(1), 4, 'aa', {1: 2}, (1, 2), EmbeddedDummyClass(), DummyClass(2)]
+	assert test_codec.dump_many(objs) == [test_codec.dump(obj) for obj in objs]
+	assert test_codec.dump_many(iter([])) == []
+
+
+def test_codec_load_many(test_codec):
+	payloads = [
+		{'params': 1, '!meta': {'version': 4, 'dtype': 'DummyClass'}},
+		4,
+		[1, 2],
+		{'!meta': '!dict', 'values': [{'key': 1, 'value': 2}]},
+	]
+	loaded = test_codec.load_many(iter(payloads))
+	assert loaded[0].version == 2
+	assert loaded[1:] == [4, [1, 2], {1: 2}]
+
+	with pytest.raises(KeyError):
+		test_codec.load_many([{'params': 1, '!meta': {'version': 2, 'dtype': 'DummyClass'}}])
+
+
+def test_codec_iterative_deep_nesting():
+	codec = charon.Codec(iterative = True)
+
+	data = [] # type: list
+	node = data
+	for _ in range(10 * sys.getrecursionlimit()):
+		child = [] # type: list
+		node.append({'child': child})
+		node = child
+
+	loaded = codec.load(codec.dump(data))
+	depth = 0
+	while loaded:
+		loaded = loaded[0]['child']
+		depth += 1
+	assert depth == 10 * sys.getrecursionlimit()
+
+
+def test_codec_invalid_format_version():
+	with pytest.raises(ValueError) as e:
+		charon.Codec(format_version = 3)
+	assert str(e.value) == 'Unsupported format version: 3'
+
+
+def test_codec_v2_dump_dict(test_codec_v2):
+	assert test_codec_v2.dump({'a': 1, 'b': {'c': (1, 2)}}) == {'a': 1, 'b': {'c': [1, 2]}}
+	assert test_codec_v2.dump({}) == {}
+	assert test_codec_v2.dump({1: 'a', (1, 2): {'b': 2}}) == {
+		'!meta': '!kv',
+		'keys': [1, [1, 2]],
+		'values': ['a', {'b': 2}],
+	}
+	assert test_codec_v2.dump({'!meta': 'a'}) == {'!meta': '!kv', 'keys': ['!meta'], 'values': ['a']}
+
+
+def test_codec_v2_dump_dummy_class(test_codec_v2):
+	assert test_codec_v2.dump(DummyClass(1)) == {'!meta': ('DummyClass', 4), 'params': 2}
+	assert test_codec_v2.dump({DummyClass(1): [DummyClass(1)]}) == {
+		'!meta': '!kv',
+		'keys': [{'!meta': ('DummyClass', 4), 'params': 2}],
+		'values': [[{'!meta': ('DummyClass', 4), 'params': 2}]],
+	}
+
+
+def test_codec_v2_load(test_codec_v2):
+	assert test_codec_v2.load({'a': 1, 'b': {'c': [1, 2]}}) == {'a': 1, 'b': {'c': [1, 2]}}
+	assert test_codec_v2.load({'!meta': '!kv', 'keys': [1, [1, 2]], 'values': ['a', {'b': 2}]}) == {
+		1: 'a',
+		(1, 2): {'b': 2},
+	}
+	assert test_codec_v2.load({'!meta': ['DummyClass', 8], 'params': 2}).version is None
+
+	with pytest.raises(KeyError) as e:
+		test_codec_v2.load({'!meta': ['DummyClass', 2], 'params': None})
+	assert str(e.value) == "'Cannot restore object: DummyClass version: 2'"
+
+
+def test_codec_v2_load_v1(test_codec_v2, basic_data_dict):
+	assert test_codec_v2.load(basic_data_dict[1]) == basic_data_dict[0]
+	assert test_codec_v2.load({'params': 1, '!meta': {'version': 1, 'dtype': 'DummyClass'}}).version == 1
+
+
+def test_codec_v1_load_v2(test_codec):
+	assert test_codec.load({'!meta': '!kv', 'keys': [1], 'values': [{'!meta': ['DummyClass', 1], 'params': 1}]})[1].version == 1
+
+	with pytest.raises(ValueError) as e:
+		test_codec.load({'a': 1})
+	assert str(e.value) == 'Invalid dict structure'
+
+
+def test_codec_v2_roundtrip(test_codec_v2):
+	data = {'a': [1, {2: 'b', 'c': {'d': None}}], (1, 'x'): 'y', 'e': EmbeddedDummyClass()}
+	loaded = test_codec_v2.load(test_codec_v2.dump(data))
+	assert loaded['a'] == [1, {2: 'b', 'c': {'d': None}}]
+	assert loaded[(1, 'x')] == 'y'
+	assert isinstance(loaded['e'], EmbeddedDummyClass)
+
+
+def test_codec_type_table(test_registry):
+	codec = charon.Codec([test_registry])
+	assert codec.type_table() == [
+		(type_id('DummyClass', 1), 'DummyClass', 1),
+		(type_id('DummyClass', 4), 'DummyClass', 4),
+		(type_id('DummyClass', 8), 'DummyClass', 8),
+		(type_id('EmbeddedDummyClass', 1), 'EmbeddedDummyClass', 1),
+	]
+	assert type_id('DummyClass', 4) == zlib.crc32(b'DummyClass:4')
+
+
+@pytest.mark.parametrize('iterative', [False, True])
+def test_codec_type_ids(test_registry, iterative):
+	codec = charon.Codec([test_registry], iterative = iterative, type_ids = True)
+
+	assert codec.dump(DummyClass(1)) == {'!meta': type_id('DummyClass', 4), 'params': 2}
+	assert codec.load({'!meta': type_id('DummyClass', 8), 'params': 2}).version is None
+
+	embedded = codec.load(codec.dump(EmbeddedDummyClass()))
+	assert isinstance(embedded, EmbeddedDummyClass)
+	assert [v.version for v in embedded.values[:4]] == [2, 2, 2, 2]
+
+	with pytest.raises(KeyError) as e:
+		codec.load({'!meta': 4, 'params': 2})
+	assert str(e.value) == "'Cannot restore object with type id: 4'"
+
+
+def test_codec_type_ids_stable(test_registry):
+	# pylint: disable=unused-variable
+	codec = charon.Codec([test_registry], type_ids = True)
+	dumped = codec.dump(DummyClass(1))
+
+	registry = charon.CodecRegistry()
+
+
+	@registry.dumper(DummyClass2, version = 1)
+	def _dump_dummy_class2(_):
+		return None
+
+
+	@registry.loader(DummyClass2, version = 1)
+	def _load_dummy_class2(_):
+		return DummyClass2()
+
+
+	# Registering an unrelated type (sorted before the others) changes no existing id
+	consumer = charon.Codec([registry, test_registry], type_ids = True)
+	assert set(codec.type_table()) < set(consumer.type_table())
+	assert consumer.dump(DummyClass(1)) == dumped
+	assert consumer.load(dumped).version == 2
+
+
+def test_codec_type_ids_collision(monkeypatch, test_registry):
+	monkeypatch.setattr(charon.codec, 'type_id', lambda dtype, version: 1)
+	with pytest.raises(ValueError):
+		charon.Codec([test_registry], type_ids = True).dump(DummyClass(1))
+	# Ids are not used without type_ids
+	assert charon.Codec([test_registry]).load(charon.Codec([test_registry]).dump(DummyClass(1))).version == 2
+
+
+def test_codec_type_ids_batch(test_registry):
+	codec = charon.Codec([test_registry], type_ids = True)
+	batch = codec.dump_batch([DummyClass(1), 5, DummyClass(1)])
+	assert batch == {
+		'!types': [list(entry) for entry in codec.type_table()],
+		'values': [{'!meta': type_id('DummyClass', 4), 'params': 2}, 5, {'!meta': type_id('DummyClass', 4), 'params': 2}],
+	}
+
+	# Type table of the producer differs from the consumer one
+	batch['!types'].append([7, 'MissingClass', 1])
+	batch['!types'].append([8, 'DummyClass', 4])
+	batch['values'][0]['!meta'] = 8
+	batch['values'][2]['!meta'] = 7
+
+	loaded = codec.load_batch({'!types': batch['!types'], 'values': batch['values'][:2]})
+	assert loaded[0].version == 2
+	assert loaded[1] == 5
+
+	with pytest.raises(KeyError) as e:
+		codec.load_batch(batch)
+	assert str(e.value) == "'Cannot restore object: MissingClass version: 1'"
+
+	with pytest.raises(ValueError) as e:
+		charon.Codec([test_registry]).dump_batch([])
+	assert str(e.value) == 'Batches with type table require codec with type_ids enabled'
+
+
+@pytest.fixture(scope = 'module', params = [(1, False), (1, True), (2, False), (2, True)], ids = [
+	'v1-recursive', 'v1-iterative', 'v2-recursive', 'v2-iterative'
+])
+def memo_codec(request, test_registry):
+	format_version, iterative = request.param
+	return charon.Codec([test_registry], format_version = format_version, iterative = iterative, memo = True)
+
+
+def test_codec_memo_shared_references(memo_codec):
+	shared = EmbeddedDummyClass()
+	values = [1, 2]
+	dumped = memo_codec.dump([shared, values, shared, values, [], []])
+
+	assert dumped[2] == {'!meta': '!ref', 'id': 1}
+	assert dumped[3] == {'!meta': '!ref', 'id': 7}
+	assert dumped[4:] == [[], []]
+
+	loaded = memo_codec.load(dumped)
+	assert isinstance(loaded[0], EmbeddedDummyClass)
+	assert loaded[0] is loaded[2]
+	assert loaded[1] is loaded[3]
+	assert loaded[4] is not loaded[5]
+
+
+def test_codec_memo_engines_parity(test_registry):
+	shared = DummyClass(1)
+	data = {'a': [shared, {'b': shared}], (1, 2): shared, 'c': EmbeddedDummyClass()}
+	recursive = charon.Codec([test_registry], memo = True)
+	iterative = charon.Codec([test_registry], memo = True, iterative = True)
+	assert recursive.dump(data) == iterative.dump(data)
+
+
+def test_codec_memo_cycles(memo_codec):
+	data = [] # type: list
+	data.append(data)
+	data.append({'self': data})
+
+	loaded = memo_codec.load(memo_codec.dump(data))
+	assert loaded[0] is loaded
+	assert loaded[1]['self'] is loaded
+
+
+def test_codec_memo_cycle_through_object(memo_codec):
+	embedded = EmbeddedDummyClass()
+	embedded.values = [embedded]
+
+	with pytest.raises(ValueError) as e:
+		memo_codec.dump(embedded)
+	assert str(e.value) == 'Cannot dump circular reference to object of type: charon.tests.test_codec.EmbeddedDummyClass'
+
+	with pytest.raises(ValueError) as e:
+		memo_codec.load({'!meta': {'dtype': 'EmbeddedDummyClass', 'version': 1}, 'params': [{'!meta': '!ref', 'id': 0}]})
+	assert str(e.value) == 'Cannot load circular reference to object which is being loaded'
+
+
+def test_codec_memo_per_call(memo_codec):
+	values = [1]
+	assert memo_codec.dump_many([values, values]) == [[1], [1]]
+
+
+def test_codec_memo_invalid_reference(memo_codec, test_codec):
+	with pytest.raises(KeyError) as e:
+		memo_codec.load([{'!meta': '!ref', 'id': 1}])
+	assert str(e.value) == "'Invalid back-reference: 1'"
+
+	with pytest.raises(ValueError) as e:
+		test_codec.load({'!meta': '!ref', 'id': 0})
+	assert str(e.value) == 'Back-references can be loaded only by codec with memo enabled'
+
+
+def test_codec_out_of_band_buffers(test_codec_v2):
+	blob = bytearray(b'abc')
+	data = {'a': b'xyz', 'b': [blob, memoryview(b'12345')[1:3]], 'c': EmbeddedDummyClass()}
+	buffers = []
+	dumped = test_codec_v2.dump(data, buffer_callback = buffers.append)
+	assert dumped['a'] == {'!meta': '!buffer', 'id': 0, 'type': 'bytes'}
+	assert dumped['b'] == [{'!meta': '!buffer', 'id': 1, 'type': 'bytearray'}, {'!meta': '!buffer', 'id': 2, 'type': 'memoryview'}]
+	assert [bytes(buffer) for buffer in buffers] == [b'xyz', b'abc', b'23']
+
+	loaded = test_codec_v2.load(dumped, buffers = buffers)
+	assert loaded['a'] == b'xyz' and type(loaded['a']) is bytes
+	assert loaded['b'][0] == bytearray(b'abc') and type(loaded['b'][0]) is bytearray
+	assert loaded['b'][1] == b'23' and type(loaded['b'][1]) is memoryview
+	assert isinstance(loaded['c'], EmbeddedDummyClass)
+
+
+def test_codec_out_of_band_buffers_zero_copy(test_codec):
+	payload = bytearray(b'xxxx')
+	buffers = []
+	dumped = test_codec.dump([bytes(2), memoryview(payload)], buffer_callback = buffers.append)
+	assert test_codec.dump([bytes(2)]) == [bytes(2)]
+
+	received = bytearray(b'\0\0abcd')
+	view = memoryview(received)
+	loaded = test_codec.load(dumped, buffers = [view[:2], view[2:]])
+	received[2:] = b'efgh'
+	assert loaded[1] == b'efgh'
+	assert test_codec.load_many([dumped], buffers = [b'\0\0', payload])[0][0] == bytes(2)
+
+
+def test_codec_out_of_band_buffers_many(test_codec):
+	buffers = []
+	dumped = test_codec.dump_many([b'a', [b'b']], buffer_callback = buffers.append)
+	assert dumped[1][0]['id'] == 1
+	assert test_codec.load_many(dumped, buffers = buffers) == [b'a', [b'b']]
+
+
+def test_codec_out_of_band_buffers_invalid(test_codec):
+	dumped = test_codec.dump([b'a'], buffer_callback = lambda buffer: None)
+	with pytest.raises(ValueError):
+		test_codec.load(dumped)
+	with pytest.raises(KeyError):
+		test_codec.load(dumped, buffers = [])
+	with pytest.raises(ValueError):
+		test_codec.dump(memoryview(b'abcd')[::2], buffer_callback = lambda buffer: None)
+
+
+@pytest.mark.parametrize('iterative', [False, True])
+def test_codec_buffer(iterative):
+	# pylint: disable=unused-variable
+	registry = charon.CodecRegistry()
+
+
+	class Blob:
+		def __init__(self, data):
+			self.data = data
+
+
+	@registry.dumper(Blob, version = 1)
+	def _dump_blob(obj):
+		return [len(obj.data), charon.Buffer(obj.data)]
+
+
+	@registry.loader(Blob, version = 1)
+	def _load_blob(params):
+		return Blob(params[1][:params[0]])
+
+
+	codec = charon.Codec([registry], iterative = iterative)
+	blob = Blob(bytearray(b'abc'))
+	dumped = codec.dump([blob])
+	assert dumped[0]['params'] == [3, b'abc']
+	assert codec.load(dumped)[0].data == b'abc'
+
+	buffers = []
+	dumped = codec.dump([blob], buffer_callback = buffers.append)
+	assert dumped[0]['params'] == [3, {'!meta': '!buffer', 'id': 0, 'type': 'memoryview'}]
+	blob.data[0:1] = b'x'
+	assert bytes(buffers[0]) == b'xbc'
+	loaded = codec.load(dumped, buffers = buffers)[0].data
+	assert loaded == b'xbc' and type(loaded) is memoryview
+	# Plain memoryviews are still dumped by the codec itself
+	assert codec.dump(memoryview(b'ab'), buffer_callback = buffers.append)['type'] == 'memoryview'
+
+
+@pytest.fixture(params = [1, 2])
+def path_codec(request, test_registry):
+	return charon.Codec([test_registry], format_version = request.param)
+
+
+def test_codec_load_path(path_codec):
+	embedded = EmbeddedDummyClass()
+	embedded.values = {'positions': [DummyClass(1), [DummyClass(2), 'x']], (1, 'a'): {'b': 5}, 2: 'two'}
+	dumped = path_codec.dump({'snapshot': embedded, 'other': [EmbeddedDummyClass()]})
+
+	assert path_codec.load_path(dumped, ['snapshot', 'positions', 1, 1]) == 'x'
+	assert path_codec.load_path(dumped, ['snapshot', (1, 'a')]) == {'b': 5}
+	assert path_codec.load_path(dumped, ['snapshot', 2]) == 'two'
+	assert path_codec.load_path(dumped, ['snapshot', 'positions', -1, 0]).version == 2
+	assert isinstance(path_codec.load_path(dumped, ['other', 0]), EmbeddedDummyClass)
+	assert path_codec.load_path(dumped, []).keys() == {'snapshot', 'other'}
+
+	assert sorted(path_codec.load_keys(dumped), key = str) == ['other', 'snapshot']
+	assert set(path_codec.load_keys(dumped, ['snapshot'])) == {'positions', (1, 'a'), 2}
+
+	for path in [['missing'], ['snapshot', 'positions', 2], ['snapshot', 'positions', 'a'], ['snapshot', 2, 0]]:
+		with pytest.raises(KeyError):
+			path_codec.load_path(dumped, path)
+	with pytest.raises(ValueError):
+		path_codec.load_keys(dumped, ['other'])
+
+
+def test_codec_load_path_skips_loaders(test_registry):
+	calls = []
+	registry = charon.CodecRegistry()
+	registry.loader(EmbeddedDummyClass, version = 1)(calls.append)
+	codec = charon.Codec([test_registry, registry])
+	dumped = codec.dump([EmbeddedDummyClass(), EmbeddedDummyClass()])
+	assert codec.load_path(dumped, [1, 5]) == 4
+	assert calls == []
+
+
+def test_codec_dump_subclass(test_codec):
+	SubClass = type('SubClass', (EmbeddedDummyClass,), {})
+	obj = SubClass()
+	assert test_codec.dump(obj) == test_codec.dump(EmbeddedDummyClass())
+	assert type(test_codec.load(test_codec.dump(obj))) is EmbeddedDummyClass
+
+
+def test_codec_dump_same_name_other_class(test_codec):
+	OtherClass = type('EmbeddedDummyClass', (), {})
+	with pytest.raises(ValueError):
+		test_codec.dump(OtherClass())
+
+
+def test_codec_qualified_names():
+	registry = charon.CodecRegistry(qualified_names = True)
+	OtherClass = type('DummyClass', (), {'__module__': 'other', 'version': 'other'})
+	registry.dumper(DummyClass, version = 1)(lambda obj: obj.version)
+	registry.loader(DummyClass, version = 1)(DummyClass)
+	registry.dumper(OtherClass, version = 1)(lambda obj: None)
+	registry.loader(OtherClass, version = 1)(lambda params: OtherClass())
+
+	for format_version in FORMAT_VERSIONS:
+		codec = charon.Codec([registry], format_version = format_version)
+		loaded = codec.load(codec.dump([DummyClass(3), OtherClass()]))
+		assert type(loaded[0]) is DummyClass and loaded[0].version == 3
+		assert type(loaded[1]) is OtherClass
+
+
+def test_codec_same_name_other_registry(test_registry):
+	registry = charon.CodecRegistry()
+	OtherClass = type('DummyClass', (), {'__module__': 'other'})
+	registry.loader(OtherClass, version = 1)(lambda params: OtherClass())
+
+	with pytest.raises(ValueError) as e:
+		charon.Codec([test_registry, registry]).dump(DummyClass(1))
+	assert 'qualified_names' in str(e.value)
+
+	qualified_registry = charon.CodecRegistry(qualified_names = True)
+	qualified_registry.loader(OtherClass, version = 1)(lambda params: OtherClass())
+	codec = charon.Codec([test_registry, qualified_registry])
+	assert type(codec.load(codec.dump(DummyClass(1)))) is DummyClass
+
+
+@pytest.mark.parametrize('iterative', [False, True])
+def test_codec_flat_dumper(iterative):
+	registry = charon.CodecRegistry()
+	values = (1, 'a', None)
+	registry.dumper(DummyClass, version = 1, flat = True)(lambda obj: obj.version)
+	registry.loader(DummyClass, version = 1)(DummyClass)
+	codec = charon.Codec([registry], iterative = iterative, check_flat = True)
+
+	for version in [values, [1, 2], 'a', {1: 2}]:
+		assert codec.dump(DummyClass(version)) == charon.Codec([registry], iterative = iterative, memo = True).dump(DummyClass(version))
+	dumped = codec.dump([DummyClass(values)])
+	assert dumped[0]['params'] == [1, 'a', None]
+	assert codec.load(dumped)[0].version == [1, 'a', None]
+
+	with pytest.raises(TypeError):
+		codec.dump(DummyClass([1, [2]]))
+	with pytest.raises(TypeError):
+		codec.dump(DummyClass({1}))
+	assert charon.Codec([registry], iterative = iterative).dump(DummyClass([1, [2]]))['params'] == [1, [2]]
+
+
+@pytest.mark.parametrize('iterative', [False, True])
+def test_codec_pack_arrays(test_registry, iterative):
+	codec = charon.Codec([test_registry], iterative = iterative, format_version = 2, pack_arrays = True)
+	floats = [i / 3 for i in range(100)]
+	ints = tuple(range(-50, 50))
+	data = {'floats': floats, 'ints': ints, 'nested': [floats, EmbeddedDummyClass()]}
+
+	dumped = codec.dump(data)
+	assert dumped['floats']['!meta'] == '!array'
+	assert dumped['floats']['typecode'] == 'd'
+	assert len(dumped['floats']['data']) == 800
+	assert dumped['ints']['typecode'] == 'b'
+	assert codec.dump([2 ** 40] * 8)['typecode'] == 'q'
+	assert codec.load(codec.dump([-2 ** 15] * 8)) == [-2 ** 15] * 8
+
+	loaded = codec.load(dumped)
+	assert loaded['floats'] == floats
+	assert loaded['ints'] == list(ints)
+	assert loaded['nested'][0] == floats
+	assert isinstance(loaded['nested'][1], EmbeddedDummyClass)
+	assert codec.load_path(dumped, ['ints', 1]) == -49
+
+	for not_packed in [[1.0] * 7, [True] * 10, [1] * 9 + [1.0], [2 ** 70] * 10, ['a'] * 10]:
+		assert codec.dump(not_packed) == not_packed
+
+
+def test_codec_pack_arrays_memo(test_registry):
+	codec = charon.Codec([test_registry], memo = True, pack_arrays = True)
+	floats = [1.5] * 10
+	loaded = codec.load(codec.dump([floats, floats, [1, 2]]))
+	assert loaded[0] is loaded[1]
+	assert loaded == [floats, floats, [1, 2]]
+
+
+def test_codec_pack_arrays_invalid_typecode(test_codec):
+	with pytest.raises(ValueError):
+		test_codec.load({'!meta': '!array', 'typecode': 'u', 'data': b'ab'})
+
+
+@pytest.mark.parametrize('iterative', [False, True])
+def test_codec_profile(test_registry, iterative):
+	codec = charon.Codec([test_registry], iterative = iterative, profile = True)
+	dumped = codec.dump([DummyClass(1), DummyClass(2), EmbeddedDummyClass()])
+	codec.load(dumped)
+	codec.load({'!meta': {'dtype': 'DummyClass', 'version': 1}, 'params': None})
+
+	stats = codec.profile_stats().as_dict()
+	assert sorted(stats) == ['DummyClass', 'EmbeddedDummyClass']
+	assert stats['DummyClass'][4]['dump_calls'] == 6
+	assert stats['DummyClass'][4]['load_calls'] == 6
+	assert stats['DummyClass'][1]['load_calls'] == 1
+	assert stats['DummyClass'][1]['dump_calls'] == 0
+	assert stats['EmbeddedDummyClass'][1]['dump_calls'] == 1
+	assert stats['EmbeddedDummyClass'][1]['dump_seconds'] >= 0.0
+
+	codec.profile_stats().reset()
+	assert codec.profile_stats().as_dict() == {}
+
+
+def test_codec_profile_prometheus(test_registry):
+	codec = charon.Codec([test_registry], profile = True)
+	codec.dump(DummyClass(1))
+	lines = codec.profile_stats().as_prometheus().splitlines()
+	assert '# TYPE charon_dump_calls_total counter' in lines
+	assert 'charon_dump_calls_total{dtype="DummyClass",version="4"} 1' in lines
+	assert 'charon_load_calls_total{dtype="DummyClass",version="4"} 0' in lines
+	assert not any('EmbeddedDummyClass' in line for line in lines)
+
+
+def test_codec_profile_disabled(test_codec):
+	with pytest.raises(ValueError):
+		test_codec.profile_stats()
+
+
+@pytest.mark.parametrize('iterative', [False, True])
+def test_codec_hooks(test_registry, iterative):
+	codec = charon.Codec([test_registry], iterative = iterative)
+	events = []
+	hooks = codec.add_hooks(
+		pre_dump = lambda dtype, version, obj: events.append(('pre_dump', dtype, version, type(obj))),
+		post_dump = lambda dtype, version, obj, params: events.append(('post_dump', dtype, version, params)),
+		pre_load = lambda dtype, version, params: events.append(('pre_load', dtype, version, params)),
+		post_load = lambda dtype, version, params, obj: events.append(('post_load', dtype, version, type(obj))),
+	)
+	dumped = codec.dump([DummyClass(1)])
+	codec.load(dumped)
+	assert events == [
+		('pre_dump', 'DummyClass', 4, DummyClass),
+		('post_dump', 'DummyClass', 4, 2),
+		('pre_load', 'DummyClass', 4, 2),
+		('post_load', 'DummyClass', 4, DummyClass),
+	]
+
+	codec.remove_hooks(hooks)
+	del events[:]
+	codec.load(codec.dump(DummyClass(1)))
+	assert events == []
+
+
+def test_codec_hooks_sample(test_registry):
+	codec = charon.Codec([test_registry])
+	dumped = []
+	codec.add_hooks(pre_dump = lambda dtype, version, obj: dumped.append(obj), sample = 3)
+	objs = [DummyClass(i) for i in range(7)]
+	codec.dump(objs)
+	assert dumped == [objs[0], objs[3], objs[6]]
+
+	with pytest.raises(ValueError):
+		codec.add_hooks(sample = 0)
+
+
+def test_codec_hooks_on_error():
+	# pylint: disable=unused-variable
+	registry = charon.CodecRegistry()
+
+
+	@registry.dumper(DummyClass2, version = 1)
+	def _dump_fail(_):
+		raise RuntimeError('failed')
+
+
+	@registry.loader(DummyClass2, version = 1)
+	def _load_fail(_):
+		raise RuntimeError('failed')
+
+
+	codec = charon.Codec([registry])
+	errors = []
+	codec.add_hooks(on_error = lambda event, dtype, version, value, exception: errors.append((event, dtype, version, value, type(exception))))
+	with pytest.raises(RuntimeError):
+		codec.dump([DummyClass2()])
+	with pytest.raises(RuntimeError):
+		codec.load({'!meta': {'dtype': 'DummyClass2', 'version': 1}, 'params': 5})
+	assert [error[:3] for error in errors] == [('dump', 'DummyClass2', 1), ('load', 'DummyClass2', 1)]
+	assert isinstance(errors[0][3], DummyClass2)
+	assert errors[1][3:] == (5, RuntimeError)
+
+
+def test_codec_freeze(test_registry):
+	# pylint: disable=unused-variable
+	registry = charon.CodecRegistry()
+	codec = charon.Codec([test_registry, registry], format_version = 2)
+	frozen = codec.freeze()
+	data = [DummyClass(1), EmbeddedDummyClass(), {'a': 1}]
+	assert frozen.dump(data) == codec.dump(data)
+	assert frozen.dumps(data) == codec.dumps(data)
+	assert frozen.load(codec.dump(data))[0].version == 2
+
+
+	@registry.dumper(DummyClass2, version = 1)
+	def _dump_dummy_class2(_):
+		return None
+
+
+	@registry.loader(DummyClass2, version = 1)
+	def _load_dummy_class2(_):
+		return DummyClass2()
+
+
+	# Registrations made after freezing are seen only by the original codec and new frozen copies
+	dumped = codec.dump(DummyClass2())
+	assert dumped == {'!meta': ('DummyClass2', 1), 'params': None}
+	with pytest.raises(ValueError):
+		frozen.dump(DummyClass2())
+	with pytest.raises(KeyError):
+		frozen.load(dumped)
+	assert isinstance(codec.freeze().load(dumped), DummyClass2)
+
+	with pytest.raises(TypeError):
+		frozen.add_hooks()
+
+
+def test_codec_freeze_hooks(test_registry):
+	codec = charon.Codec([test_registry], profile = True)
+	dumped = []
+	hooks = codec.add_hooks(pre_dump = lambda dtype, version, obj: dumped.append(dtype))
+	frozen = codec.freeze()
+	codec.remove_hooks(hooks)
+	frozen.dump(DummyClass(1))
+	assert dumped == ['DummyClass']
+	assert codec.profile_stats().stats('DummyClass', 4).dump_calls == 1
+	with pytest.raises(TypeError):
+		frozen.remove_hooks(hooks)
+
+
+def run_async(coroutine):
+	return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+@pytest.mark.parametrize('format_version, memo', [(1, False), (2, False), (2, True)])
+def test_codec_async_same_output(test_registry, format_version, memo):
+	codec = charon.Codec([test_registry], format_version = format_version, memo = memo)
+	shared = [DummyClass(1), 'a']
+	data = {'a': [shared, shared, (1, 2.5)], 2: EmbeddedDummyClass(), 'deep': [[[{'x': None}]]] * 3}
+	dumped = codec.dump(data)
+	assert run_async(codec.dump_async(data, yield_every = 2)) == dumped
+	assert run_async(codec.dump_async(5)) == 5
+
+	loaded = run_async(codec.load_async(dumped, yield_every = 2))
+	assert loaded.keys() == data.keys()
+	assert isinstance(loaded[2], EmbeddedDummyClass)
+	if memo:
+		assert loaded['a'][0] is loaded['a'][1]
+
+
+def test_codec_async_yields(test_registry):
+	codec = charon.Codec([test_registry])
+	data = [[DummyClass(1), [i]] for i in range(1000)]
+	ticks = []
+
+	async def ticker():
+		while True:
+			ticks.append(None)
+			await asyncio.sleep(0)
+
+	async def dump_and_load(**kwargs):
+		task = asyncio.ensure_future(ticker())
+		dumped = await codec.dump_async(data, **kwargs)
+		loaded = await codec.load_async(dumped, **kwargs)
+		task.cancel()
+		return dumped, loaded
+
+	dumped, loaded = run_async(dump_and_load(yield_every = 100))
+	assert dumped == codec.dump(data)
+	assert len(loaded) == 1000
+	assert len(ticks) >= 30
+
+	del ticks[:]
+	run_async(dump_and_load(yield_every = 10 ** 9, yield_after = 0))
+	assert len(ticks) >= 50
+
+	with pytest.raises(ValueError):
+		run_async(codec.dump_async(data, yield_every = 0))
@@ -0,0 +1,92 @@
+import pytest
+
+import charon
+from charon.lazy import LazyDict, LazyList
+
+
+
+class Node:
+	loaded = 0
+
+	def __init__(self, name, children):
+		self.name = name
+		self.children = children
+
+
+
+@pytest.fixture(scope = 'module')
+def lazy_registry():
+	# pylint: disable=unused-variable
+	lazy_registry = charon.CodecRegistry()
+
+
+	@lazy_registry.dumper(Node, version = 1)
+	def _dump_node(obj):
+		return {'name': obj.name, 'children': obj.children}
+
+
+	@lazy_registry.loader(Node, version = 1)
+	def _load_node(params):
+		Node.loaded += 1
+		return Node(params['name'], params['children'])
+
+
+	return lazy_registry
+
+
+@pytest.fixture(params = [1, 2])
+def lazy_codec(request, lazy_registry):
+	Node.loaded = 0
+	return charon.Codec([lazy_registry], format_version = request.param)
+
+
+def snapshot():
+	return Node('root', {
+		'positions': [Node('p{}'.format(i), [Node('leaf', [])]) for i in range(10)],
+		'limits': {1: Node('limit', []), (2, 'b'): 3},
+		'count': 10,
+	})
+
+
+def test_lazy_load_on_access(lazy_codec):
+	root = lazy_codec.load_lazy(lazy_codec.dump(snapshot()))
+	assert Node.loaded == 1
+	assert isinstance(root.children, LazyDict)
+	assert root.children['count'] == 10
+
+	positions = root.children['positions']
+	assert isinstance(positions, LazyList)
+	assert len(positions) == 10
+	assert Node.loaded == 1
+
+	assert positions[3].name == 'p3'
+	assert Node.loaded == 2
+	assert positions[3] is positions[3]
+	assert Node.loaded == 2
+
+	assert [leaf.name for leaf in positions[3].children] == ['leaf']
+	assert Node.loaded == 3
+
+
+def test_lazy_dict_keys(lazy_codec):
+	root = lazy_codec.load_lazy(lazy_codec.dump(snapshot()))
+	limits = root.children['limits']
+	assert set(limits) == {1, (2, 'b')}
+	assert limits[(2, 'b')] == 3
+	assert Node.loaded == 1
+	assert limits[1].name == 'limit'
+
+
+def test_lazy_primitive_containers(lazy_codec):
+	data = {'a': [1, 2], 'b': {'c': 'd'}, 'e': ([3, [4]], 5)}
+	loaded = lazy_codec.load_lazy(lazy_codec.dump(data))
+	assert loaded == {'a': [1, 2], 'b': {'c': 'd'}, 'e': [[3, [4]], 5]}
+	assert type(loaded['a']) is list
+	assert type(loaded['b']) is dict
+	assert loaded['e'][0][1:] == [[4]]
+	assert lazy_codec.load_lazy(7) == 7
+
+
+def test_lazy_memo_not_supported(lazy_registry):
+	with pytest.raises(ValueError):
+		charon.Codec([lazy_registry], memo = True).load_lazy([])
@@ -0,0 +1,77 @@
+import concurrent.futures
+import datetime
+import decimal
+import uuid
+
+import pytest
+
+import charon
+from charon.extensions import STANDARD_REGISTRY, STDLIB_REGISTRY
+from charon.parallel import ParallelCodec, import_registry
+
+
+REGISTRIES = ['charon.extensions.standard_registry:STANDARD_REGISTRY', 'charon.extensions.stdlib_registry:STDLIB_REGISTRY']
+
+
+def records(count):
+	return [
+		{'id': i, 'price': decimal.Decimal(i) / 7, 'at': datetime.date(2017, 1, 1 + i % 28), 'uuid': uuid.UUID(int = i)}
+		for i in range(count)
+	]
+
+
+@pytest.fixture(scope = 'module')
+def parallel_codec():
+	with ParallelCodec(REGISTRIES, max_workers = 2, chunk_size = 7, format_version = 2) as parallel_codec:
+		yield parallel_codec
+
+
+def test_parallel_same_output(parallel_codec):
+	codec = charon.Codec([STANDARD_REGISTRY, STDLIB_REGISTRY], format_version = 2)
+	objs = records(100)
+	dumped = parallel_codec.dump_many(iter(objs))
+	assert dumped == codec.dump_many(objs)
+	assert parallel_codec.load_many(dumped) == objs
+	assert parallel_codec.dump_many([]) == []
+
+
+def test_parallel_wire_format(parallel_codec):
+	pytest.importorskip('msgpack')
+	objs = records(30)
+	dumped = list(parallel_codec.dump_iter(objs, wire_format = 'msgpack'))
+	assert all(isinstance(data, bytes) for data in dumped)
+	assert list(parallel_codec.load_iter(dumped, wire_format = 'msgpack')) == objs
+
+
+def test_parallel_error(parallel_codec):
+	with pytest.raises(ValueError):
+		parallel_codec.dump_many([1, object()])
+
+
+def test_parallel_own_executor():
+	with concurrent.futures.ThreadPoolExecutor(2) as executor:
+		parallel_codec = ParallelCodec(REGISTRIES[:1], chunk_size = 1, max_pending = 1, executor = executor, memo = True)
+		shared = [1]
+		loaded = parallel_codec.load_many(parallel_codec.dump_many([[shared, shared]] * 3))
+		assert all(item[0] is item[1] for item in loaded)
+		parallel_codec.close()
+		assert executor.submit(int).result() == 0
+
+
+@pytest.mark.parametrize('spec, exception', [
+	('charon.extensions', ValueError),
+	('charon.extensions:', ValueError),
+	('charon.extensions:Codec', AttributeError),
+	('charon:Codec', TypeError),
+	('charon.missing:REGISTRY', ImportError),
+])
+def test_parallel_invalid_spec(spec, exception):
+	with pytest.raises(exception):
+		import_registry(spec)
+
+
+def test_parallel_invalid_options():
+	with pytest.raises(ValueError):
+		ParallelCodec(REGISTRIES, chunk_size = 0)
+	with pytest.raises(ValueError):
+		ParallelCodec(REGISTRIES, format_version = 7)
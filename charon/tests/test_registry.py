@@ -1,3 +1,7 @@
+import functools
+import typing
+
+import dataclasses
 import pytest
 
 import charon
@@ -11,6 +15,43 @@ class DummyClass:
 
 
 
+class Point(typing.NamedTuple):
+	x: int
+	y: int
+
+
+
+@dataclasses.dataclass(frozen = True)
+class Trade:
+	symbol: str
+	point: Point
+	tags: list = dataclasses.field(default_factory = list)
+	cached: int = dataclasses.field(default = 0, init = False)
+
+
+
+class Slotted:
+	__slots__ = ('name', '__secret')
+
+	def __init__(self, name, secret):
+		self.name = name
+		self.__secret = secret
+
+
+	def secret(self):
+		return self.__secret
+
+
+
+class SlottedChild(Slotted):
+	__slots__ = 'extra'
+
+	def __init__(self, name, secret, extra):
+		super().__init__(name, secret)
+		self.extra = extra
+
+
+
 @pytest.fixture(scope = 'module')
 def test_registry():
 	# pylint: disable=unused-variable
@@ -167,3 +208,107 @@ def test_codec_registry_load_missing_loader(test_registry):
 	with pytest.raises(KeyError) as e:
 		test_registry.load({'!meta': {'dtype': 'Codec', 'version': 1}, 'params': None}, None)
 	assert str(e.value) == "'Cannot load object of type: Codec missing loader'"
+
+
+def test_codec_registry_name_collision():
+	registry = charon.CodecRegistry()
+	registry.dumper(DummyClass, version = 1)(lambda obj: obj.data)
+	registry.loader(DummyClass, version = 1)(DummyClass)
+
+	OtherDummyClass = type('DummyClass', (), {})
+	with pytest.raises(ValueError):
+		registry.dumper(OtherDummyClass, version = 2)
+	with pytest.raises(ValueError):
+		registry.loader(OtherDummyClass, version = 2)
+
+
+def test_codec_registry_qualified_names():
+	registry = charon.CodecRegistry(qualified_names = True)
+	OtherDummyClass = type('DummyClass', (), {'__module__': 'other'})
+	registry.dumper(DummyClass, version = 1)(lambda obj: obj.data)
+	registry.dumper(OtherDummyClass, version = 1)(lambda obj: None)
+
+	assert registry.class_key(DummyClass) == 'charon.tests.test_registry.DummyClass'
+	assert registry.class_key(OtherDummyClass) == 'other.DummyClass'
+	assert registry.dump(DummyClass(5)) == {'!meta': {'dtype': 'charon.tests.test_registry.DummyClass', 'version': 1}, 'params': 5}
+
+
+@pytest.mark.parametrize('iterative', [False, True])
+def test_codec_registry_register_dataclass(iterative):
+	registry = charon.CodecRegistry()
+	assert registry.register_dataclass(Point, version = 1) is Point
+	registry.register_dataclass(Trade, version = 1, class_hash = 'abc')
+	registry.register_dataclass(SlottedChild, version = 2)
+	codec = charon.Codec([registry], iterative = iterative)
+
+	trade = Trade('SYM', Point(1, 2), ['a'])
+	object.__setattr__(trade, 'cached', 5)
+	dumped = codec.dump(trade)
+	assert dumped['params'][0] == 'SYM'
+	assert dumped['params'][1]['params'] == [1, 2]
+	loaded = codec.load(dumped)
+	assert loaded == trade
+	assert loaded.cached == 5
+	assert isinstance(loaded.point, Point)
+
+	loaded = codec.load(codec.dump(SlottedChild('n', 's', [Point(3, 4)])))
+	assert (loaded.name, loaded.secret(), loaded.extra) == ('n', 's', [Point(3, 4)])
+	assert registry._dumpers_class_hash[Trade] == registry._loaders_class_hash[Trade] == 'abc' # pylint: disable=protected-access
+	# Generated dumpers are stored without the return value check
+	assert not isinstance(registry._dumpers['Point'][1], functools.partial) # pylint: disable=protected-access
+	with pytest.raises(charon.DuplicateVersion):
+		registry.register_dataclass(Point, version = 1)
+
+	with pytest.raises(ValueError):
+		codec.load({'!meta': {'dtype': 'Point', 'version': 1}, 'params': [1, 2, 3]})
+
+
+def test_codec_registry_register_dataclass_unsupported():
+	with pytest.raises(TypeError):
+		charon.CodecRegistry().register_dataclass(DummyClass, version = 1)
+
+
+def test_codec_registry_freeze():
+	# pylint: disable=unused-variable
+	registry = charon.CodecRegistry()
+
+
+	@registry.dumper(DummyClass, version = 1)
+	def _dump_dummy_class_v1(obj):
+		return 1
+
+
+	@registry.loader(DummyClass, version = 1)
+	def _load_dummy_class_v1(data):
+		return DummyClass(data)
+
+
+	frozen = registry.freeze()
+	assert isinstance(frozen, charon.FrozenCodecRegistry)
+	assert frozen.freeze() is frozen
+
+
+	@registry.dumper(DummyClass, version = 2)
+	def _dump_dummy_class_v2(obj):
+		return 2
+
+
+	# The snapshot does not see later registrations
+	assert frozen.dump(DummyClass()) == {'!meta': {'dtype': 'DummyClass', 'version': 1}, 'params': 1}
+	assert registry.dump(DummyClass())['!meta']['version'] == 2
+	assert frozen.load({'!meta': {'dtype': 'DummyClass', 'version': 1}}, 5).data == 5
+	assert type(frozen._dumpers) is dict # pylint: disable=protected-access
+
+	# Lookups of unknown types do not add keys
+	assert frozen.dumpable(Point(1, 2)) is False
+	assert frozen.loadable({'!meta': {'dtype': 'Point', 'version': 1}}) is False
+	assert 'Point' not in frozen._dumpers and 'Point' not in frozen._loaders # pylint: disable=protected-access
+	with pytest.raises(KeyError):
+		frozen.dump(Point(1, 2))
+
+	with pytest.raises(TypeError):
+		frozen.dumper(Point, version = 1)
+	with pytest.raises(TypeError):
+		frozen.loader(Point, version = 1)
+	with pytest.raises(TypeError):
+		frozen.register_dataclass(Point, version = 1)
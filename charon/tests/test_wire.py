@@ -0,0 +1,192 @@
+import json
+
+import pytest
+
+import charon
+
+
+
+class Point:
+	def __init__(self, x, y):
+		self.x = x
+		self.y = y
+
+
+
+@pytest.fixture(scope = 'module')
+def wire_registry():
+	# pylint: disable=unused-variable
+	wire_registry = charon.CodecRegistry()
+
+
+	@wire_registry.dumper(Point, version = 1)
+	def _dump_point(obj):
+		return {'x': obj.x, 'y': obj.y, 'tags': [obj.x, (obj.y, None)]}
+
+
+	@wire_registry.loader(Point, version = 1)
+	def _load_point(params):
+		return Point(params['x'], params['y'])
+
+
+	return wire_registry
+
+
+@pytest.fixture(scope = 'module', params = [(1, False), (2, False), (2, True)], ids = ['v1', 'v2', 'v2-type-ids'])
+def wire_codec(request, wire_registry):
+	format_version, type_ids = request.param
+	return charon.Codec([wire_registry], format_version = format_version, type_ids = type_ids)
+
+
+def test_wire_pack_arrays(wire_registry):
+	msgpack = pytest.importorskip('msgpack')
+	codec = charon.Codec([wire_registry], format_version = 2, pack_arrays = True)
+	data = {'prices': [i / 7 for i in range(20)], 'sizes': list(range(20)), 'p': Point(1, [2.5] * 10)}
+	dumped = codec.dumps(data)
+	assert dumped == msgpack.packb(codec.dump(data), use_bin_type = True)
+	loaded = codec.loads(dumped)
+	assert loaded['prices'] == data['prices']
+	assert loaded['sizes'] == data['sizes']
+
+
+@pytest.mark.parametrize('iterative', [False, True])
+@pytest.mark.parametrize('wire_format', ['msgpack', 'json'])
+def test_wire_pack_arrays_same_bytes(wire_registry, wire_format, iterative):
+	# pylint: disable=unused-variable
+	msgpack = pytest.importorskip('msgpack')
+	registry = charon.CodecRegistry()
+
+
+	@registry.dumper(complex, version = 1, flat = True)
+	def _dump_complex(obj):
+		# Packed arrays are bytes, which are not serializable to JSON
+		return [obj.real] * 10 if wire_format == 'msgpack' else (obj.real, obj.imag)
+
+
+	codec = charon.Codec([wire_registry, registry], format_version = 2, pack_arrays = True, iterative = iterative)
+	data = {
+		'flat': [complex(1, 2), complex(3, 4)],
+		'ints': {i: str(i) for i in range(20)},
+		'floats': {i / 2: [i, 'x'] for i in range(10)},
+		'empty': {},
+		'point': Point(1, 2),
+	}
+	if wire_format == 'msgpack':
+		data['prices'] = [i / 7 for i in range(20)]
+		assert codec.dumps(data, 'msgpack') == msgpack.packb(codec.dump(data), use_bin_type = True)
+	else:
+		assert codec.dumps(data, 'json') == json.dumps(codec.dump(data)).encode()
+
+
+DATA = [
+	None,
+	'ěšč',
+	[1, 2.5, True, None, 'a'],
+	(1, [2, (3, {})]),
+	{'a': 1, 'b': [1, {'c': 'd'}], 'e': {}},
+	{1: 'a', (2, 3): ['b'], 'c': {'!meta': 1}},
+	{'nested': {'points': [Point(1, 2), Point(3.5, 'x')]}},
+	Point(Point(1, 2), [Point(3, 4)]),
+	[float('inf'), float('nan'), -0.0, 2 ** 63],
+]
+
+
+@pytest.mark.parametrize('data', DATA)
+def test_wire_msgpack_same_bytes(wire_codec, data):
+	msgpack = pytest.importorskip('msgpack')
+	assert wire_codec.dumps(data, 'msgpack') == msgpack.packb(wire_codec.dump(data), use_bin_type = True)
+
+
+@pytest.mark.parametrize('data', DATA)
+def test_wire_json_same_bytes(wire_codec, data):
+	assert wire_codec.dumps(data, 'json') == json.dumps(wire_codec.dump(data)).encode()
+
+
+@pytest.mark.parametrize('wire_format', ['msgpack', 'json'])
+def test_wire_roundtrip(wire_codec, wire_format):
+	if wire_format == 'msgpack':
+		pytest.importorskip('msgpack')
+	data = {'a': [1, {2: 'b', 'c': {'d': None}}], (1, 'x'): 'y', 'p': Point([1, 2], {3: 4})}
+	loaded = wire_codec.loads(wire_codec.dumps(data, wire_format), wire_format)
+	assert loaded['a'] == [1, {2: 'b', 'c': {'d': None}}]
+	assert loaded[(1, 'x')] == 'y'
+	assert isinstance(loaded['p'], Point)
+	assert loaded['p'].x == [1, 2]
+	assert loaded['p'].y == {3: 4}
+
+
+def test_wire_json_bytes_not_serializable(wire_codec):
+	with pytest.raises(TypeError):
+		wire_codec.dumps([b'a', Point(1, 2)], 'json')
+
+
+def test_wire_msgpack_bytes(wire_codec):
+	pytest.importorskip('msgpack')
+	assert wire_codec.loads(wire_codec.dumps([b'a', {'b': b'c'}])) == [b'a', {'b': b'c'}]
+
+
+def test_wire_msgpack_buffer(wire_registry):
+	# pylint: disable=unused-variable
+	msgpack = pytest.importorskip('msgpack')
+	registry = charon.CodecRegistry()
+
+
+	class Blob:
+		def __init__(self, data):
+			self.data = data
+
+
+	@registry.dumper(Blob, version = 1)
+	def _dump_blob(obj):
+		return [len(obj.data), charon.Buffer(obj.data)]
+
+
+	codec = charon.Codec([wire_registry, registry], format_version = 2)
+	data = [Blob(b'abc'), Point(1, 2)]
+	assert codec.dumps(data) == msgpack.packb(codec.dump(data), use_bin_type = True)
+
+
+def test_wire_writer_abstract(wire_codec):
+	with pytest.raises(TypeError):
+		charon.wire.Writer(wire_codec)
+
+
+def test_wire_unsupported_format(wire_codec):
+	with pytest.raises(ValueError):
+		wire_codec.dumps(1, 'xml')
+	with pytest.raises(ValueError):
+		wire_codec.loads(b'1', 'xml')
+
+
+def test_wire_unsupported_object(wire_codec):
+	with pytest.raises(ValueError):
+		wire_codec.dumps(object(), 'json')
+
+
+def test_wire_v1_invalid_dict(wire_registry):
+	codec = charon.Codec([wire_registry])
+	with pytest.raises(ValueError):
+		codec.loads(b'{"a": 1}', 'json')
+
+
+def test_wire_memo_not_supported(wire_registry):
+	codec = charon.Codec([wire_registry], memo = True)
+	with pytest.raises(ValueError):
+		codec.dumps([1], 'json')
+	with pytest.raises(ValueError):
+		codec.loads(b'[1]', 'json')
+
+
+@pytest.mark.parametrize('wire_format', ['msgpack', 'json'])
+def test_wire_profile_bytes(wire_registry, wire_format):
+	if wire_format == 'msgpack':
+		pytest.importorskip('msgpack')
+	codec = charon.Codec([wire_registry], format_version = 2, profile = True)
+	point = codec.dumps(Point(1, 2), wire_format)
+	codec.dumps([Point(1, 2), 'x'], wire_format)
+	codec.loads(point, wire_format)
+
+	stats = codec.profile_stats().as_dict()['Point'][1]
+	assert stats['dump_bytes'] == 2 * len(point)
+	assert stats['dump_calls'] == 2
+	assert stats['load_calls'] == 1
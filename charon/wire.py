@@ -0,0 +1,340 @@
+'''
+Writers serializing objects straight to msgpack or JSON bytes and readers loading them back,
+without building the intermediate tree of python primitives used by `Codec.dump` and `Codec.load`.
+
+The output is byte for byte the same as serializing the result of `Codec.dump` by
+`msgpack.packb(..., use_bin_type = True)` or `json.dumps(...).encode()`.
+'''
+from typing import Any, Callable, Dict, List, Tuple # NOQA
+
+import abc
+import json
+
+import charon # NOQA
+
+
+
+_PRIMITIVE_TYPES = frozenset({int, float, bool, str, bytes, type(None)})
+_SEQUENCE_TYPES = frozenset({list, tuple})
+_STR_TYPE = frozenset({str})
+
+#: Supported wire formats of `Codec.dumps` and `Codec.loads`
+WIRE_FORMATS = ('msgpack', 'json')
+
+
+def _import_msgpack() -> Any:
+	try:
+		import msgpack
+	except ImportError:
+		raise ImportError('msgpack wire format requires the msgpack package to be installed') from None
+	return msgpack
+
+
+
+class Writer(abc.ABC):
+	'''
+	Base class of wire format writers. Subclasses provide encoding of primitives and container headers,
+	walking of objects and dispatch of registered objects is shared and mirrors `Codec._dump`.
+	'''
+
+	def __init__(self, codec: 'charon.Codec') -> None:
+		self._codec = codec
+		# pylint: disable=protected-access
+		self._pack_array = charon.codec._pack_array if codec._pack_arrays else None
+		self._pack_arrays_min_length = charon.codec._PACK_ARRAYS_MIN_LENGTH
+		self._profile = codec._profile
+		# Encoded '!meta' and 'params' keys of registered objects keyed by (dtype, version, metadata)
+		self._headers = {} # type: Dict[Tuple[str, int, Any], Any]
+
+
+	@abc.abstractmethod
+	def dumps(self, obj: Any) -> bytes:
+		'''
+		Returns `obj` serialized to bytes of the wire format
+		'''
+
+
+	def _object_header(self, entry: Tuple[str, int, Callable[[Any], Any], Any, bool]) -> Any:
+		name, version, _, metadata, _ = entry
+		key = (name, version, metadata)
+		header = self._headers.get(key)
+		if header is None:
+			header = self._encode_object_header({'dtype': name, 'version': version} if metadata is None else metadata)
+			self._headers[key] = header
+		return header
+
+
+	@abc.abstractmethod
+	def _encode_object_header(self, metadata: Any) -> Any:
+		'''
+		Returns encoded '!meta' and 'params' keys of registered objects with the given metadata
+		'''
+
+
+	def _packed(self, obj: Any) -> Any:
+		'''
+		Returns packed array structure if the codec packs arrays and `obj` can be packed, otherwise None
+		'''
+		if self._pack_array is None or len(obj) < self._pack_arrays_min_length:
+			return None
+		return self._pack_array(obj)
+
+
+	def _get_dumper_entry(self, obj: Any) -> Tuple[str, int, Callable[[Any], Any], Any, bool]:
+		dtype = type(obj) # NOQA
+		entry = self._codec._dumpers_by_type.get(dtype) # pylint: disable=protected-access
+		if entry is None:
+			entry = self._codec._resolve_dumper(dtype) # pylint: disable=protected-access
+		return entry
+
+
+
+class MsgpackWriter(Writer):
+	'''
+	Writes msgpack into a bytearray. Primitives and lists or str keyed dicts of primitives only
+	are packed by the msgpack packer in one call, headers of the codec structures are precomputed.
+	'''
+
+	def __init__(self, codec: 'charon.Codec') -> None:
+		super().__init__(codec)
+		msgpack = _import_msgpack()
+		packer = msgpack.Packer(use_bin_type = True)
+		self._pack = packer.pack
+		self._pack_array_header = packer.pack_array_header
+		self._pack_map_header = packer.pack_map_header
+
+		pack = self._pack
+		self._dict_header = self._pack_map_header(2) + pack('!meta') + pack('!dict') + pack('values')
+		self._item_key = self._pack_map_header(2) + pack('key')
+		self._item_value = pack('value')
+		self._kv_header = self._pack_map_header(3) + pack('!meta') + pack('!kv') + pack('keys')
+		self._kv_values = pack('values')
+
+
+	def dumps(self, obj: Any) -> bytes:
+		out = bytearray()
+		self._write(obj, out)
+		return bytes(out)
+
+
+	def _encode_object_header(self, metadata: Any) -> bytes:
+		return self._pack_map_header(2) + self._pack('!meta') + self._pack(metadata) + self._pack('params')
+
+
+	def _write(self, obj: Any, out: bytearray) -> None:
+		dtype = type(obj) # NOQA
+
+		if dtype in _PRIMITIVE_TYPES:
+			out += self._pack(obj)
+		elif dtype in _SEQUENCE_TYPES:
+			packed = self._packed(obj)
+			if packed is not None:
+				out += self._pack(packed)
+			elif _PRIMITIVE_TYPES.issuperset(map(type, obj)):
+				out += self._pack(obj)
+			else:
+				out += self._pack_array_header(len(obj))
+				for item in obj:
+					if type(item) in _PRIMITIVE_TYPES:
+						out += self._pack(item)
+					else:
+						self._write(item, out)
+		elif dtype is dict:
+			if self._codec._format_version == 1: # pylint: disable=protected-access
+				out += self._dict_header
+				out += self._pack_array_header(len(obj))
+				for k, v in obj.items():
+					out += self._item_key
+					self._write(k, out)
+					out += self._item_value
+					self._write(v, out)
+			elif '!meta' not in obj and _STR_TYPE.issuperset(map(type, obj)):
+				if _PRIMITIVE_TYPES.issuperset(map(type, obj.values())):
+					out += self._pack(obj)
+				else:
+					out += self._pack_map_header(len(obj))
+					for k, v in obj.items():
+						out += self._pack(k)
+						if type(v) in _PRIMITIVE_TYPES:
+							out += self._pack(v)
+						else:
+							self._write(v, out)
+			else:
+				out += self._kv_header
+				out += self._pack_array_header(len(obj))
+				for k in obj:
+					self._write(k, out)
+				out += self._kv_values
+				out += self._pack_array_header(len(obj))
+				for v in obj.values():
+					self._write(v, out)
+		elif dtype is charon.codec.Buffer:
+			self._write(obj.view.tobytes(), out)
+		else:
+			entry = self._get_dumper_entry(obj)
+			start = len(out)
+			out += self._object_header(entry)
+			self._write(entry[2](obj), out)
+			if self._profile is not None:
+				self._profile.stats(entry[0], entry[1]).dump_bytes += len(out) - start
+
+
+
+class JsonWriter(Writer):
+	'''
+	Writes JSON as a list of str chunks, formatting is the same as of `json.dumps` with default arguments.
+	Lists or str keyed dicts of primitives only are encoded by the json encoder in one call.
+	'''
+
+	def __init__(self, codec: 'charon.Codec') -> None:
+		super().__init__(codec)
+		encoder = json.JSONEncoder()
+		if json.encoder.c_make_encoder is not None: # type: ignore
+			# Encoder of the C accelerator created once, `json.dumps` creates a new one on every call
+			self._chunks = json.encoder.c_make_encoder( # type: ignore
+				None, encoder.default, json.encoder.encode_basestring_ascii, None, ': ', ', ', False, False, True,
+			)
+		else:
+			self._chunks = encoder.iterencode
+		self._encode = encoder.encode
+		self._encode_str = json.encoder.encode_basestring_ascii # type: ignore
+
+
+	def dumps(self, obj: Any) -> bytes:
+		out = [] # type: List[str]
+		self._write(obj, out)
+		return ''.join(out).encode('utf-8')
+
+
+	def _encode_object_header(self, metadata: Any) -> str:
+		return '{"!meta": ' + self._encode(metadata) + ', "params": '
+
+
+	def _write(self, obj: Any, out: List[str]) -> None:
+		dtype = type(obj) # NOQA
+
+		if dtype is str:
+			out.append(self._encode_str(obj))
+		elif dtype in _PRIMITIVE_TYPES:
+			out.extend(self._chunks(obj, 0))
+		elif dtype in _SEQUENCE_TYPES:
+			packed = self._packed(obj)
+			if packed is not None:
+				# Packed data are bytes, which are not serializable to JSON
+				out.extend(self._chunks(packed, 0))
+			elif _PRIMITIVE_TYPES.issuperset(map(type, obj)):
+				out.extend(self._chunks(obj, 0))
+			elif obj:
+				out.append('[')
+				for item in obj:
+					if type(item) in _PRIMITIVE_TYPES:
+						out.extend(self._chunks(item, 0))
+					else:
+						self._write(item, out)
+					out.append(', ')
+				out[-1] = ']'
+			else:
+				out.append('[]')
+		elif dtype is dict:
+			if self._codec._format_version == 1: # pylint: disable=protected-access
+				out.append('{"!meta": "!dict", "values": [')
+				for k, v in obj.items():
+					out.append('{"key": ')
+					self._write(k, out)
+					out.append(', "value": ')
+					self._write(v, out)
+					out.append('}, ')
+				if obj:
+					out[-1] = '}]}'
+				else:
+					out.append(']}')
+			elif '!meta' not in obj and _STR_TYPE.issuperset(map(type, obj)):
+				if _PRIMITIVE_TYPES.issuperset(map(type, obj.values())):
+					out.extend(self._chunks(obj, 0))
+				elif obj:
+					out.append('{')
+					for k, v in obj.items():
+						out.append(self._encode_str(k))
+						out.append(': ')
+						if type(v) in _PRIMITIVE_TYPES:
+							out.extend(self._chunks(v, 0))
+						else:
+							self._write(v, out)
+						out.append(', ')
+					out[-1] = '}'
+			else:
+				# Keys and values are written item by item, `Codec.dump` does not pack them into arrays
+				out.append('{"!meta": "!kv", "keys": ')
+				self._write_items(obj.keys(), out)
+				out.append(', "values": ')
+				self._write_items(obj.values(), out)
+				out.append('}')
+		elif dtype is charon.codec.Buffer:
+			self._write(obj.view.tobytes(), out)
+		else:
+			entry = self._get_dumper_entry(obj)
+			start = len(out)
+			out.append(self._object_header(entry))
+			self._write(entry[2](obj), out)
+			out.append('}')
+			if self._profile is not None:
+				# Output is ASCII only, so the length of chunks is their size in bytes
+				self._profile.stats(entry[0], entry[1]).dump_bytes += sum(map(len, out[start:]))
+
+
+	def _write_items(self, items: Any, out: List[str]) -> None:
+		'''
+		Writes JSON array of `items` (a sized iterable) without packing them
+		'''
+		if not items:
+			out.append('[]')
+			return
+		out.append('[')
+		for item in items:
+			self._write(item, out)
+			out.append(', ')
+		out[-1] = ']'
+
+
+def make_object_hook(codec: 'charon.Codec') -> Callable[[Dict[str, Any]], Any]:
+	'''
+	Returns hook for the json and msgpack parsers called for every parsed dict (bottom up),
+	so dicts and registered objects are restored while parsing and no second walk is needed.
+	'''
+	get_loader = codec._get_loader # pylint: disable=protected-access
+	unpack_array = charon.codec._unpack_array # pylint: disable=protected-access
+	strict = codec._format_version == 1 # pylint: disable=protected-access
+
+	def object_hook(data: Dict[str, Any]) -> Any:
+		if '!meta' not in data:
+			# Key / value items of '!dict' and metadata of objects are the only dicts without '!meta' in format 1
+			if strict and data.keys() != {'key', 'value'} and data.keys() != {'dtype', 'version'}:
+				raise ValueError('Invalid dict structure')
+			return data
+
+		metadata = data['!meta']
+		if metadata.__class__ is str:
+			output = {} # type: Dict[Any, Any]
+			if metadata == '!dict':
+				for item in data['values']:
+					key = item['key']
+					output[tuple(key) if isinstance(key, list) else key] = item['value']
+			elif metadata == '!kv':
+				for key, value in zip(data['keys'], data['values']):
+					output[tuple(key) if isinstance(key, list) else key] = value
+			elif metadata == '!array':
+				return unpack_array(data)
+			else:
+				raise ValueError('Unsupported structure: {tag}'.format(tag = metadata))
+			return output
+
+		return get_loader(metadata)(data['params'])
+
+	return object_hook
+
+
+def loads(codec: 'charon.Codec', data: bytes, wire_format: str) -> Any:
+	object_hook = make_object_hook(codec)
+	if wire_format == 'msgpack':
+		return _import_msgpack().unpackb(data, raw = False, object_hook = object_hook)
+	return json.loads(data.decode('utf-8'), object_hook = object_hook)
@@ -10,6 +10,9 @@ ROOT = os.path.dirname(__file__)
 POSSIBLY_CYTHONIZE = [
 	'charon/codec.py',
 	'charon/codec_registry.py',
+	'charon/codegen.py',
+	'charon/lazy.py',
+	'charon/wire.py',
 	'charon/extensions/standard_registry.py',
 ]
 
@@ -43,6 +46,10 @@ setup(
 		'python-dateutil>=2.4.2,<3.0.0',
 		'click>=6.7,<7.0',
 	],
+	extras_require = {
+		'msgpack': ['msgpack>=0.5.6'],
+		'numpy': ['numpy>=1.12'],
+	},
 	scripts = ['bin/charon_ast_hash'],
 	packages = list(find_packages(
 		include = [